@@ -2,12 +2,19 @@
 # PURPOSE: To process the candidate's resume, create a vector store, and save it.
 
 import os
-import fitz  # PyMuPDF
+import sys
 import logging
 import tiktoken
-from datetime import datetime
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
+
+# Add project root to path to allow importing from src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.step_cache import hash_file, model_name
+from src.embedding_cache import CachedEmbeddings
+from src.bm25_index import BM25Index
+from src.candidate_store import slugify_candidate_id, store_for_model
+from src.pdf_extractor import PDFTextExtractor, split_stream
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -16,26 +23,41 @@ logger = logging.getLogger(__name__)
 class CandidateProcessor:
     """Processes the candidate's resume and manages the vector store."""
 
-    def __init__(self, embedding_client):
-        """Initializes the processor with an embedding client."""
+    def __init__(self, embedding_client, step_cache=None, candidate_store=None, pdf_extractor=None):
+        """
+        Initializes the processor with an embedding client.
+
+        Args:
+            embedding_client: The embeddings client used to vectorise resume chunks.
+            step_cache (StepCache, optional): When given, a byte-identical resume reuses its saved vector store.
+            candidate_store (CandidateStore, optional): The consolidated store resumes are added to.
+                Defaults to the store for the embedding client's model under outputs/candidate_store.
+            pdf_extractor (PDFTextExtractor, optional): Extracts (and caches) the resume text.
+        """
         self.embedding_client = embedding_client
-        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+        self.step_cache = step_cache
+        self.candidate_store = candidate_store or store_for_model(model_name(embedding_client))
+        self.chunk_size = 1000
+        self.chunk_overlap = 100
+        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
         self.encoding = tiktoken.get_encoding("cl100k_base")
-        # Get project root for consistent output path management
-        self.project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        self.vector_store_path = os.path.join(self.project_root, "outputs", "step2")
+        self.pdf_extractor = pdf_extractor or PDFTextExtractor()
 
     def _count_tokens(self, text: str) -> int:
         """Counts the number of tokens in a string."""
         return len(self.encoding.encode(text))
 
-    def process_and_save(self, resume_path: str, token_tracker):
+    def process_and_save(self, resume_path: str, token_tracker, candidate_id: str = None):
         """
-        Processes the resume PDF, creates a vector store, and saves it to disk.
+        Processes the resume PDF and adds its chunks to the consolidated candidate store.
 
         Args:
             resume_path (str): The file path to the candidate's resume.
             token_tracker: An instance of TokenUsageTracker.
+            candidate_id (str, optional): The candidate the resume belongs to. Defaults to the resume file name.
+
+        Returns:
+            str: Path of the candidate reference file that Step 5 opens, or None on failure.
         """
         if not os.path.exists(resume_path):
             logger.error(f"Resume file not found at: {resume_path}")
@@ -43,37 +65,55 @@ class CandidateProcessor:
 
         logger.info(f"Processing candidate resume: {resume_path}")
         try:
-            with fitz.open(resume_path) as doc:
-                text = "".join(page.get_text() for page in doc)
-            
-            chunks = self.text_splitter.split_text(text)
+            resume_sha256 = hash_file(resume_path)
+            resume_version = resume_sha256[:16]
+            candidate_id = slugify_candidate_id(candidate_id or os.path.splitext(os.path.basename(resume_path))[0])
+
+            cache_key = None
+            if self.step_cache:
+                cache_key = self.step_cache.make_key(
+                    "step2",
+                    resume_sha256=resume_sha256,
+                    candidate_id=candidate_id,
+                    chunk_size=self.chunk_size,
+                    chunk_overlap=self.chunk_overlap,
+                    embedding_model=model_name(self.embedding_client)
+                )
+                cached_path = self.step_cache.get(cache_key)
+                if cached_path and os.path.exists(cached_path):
+                    logger.info(f"Resume unchanged; reusing candidate vector store: {cached_path}")
+                    return cached_path
+                stored_path = self.candidate_store.reference(candidate_id, resume_version)
+                if stored_path:
+                    logger.info(f"Resume version {resume_version} already in the candidate store; reusing it")
+                    self.step_cache.set(cache_key, stored_path)
+                    return stored_path
+
+            # Pages are chunked as they are extracted; the whole resume text is never built
+            pages = self.pdf_extractor.iter_pages(resume_path)
+            chunks = list(split_stream(pages, self.text_splitter, window=4 * self.chunk_size))
             if not chunks:
                 logger.warning("No text could be extracted from the resume.")
                 return
 
             logger.info(f"Extracted {len(chunks)} chunks from the resume.")
 
-            # Track embedding tokens
-            for chunk in chunks:
+            # Track embedding tokens (chunks already in the embedding cache cost nothing)
+            pending = self.embedding_client.uncached(chunks) if isinstance(self.embedding_client, CachedEmbeddings) else chunks
+            for chunk in pending:
                 token_tracker.add_embedding_tokens(self._count_tokens(chunk))
 
-            # Create and save the vector store with timestamped naming
-            vector_store = FAISS.from_texts(texts=chunks, embedding=self.embedding_client)
-            
-            # Create timestamped filename for better organization
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            # Extract candidate name from resume path if possible
-            resume_basename = os.path.splitext(os.path.basename(resume_path))[0]
-            candidate_name = resume_basename.replace(" ", "_") if resume_basename else "candidate"
-            vector_store_filename = f"candidate_vector_store_{candidate_name}_{timestamp}.faiss"
-            
-            save_path = os.path.join(self.vector_store_path, vector_store_filename)
-            
-            # Ensure output directory exists
-            os.makedirs(self.vector_store_path, exist_ok=True)
-            
-            vector_store.save_local(save_path)
-            logger.info(f"Candidate vector store saved successfully to: {save_path}")
+            # Append the chunks to the consolidated store; existing candidates are left untouched
+            vectors = self.embedding_client.embed_documents(chunks)
+            save_path = self.candidate_store.add_resume(
+                candidate_id, resume_version, chunks, vectors, source=os.path.basename(resume_path)
+            )
+            # The keyword index lets Step 5 answer exact skill queries without embedding them
+            self.candidate_store.save_lexical_index(candidate_id, resume_version, BM25Index.build(chunks))
+            logger.info(f"Candidate '{candidate_id}' stored in {self.candidate_store.directory} (reference: {save_path})")
+
+            if cache_key:
+                self.step_cache.set(cache_key, save_path)
             
             # Return the save path for use by other steps
             return save_path
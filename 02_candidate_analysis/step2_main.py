@@ -4,6 +4,8 @@
 
 import os
 import sys
+import time
+import argparse
 import logging
 
 # Configure logging
@@ -12,7 +14,7 @@ logging.getLogger('faiss').setLevel(logging.ERROR)
 logging.getLogger('httpx').setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
-def setup_components():
+def setup_components(use_cache=True):
     """Sets up and imports necessary components."""
     try:
         # Add project root to path to allow importing from src
@@ -20,10 +22,13 @@ def setup_components():
         sys.path.insert(0, project_root)
         
         from src.AzureConnection import embeddings
+        from src.embedding_executor import build_embedding_client
         from src.token_tracker import TokenUsageTracker
+        from src.run_manifest import RunManifest
+        from src.step_cache import StepCache
         from step2_candidate_processor import CandidateProcessor
         logger.info("Step 2 components loaded successfully.")
-        return embeddings, CandidateProcessor, TokenUsageTracker
+        return build_embedding_client(embeddings, use_cache=use_cache), CandidateProcessor, TokenUsageTracker, RunManifest, StepCache
     except ImportError as e:
         logger.error(f"Failed to import Step 2 components: {e}")
         sys.exit(1)
@@ -33,29 +38,38 @@ def main():
     print("STEP 2: CANDIDATE RESUME ANALYSIS")
     print("=" * 50)
 
-    if len(sys.argv) != 2:
-        print("Usage: python 02_candidate_analysis/step2_main.py \"[Path to Resume]\"")
-        print("\nExample:")
-        print("  python 02_candidate_analysis/step2_main.py \"./data/candidate/resume.pdf\"")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Process a candidate resume into a FAISS vector store.",
+        epilog='Example: python 02_candidate_analysis/step2_main.py "./data/candidate/resume.pdf"'
+    )
+    parser.add_argument("resume_path", help="Path to the candidate resume PDF.")
+    parser.add_argument("--run-id", help="Pipeline run id; the step records its artifacts in outputs/runs/<run-id>/step2.json.")
+    parser.add_argument("--candidate-id", help="Id the resume is stored under in the consolidated candidate store (default: the resume file name).")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-embed the resume, bypassing both the cached vector store and the embedding cache.")
+    args = parser.parse_args()
 
-    resume_path = sys.argv[1]
+    resume_path = args.resume_path
     print(f"Resume Path: {resume_path}")
     print("-" * 50)
 
-    embeddings, CandidateProcessor, TokenUsageTracker = setup_components()
+    embeddings, CandidateProcessor, TokenUsageTracker, RunManifest, StepCache = setup_components(use_cache=not args.no_cache)
     
+    start = time.perf_counter()
+    manifest = RunManifest(args.run_id)
     token_tracker = TokenUsageTracker()
-    processor = CandidateProcessor(embedding_client=embeddings)
-    vector_store_path = processor.process_and_save(resume_path, token_tracker)
+    step_cache = None if args.no_cache else StepCache()
+    processor = CandidateProcessor(embedding_client=embeddings, step_cache=step_cache)
+    vector_store_path = processor.process_and_save(resume_path, token_tracker, candidate_id=args.candidate_id)
+    manifest.record_step("step2", {"vector_store": vector_store_path}, time.perf_counter() - start)
 
     print("\n" + "=" * 50)
     print("CANDIDATE ANALYSIS COMPLETE")
     print("=" * 50)
     if vector_store_path:
-        print(f"Vector store saved to: {vector_store_path}")
+        print(f"Candidate reference saved to: {vector_store_path}")
     else:
         print("Vector store creation completed.")
+    print(f"Run ID: {manifest.run_id}")
     
     token_tracker.display_usage()
     
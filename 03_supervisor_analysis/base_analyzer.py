@@ -5,28 +5,34 @@ from abc import ABC, abstractmethod
 from typing import Dict
 from step3_prompts import PromptManager
 from src.token_tracker import TokenUsageTracker
+from src.llm_gateway import DEFAULT_LLM_MODEL, get_gateway
+
+LLM_MODEL = DEFAULT_LLM_MODEL
 
 class BaseAnalyzer(ABC):
     """
     An abstract base class for analyzers that execute LLM calls.
     """
+    llm_model = LLM_MODEL
+
     def __init__(self, llm_client, token_tracker: TokenUsageTracker):
         """
         Initializes the BaseAnalyzer.
 
         Args:
-            llm_client: The client for interacting with the Large Language Model.
+            llm_client: The LLM client, or an LLMGateway; a plain client is wrapped in the shared gateway.
             token_tracker: An instance of TokenUsageTracker.
         """
-        self.llm_client = llm_client
+        self.llm_client = get_gateway(llm_client)
         self.token_tracker = token_tracker
 
-    def _execute_llm_call(self, prompt_manager: PromptManager, **kwargs) -> str:
+    def _execute_llm_call(self, prompt_manager: PromptManager, json_mode: bool = False, **kwargs) -> str:
         """
         Executes a call to the LLM using a structured prompt from the PromptManager.
 
         Args:
             prompt_manager (PromptManager): The prompt manager instance containing the templates.
+            json_mode (bool): Request a JSON object response (where the deployment supports it).
             **kwargs: The variables to format the user prompt template.
 
         Returns:
@@ -34,21 +40,19 @@ class BaseAnalyzer(ABC):
         """
         user_prompt = prompt_manager.format_user_prompt(**kwargs)
         
-        response = self.llm_client.chat.completions.create(
-            model="DevGPT4o",
+        response = self.llm_client.complete(
             messages=[
                 {"role": "system", "content": prompt_manager.system_instruction},
                 {"role": "user", "content": user_prompt},
             ],
+            model=self.llm_model,
             temperature=0.1,
-            max_tokens=1000
+            max_tokens=1000,
+            token_tracker=self.token_tracker,
+            label=type(self).__name__,
+            **({"response_format": {"type": "json_object"}} if json_mode else {})
         )
-        
-        # Track completion tokens
-        if response.usage:
-            self.token_tracker.add_completion_usage(response.usage)
-            
-        return response.choices[0].message.content.strip()
+        return response["content"]
 
     @abstractmethod
     def analyze(self, *args, **kwargs) -> Dict:
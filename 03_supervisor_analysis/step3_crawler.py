@@ -0,0 +1,256 @@
+# FILE: 03_supervisor_analysis/step3_crawler.py
+# PURPOSE: Concurrent, bounded crawl of a supervisor's web presence with conditional GETs.
+
+import asyncio
+import logging
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urldefrag, urlparse
+
+import aiohttp
+
+# Add project root to path to allow importing from src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.http_cache import HttpCache
+from step3_html_extractor import DEFAULT_MAX_BYTES, FEED_CHUNK_SIZE, ExtractionStream, extract
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# External academic profiles worth following from a publication page
+PROFILE_HOSTS = ("scholar.google.", "dblp.org", "dblp.uni-trier.de", "orcid.org", "semanticscholar.org", "researchgate.net")
+# Same-site pages that usually describe the supervisor's research
+PAGE_HINTS = ("publication", "papers", "research", "project", "lab", "group", "team", "people", "bio", "about", "cv")
+SKIPPED_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".zip", ".bib", ".ppt", ".pptx", ".doc", ".docx", ".mp4")
+
+class SupervisorCrawler:
+    """
+    Fetches a supervisor's publication page and a bounded set of related pages it links to
+    (lab and research pages on the same site, Scholar/DBLP/ORCID-style profiles) concurrently
+    with aiohttp. Connections are capped overall and per host. Bodies are parsed as they
+    download and reading stops at `max_bytes`; only the extracted text and links are kept, in
+    memory and in an HttpCache, so analysing the same professor again sends conditional GETs
+    and a 304 costs no parsing.
+    """
+    def __init__(self, http_cache: Optional[HttpCache] = None, max_pages: int = 6, per_host_limit: int = 2,
+                 total_limit: int = 8, timeout: float = 10, user_agent: str = DEFAULT_USER_AGENT,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initializes the crawler.
+
+        Args:
+            http_cache: Where responses and their ETag/Last-Modified validators are kept. None disables caching.
+            max_pages: Maximum number of pages fetched per crawl, including the start page.
+            per_host_limit: Maximum concurrent connections to one host.
+            total_limit: Maximum concurrent connections overall.
+            timeout: Seconds allowed for each request.
+            user_agent: The User-Agent header sent with every request.
+            max_bytes: Bytes read from each response; the rest of a larger page is never downloaded.
+        """
+        self.http_cache = http_cache
+        self.max_pages = max_pages
+        self.per_host_limit = per_host_limit
+        self.total_limit = total_limit
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.max_bytes = max_bytes
+
+    def _session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(limit=self.total_limit, limit_per_host=self.per_host_limit)
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={'User-Agent': self.user_agent}
+        )
+
+    @staticmethod
+    def _cached_page(content) -> Optional[Dict]:
+        """The page stored in the HTTP cache, or None for an entry written by an older version (raw HTML)."""
+        if not isinstance(content, dict):
+            return None
+        return {"text": content["text"], "links": content["links"], "bytes": 0, "seconds": 0.0, "cached": True}
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str, conditional: bool = True) -> Optional[Dict]:
+        """
+        Fetches one page, revalidating a cached copy when there is one (and `conditional` is set).
+
+        Returns:
+            extract()'s result for the page ('cached' is set when it came from the HTTP cache),
+            or None on failure.
+        """
+        headers = self.http_cache.conditional_headers(url) if self.http_cache and conditional else {}
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    page = self._cached_page(self.http_cache.touch(url)) if self.http_cache else None
+                    if page is not None:
+                        logger.info(f"Not modified, using cached copy: {url}")
+                        return page
+                    if not headers:
+                        raise ValueError("304 Not Modified in reply to an unconditional request")
+                else:
+                    response.raise_for_status()
+                    stream = ExtractionStream(url, self.max_bytes, encoding=response.charset or "utf-8")
+                    async for chunk in response.content.iter_chunked(FEED_CHUNK_SIZE):
+                        if not stream.feed(chunk):
+                            logger.warning(f"{url} is larger than {self.max_bytes} bytes; only the first {self.max_bytes} were read")
+                            break
+                    page = stream.close()
+                    if self.http_cache:
+                        self.http_cache.store(url, {"text": page["text"], "links": page["links"]},
+                                              response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                    return page
+            # 304, but the cached copy was evicted after its validators were read (or predates this
+            # format): the body is empty, so ask again.
+            logger.info(f"Cached copy of {url} is gone; fetching it again without validators")
+            return await self._fetch(session, url, conditional=False)
+        except Exception as e:
+            cached = self.http_cache.get(url) if self.http_cache else None
+            page = self._cached_page(cached["body"]) if cached else None
+            if page:
+                logger.warning(f"Failed to fetch {url} ({e}); using the cached copy")
+                return page
+            logger.error(f"Failed to fetch {url}: {e}")
+            return None
+
+    @staticmethod
+    def select_links(base_url: str, links: List[Tuple[str, str]], limit: int) -> List[str]:
+        """
+        Picks the links on a page worth crawling: academic profile links first, then same-site
+        pages whose URL or anchor text suggests research content.
+
+        Args:
+            base_url: The page the links were found on.
+            links: The page's (url, anchor text) pairs, as extract() returns them.
+            limit: Maximum number of links returned.
+        """
+        base_host = urlparse(base_url).netloc
+        profiles, related, seen = [], [], {urldefrag(base_url)[0]}
+        for href, anchor_text in links:
+            url = urldefrag(href)[0]
+            parsed = urlparse(url)
+            if parsed.scheme not in ("http", "https") or url in seen or parsed.path.lower().endswith(SKIPPED_EXTENSIONS):
+                continue
+            seen.add(url)
+            if any(host in parsed.netloc for host in PROFILE_HOSTS):
+                profiles.append(url)
+            elif parsed.netloc == base_host:
+                label = f"{parsed.path} {anchor_text}".lower()
+                if any(hint in label for hint in PAGE_HINTS):
+                    related.append(url)
+        return (profiles + related)[:limit]
+
+    async def _crawl(self, start_url: str) -> Dict[str, Dict]:
+        async with self._session() as session:
+            start_page = await self._fetch(session, start_url)
+            if start_page is None:
+                return {}
+            pages = {start_url: start_page}
+            links = self.select_links(start_url, start_page["links"], self.max_pages - 1)
+            fetched = await asyncio.gather(*(self._fetch(session, url) for url in links))
+            pages.update({url: page for url, page in zip(links, fetched) if page is not None})
+        logger.info(f"Crawled {len(pages)} page(s) starting from {start_url}")
+        return pages
+
+    async def _fetch_one(self, url: str) -> Optional[Dict]:
+        async with self._session() as session:
+            return await self._fetch(session, url)
+
+    def crawl(self, start_url: str) -> Dict[str, Dict]:
+        """
+        Fetches the start page and up to max_pages - 1 related pages it links to.
+
+        Returns:
+            URL -> extracted page (see _fetch) for every page fetched successfully; empty if the
+            start page failed.
+        """
+        return asyncio.run(self._crawl(start_url))
+
+    def fetch(self, url: str) -> Optional[Dict]:
+        """Fetches a single page (through the HTTP cache) and returns it extracted. Returns None on failure."""
+        return asyncio.run(self._fetch_one(url))
+
+def self_check() -> bool:
+    """
+    Crawls a local http.server stand-in that serves ETags and answers If-None-Match with 304:
+    a cold crawl, a revalidating crawl served from the cache, and a crawl whose cache entry is
+    evicted between reading the validators and the 304 arriving.
+
+    Returns:
+        True if every scenario returned the real pages.
+    """
+    import tempfile
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    site = {
+        "/": '<html><body><h1>Prof. Example</h1><a href="/research">Research</a></body></html>',
+        "/research": "<html><body><p>Machine learning for robotics.</p></body></html>",
+    }
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            etag = f'"{hash(site[self.path]) & 0xffffffff:x}"' if self.path in site else None
+            conditional = self.headers.get("If-None-Match")
+            requests.append((self.path, conditional))
+            if etag is None:
+                self.send_error(404)
+            elif conditional == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+            else:
+                body = site[self.path].encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    class EvictingCache(HttpCache):
+        """Drops each entry right after handing out its validators, as size-based eviction might."""
+        def conditional_headers(self, url: str) -> Dict[str, str]:
+            headers = super().conditional_headers(url)
+            self._cache.delete(url)
+            return headers
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    expected = {f"{base}{path}": extract(html)["text"] for path, html in site.items()}
+    passed = True
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = HttpCache(os.path.join(cache_dir, "http"))
+            scenarios = [
+                ("cold crawl", SupervisorCrawler(http_cache=cache), 0),
+                ("revalidated crawl (304s served from the cache)", SupervisorCrawler(http_cache=cache), len(site)),
+                ("entry evicted before the 304", SupervisorCrawler(http_cache=EvictingCache(os.path.join(cache_dir, "http"))), len(site)),
+            ]
+            for name, crawler, expected_304s in scenarios:
+                del requests[:]
+                pages = {url: page["text"] for url, page in crawler.crawl(f"{base}/").items()}
+                not_modified = sum(1 for _, conditional in requests if conditional)
+                ok = pages == expected and not_modified == expected_304s
+                passed = passed and ok
+                print(f"{'PASS' if ok else 'FAIL'}: {name} - {len(pages)} page(s), {len(requests)} request(s), "
+                      f"{not_modified} conditional")
+                crawler.http_cache.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    return passed
+
+# Check conditional GETs and the 304 handling against a local server
+if __name__ == '__main__':
+    sys.exit(0 if self_check() else 1)
@@ -1,10 +1,11 @@
 # FILE: 03_supervisor_analysis/step3_document_processor.py
 # PURPOSE: Manages the processing of documents and vector stores.
 
-import fitz  # PyMuPDF
 import os
-from typing import List
+import sys
+from typing import Dict, List
 import logging
+import numpy as np
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -15,13 +16,24 @@ from langchain_community.vectorstores import FAISS
 from langchain_openai import AzureOpenAIEmbeddings
 import tiktoken
 
+# Add project root to path to allow importing from src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.context_packer import ContextPacker
+from src.embedding_cache import CachedEmbeddings, query_cache_for
+from src.pdf_extractor import PDFTextExtractor
+
 class DocumentProcessor:
     """
     Processes PDF documents and manages FAISS vector stores.
     """
-    def __init__(self, embedding_client=None):
+    def __init__(self, embedding_client=None, pdf_extractor=None):
         """
         Initializes the document processor.
+
+        Args:
+            embedding_client: The embeddings client used for chunks and queries.
+            pdf_extractor: Extracts (and caches) PDF text; defaults to a PDFTextExtractor.
         """
         self.candidate_store = None
         self.institutional_store = None
@@ -33,6 +45,7 @@ class DocumentProcessor:
         # This should be replaced with a proper way to get the embedding client
         self.embedding_client = embedding_client or AzureOpenAIEmbeddings()
         self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.pdf_extractor = pdf_extractor or PDFTextExtractor()
 
     def _count_tokens(self, text: str) -> int:
         """Counts the number of tokens in a string."""
@@ -48,20 +61,30 @@ class DocumentProcessor:
         """
         logger.info(f"Processing {len(pdf_paths)} PDF(s) for {store_type} store...")
         all_chunks = []
+        all_metadata = []
         for path in pdf_paths:
             try:
                 if not os.path.exists(path):
                     logger.warning(f"File not found: {path}")
                     continue
                 
-                with fitz.open(path) as doc:
-                    text = "".join(page.get_text() for page in doc)
-                    chunks = self.text_splitter.split_text(text)
-                    all_chunks.extend(chunks)
-                    
-                    # Track embedding tokens
-                    for chunk in chunks:
-                        token_tracker.add_embedding_tokens(self._count_tokens(chunk))
+                # Chunk page by page, as pages are extracted, so every hit can cite the page it came from
+                chunks, metadata = [], []
+                for page_number, page_text in enumerate(self.pdf_extractor.iter_pages(path), start=1):
+                    for chunk in self.text_splitter.split_text(page_text):
+                        metadata.append({
+                            "chunk_id": len(all_chunks) + len(chunks),
+                            "source": os.path.basename(path),
+                            "page": page_number
+                        })
+                        chunks.append(chunk)
+                all_chunks.extend(chunks)
+                all_metadata.extend(metadata)
+                
+                # Track embedding tokens (chunks already in the embedding cache cost nothing)
+                pending = self.embedding_client.uncached(chunks) if isinstance(self.embedding_client, CachedEmbeddings) else chunks
+                for chunk in pending:
+                    token_tracker.add_embedding_tokens(self._count_tokens(chunk))
 
                 logger.info(f"Processed {path}: extracted {len(chunks)} chunks")
             except Exception as e:
@@ -71,12 +94,89 @@ class DocumentProcessor:
             logger.warning(f"No text could be extracted from the PDFs for {store_type} store.")
             return
 
-        vector_store = FAISS.from_texts(texts=all_chunks, embedding=self.embedding_client)
+        vector_store = FAISS.from_texts(texts=all_chunks, embedding=self.embedding_client, metadatas=all_metadata)
         if store_type == "institutional":
             self.institutional_store = vector_store
         
         logger.info(f"{store_type.capitalize()} vector store created successfully.")
 
+    def retrieve_many(self, queries: List[str], k: int = 3, token_tracker=None) -> List[Dict]:
+        """
+        Retrieves context for several queries with one embedding request and one index search.
+
+        Args:
+            queries: The queries to search for, e.g. one per research domain.
+            k: The number of chunks to retrieve per query.
+            token_tracker: When given, query embedding cache hits and misses are counted in it.
+
+        Returns:
+            A list of hits, each a dict with 'chunk_id', 'score' (L2 distance, lower is closer),
+            'source', 'page', 'text' and the 'queries' that retrieved it. A chunk found by several
+            queries appears once, with its best score. Hits are sorted by score.
+        """
+        if not self.institutional_store or not queries:
+            return []
+
+        logger.info(f"Retrieving context for {len(queries)} queries")
+        query_vectors = self._embed_queries(queries, token_tracker)
+        return self._search(queries, query_vectors, k)
+
+    def retrieve_packed(self, queries: List[str], packer: ContextPacker, k: int = 6, token_tracker=None) -> Dict:
+        """
+        Retrieves k candidate chunks per query and packs the best of them into the packer's
+        token budget (MMR ranking, neighbouring chunks merged).
+
+        Args:
+            queries: The queries to search for, e.g. one per research domain.
+            packer: Decides which chunks fit in the prompt.
+            k: The number of candidate chunks to retrieve per query.
+            token_tracker: When given, query embedding cache hits and misses are counted in it.
+
+        Returns:
+            The packer's result: 'text', 'passages', 'chunk_ids', 'tokens' and 'dropped'.
+        """
+        if not self.institutional_store or not queries:
+            return packer.pack([], [])
+
+        logger.info(f"Retrieving packed context for {len(queries)} queries")
+        query_vectors = self._embed_queries(queries, token_tracker)
+        hits = self._search(queries, query_vectors, k)
+        index = self.institutional_store.index
+        for hit in hits:
+            hit["vector"] = index.reconstruct(hit["chunk_id"])
+        return packer.pack(hits, query_vectors)
+
+    def _embed_queries(self, queries: List[str], token_tracker=None) -> np.ndarray:
+        """Embeds queries through the shared query cache, so recurring domains are not re-embedded."""
+        return np.asarray(query_cache_for(self.embedding_client).embed_queries(queries, token_tracker), dtype=np.float32)
+
+    def _search(self, queries: List[str], query_vectors: np.ndarray, k: int) -> List[Dict]:
+        """One index search for all query vectors; see retrieve_many for the hit format."""
+        store = self.institutional_store
+        distances, ids = store.index.search(query_vectors, min(k, store.index.ntotal))
+
+        hits = {}
+        for query, row_ids, row_distances in zip(queries, ids, distances):
+            for chunk_id, score in zip(row_ids, row_distances):
+                if chunk_id == -1:
+                    continue
+                chunk_id, score = int(chunk_id), float(score)
+                if chunk_id not in hits:
+                    doc = store.docstore.search(store.index_to_docstore_id[chunk_id])
+                    hits[chunk_id] = {
+                        "chunk_id": chunk_id,
+                        "score": score,
+                        "source": doc.metadata.get("source"),
+                        "page": doc.metadata.get("page"),
+                        "text": doc.page_content,
+                        "queries": [query]
+                    }
+                else:
+                    hits[chunk_id]["score"] = min(hits[chunk_id]["score"], score)
+                    if query not in hits[chunk_id]["queries"]:
+                        hits[chunk_id]["queries"].append(query)
+        return sorted(hits.values(), key=lambda hit: hit["score"])
+
     def retrieve(self, query: str, k: int = 3) -> str:
         """
         Retrieves relevant context from the institutional vector store.
@@ -86,10 +186,7 @@ class DocumentProcessor:
         
         logger.info(f"Retrieving context for query: '{query}'")
         try:
-            docs = self.institutional_store.similarity_search(query, k=k)
-            return "\\n---\\n".join([doc.page_content for doc in docs])
+            return "\n---\n".join(hit["text"] for hit in self.retrieve_many([query], k=k))
         except Exception as e:
             logger.error(f"Error retrieving context: {e}")
             return f"Error retrieving context: {e}"
-
-
@@ -0,0 +1,224 @@
+# FILE: 03_supervisor_analysis/step3_html_extractor.py
+# PURPOSE: Single-pass, tree-free extraction of visible text and links from (large) HTML pages.
+
+import argparse
+import codecs
+import glob
+import os
+import time
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urljoin
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+FEED_CHUNK_SIZE = 64 * 1024
+
+# Elements whose content never contributes text
+SKIPPED_TAGS = {"script", "style", "nav", "noscript", "template", "svg", "iframe"}
+# Elements that start a new line, so text from neighbouring blocks never fuses into one word
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "dl", "dt", "dd", "tr", "td", "th", "table", "section", "article",
+    "header", "footer", "aside", "main", "h1", "h2", "h3", "h4", "h5", "h6", "title", "blockquote", "pre", "hr"
+}
+
+class HtmlTextExtractor(HTMLParser):
+    """
+    Streams HTML through the standard-library parser without building a tree. Text outside
+    script/style/nav (and similar) elements is collected, and every <a href> is recorded with
+    its anchor text, including links inside nav so crawlers can still follow them.
+    """
+    def __init__(self, base_url: Optional[str] = None):
+        """
+        Initializes the extractor.
+
+        Args:
+            base_url: Used to resolve relative links. Links are returned as written when omitted.
+        """
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.links: List[Tuple[str, str]] = []
+        self._text: List[str] = []
+        self._skip_depth = 0
+        self._open_link: Optional[Tuple[str, List[str]]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._text.append("\n")
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self._close_link()
+                self._open_link = (urljoin(self.base_url, href) if self.base_url else href, [])
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags such as <br/> never open a skipped section.
+        if tag in BLOCK_TAGS:
+            self._text.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._text.append("\n")
+        if tag == "a":
+            self._close_link()
+
+    def handle_data(self, data):
+        if self._open_link is not None:
+            self._open_link[1].append(data)
+        if self._skip_depth == 0:
+            self._text.append(data)
+
+    def _close_link(self):
+        if self._open_link is not None:
+            url, parts = self._open_link
+            self.links.append((url, " ".join("".join(parts).split())))
+            self._open_link = None
+
+    def text(self) -> str:
+        """Returns the collected text with whitespace runs collapsed (line breaks kept)."""
+        lines = (" ".join(line.split()) for line in "".join(self._text).splitlines())
+        return "\n".join(line for line in lines if line)
+
+class ExtractionStream:
+    """
+    Incremental form of extract(): chunks are fed as they arrive (from a network response, say)
+    and parsed straight away. Once `max_bytes` have been fed, feed() returns False and the caller
+    should stop reading, so the cap bounds the download as well as the parsing.
+    """
+    def __init__(self, base_url: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES, encoding: str = "utf-8"):
+        """
+        Initializes the stream.
+
+        Args:
+            base_url: Used to resolve relative links.
+            max_bytes: Input beyond this many bytes is ignored.
+            encoding: How byte chunks are decoded (invalid bytes replaced); UTF-8 if unknown.
+        """
+        self.parser = HtmlTextExtractor(base_url)
+        self.max_bytes = max_bytes
+        self.consumed = 0
+        self.truncated = False
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._decoded_bytes = False
+        self._seconds = 0.0
+
+    def feed(self, chunk: Union[str, bytes]) -> bool:
+        """Parses the next chunk. Returns False once the cap is reached; later chunks are ignored."""
+        if self.truncated:
+            return False
+        start = time.perf_counter()
+        is_bytes = isinstance(chunk, bytes)
+        chunk_bytes = len(chunk) if is_bytes else len(chunk.encode("utf-8"))
+        if self.consumed + chunk_bytes > self.max_bytes:
+            self.truncated = True
+            # Keep the part of this chunk that still fits (approximately, for text input).
+            keep = self.max_bytes - self.consumed
+            chunk = chunk[:keep] if is_bytes else chunk.encode("utf-8")[:keep].decode("utf-8", errors="ignore")
+            chunk_bytes = keep
+        if is_bytes:
+            self._decoded_bytes = True
+            chunk = self._decoder.decode(chunk)
+        self.parser.feed(chunk)
+        self.consumed += chunk_bytes
+        self._seconds += time.perf_counter() - start
+        return not self.truncated
+
+    def close(self) -> Dict:
+        """Finishes parsing and returns the same dict as extract()."""
+        start = time.perf_counter()
+        if self._decoded_bytes and not self.truncated:
+            self.parser.feed(self._decoder.decode(b"", final=True))
+        self.parser.close()
+        self.parser._close_link()
+        self._seconds += time.perf_counter() - start
+
+        return {
+            "text": self.parser.text(),
+            "links": self.parser.links,
+            "bytes": self.consumed,
+            "truncated": self.truncated,
+            "seconds": self._seconds,
+            "bytes_per_second": self.consumed / self._seconds if self._seconds > 0 else float("inf"),
+        }
+
+def extract(html: Union[str, bytes], base_url: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> Dict:
+    """
+    Extracts visible text and links from a page in one streaming pass.
+
+    Args:
+        html: The page as text, or as raw bytes (decoded as UTF-8, invalid bytes replaced).
+        base_url: Used to resolve relative links.
+        max_bytes: Input beyond this many bytes is ignored.
+
+    Returns:
+        Dict with 'text', 'links' ((url, anchor text) pairs), 'bytes' (bytes parsed),
+        'truncated', 'seconds' and 'bytes_per_second'.
+    """
+    stream = ExtractionStream(base_url, max_bytes)
+    for offset in range(0, len(html), FEED_CHUNK_SIZE):
+        if not stream.feed(html[offset:offset + FEED_CHUNK_SIZE]):
+            break
+    return stream.close()
+
+def benchmark(paths: List[str], repeat: int = 3) -> Dict[str, float]:
+    """
+    Compares this extractor with BeautifulSoup(html, 'html.parser').get_text() on saved pages.
+
+    Args:
+        paths: HTML files to parse.
+        repeat: How often each file is parsed; the fastest run counts.
+
+    Returns:
+        Dict with total 'bytes' and the 'streaming' and 'beautifulsoup' throughput in bytes per second.
+    """
+    from bs4 import BeautifulSoup
+
+    total_bytes, streaming_seconds, soup_seconds = 0, 0.0, 0.0
+    for path in paths:
+        with open(path, "rb") as f:
+            html = f.read()
+        total_bytes += len(html)
+        text = html.decode("utf-8", errors="replace")
+
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            extract(html, max_bytes=len(html))
+            runs.append(time.perf_counter() - start)
+        streaming_seconds += min(runs)
+
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            BeautifulSoup(text, 'html.parser').get_text(' ')
+            runs.append(time.perf_counter() - start)
+        soup_seconds += min(runs)
+
+    return {
+        "bytes": total_bytes,
+        "streaming": total_bytes / streaming_seconds if streaming_seconds else float("inf"),
+        "beautifulsoup": total_bytes / soup_seconds if soup_seconds else float("inf"),
+    }
+
+# Benchmark against BeautifulSoup on a directory of saved pages
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare streaming HTML extraction with BeautifulSoup on saved pages.")
+    parser.add_argument("corpus", help="Directory of saved .html/.htm pages.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per file; the fastest counts.")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, "**", "*.htm*"), recursive=True))
+    if not paths:
+        print(f"No .html files found in {args.corpus}")
+    else:
+        result = benchmark(paths, args.repeat)
+        print(f"Pages: {len(paths)}  Size: {result['bytes'] / 1e6:.2f} MB")
+        print(f"Streaming extractor: {result['streaming'] / 1e6:.2f} MB/s")
+        print(f"BeautifulSoup:       {result['beautifulsoup'] / 1e6:.2f} MB/s")
+        print(f"Speed-up:            {result['streaming'] / result['beautifulsoup']:.1f}x")
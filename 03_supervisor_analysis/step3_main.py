@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
 """
 Step 3: Supervisor Analysis
-Usage: python step3.py "Professor Name" "University Name" "Publication URL" "path/to/position.pdf"
+Usage: python step3.py "Professor Name" "University Name" "Publication URL" "path/to/position.pdf" [--run-id RUN_ID]
 """
 
 import os
 import sys
+import time
+import argparse
 import logging
+import threading
 from datetime import datetime
 
 # Configure logging to hide verbose HTTP requests and Faiss GPU warnings
@@ -16,70 +19,100 @@ logging.getLogger('faiss').setLevel(logging.ERROR)
 
 logger = logging.getLogger(__name__)
 
+_components = None
+_components_lock = threading.Lock()
+
 def validate_inputs():
     """Validate command line inputs."""
-    if len(sys.argv) != 5:
-        print("Usage: python step3.py \"[Professor Name]\" \"[University]\" \"[Publication URL]\" \"[Path to Position]\"")
-        print("\nExample:")
-        print("  python 03_supervisor_analysis/step3_main.py \"Jane Doe\" \"Example University\" \"http://example.com\" \"./data/institutional/position.pdf\"")
-        sys.exit(1)
-    
-    professor_name = sys.argv[1].strip()
-    university = sys.argv[2].strip()
-    publication_url = sys.argv[3].strip()
-    position_path = sys.argv[4].strip()
+    parser = argparse.ArgumentParser(
+        description="Analyze a prospective supervisor and PhD position.",
+        epilog='Example: python 03_supervisor_analysis/step3_main.py "Jane Doe" "Example University" "http://example.com" "./data/institutional/position.pdf"'
+    )
+    parser.add_argument("professor_name", help="Professor name")
+    parser.add_argument("university", help="University name")
+    parser.add_argument("publication_url", help="Professor publication URL")
+    parser.add_argument("position_path", help="Path to the position description PDF")
+    parser.add_argument("--run-id", help="Pipeline run id; the step records its artifacts in outputs/runs/<run-id>/step3.json.")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-run the analysis instead of reusing a stored profile.")
+    parser.add_argument("--refresh-profile", action="store_true", help="Delete this professor's stored profiles, then analyze and store a fresh one.")
+    args = parser.parse_args()
+    
+    professor_name = args.professor_name.strip()
+    university = args.university.strip()
+    publication_url = args.publication_url.strip()
+    position_path = args.position_path.strip()
     
     if not all([professor_name, university, publication_url, position_path]):
         print("ERROR: All four arguments are required and cannot be empty")
         sys.exit(1)
     
-    return professor_name, university, publication_url, position_path
+    return professor_name, university, publication_url, position_path, args.run_id, args.no_cache, args.refresh_profile
 
 def setup_components():
-    """Setup Step 3 components."""
+    """
+    Setup Step 3 components once per process, so every analysis (one per row in batch and
+    precompute runs) shares one embedding client and its caches.
+    """
+    global _components
+    with _components_lock:
+        if _components is None:
+            _components = _load_components()
+        return _components
+
+def _load_components():
     try:
         # Add parent directory to path for AzureConnection
         parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        sys.path.insert(0, parent_dir)
+        if parent_dir not in sys.path:
+            sys.path.insert(0, parent_dir)
         
         from step3_orchestrator import SupervisorAnalyzer
         from step3_document_processor import DocumentProcessor
         from step3_web_searcher import WebSearcher
         from src.AzureConnection import embeddings, client
+        from src.embedding_executor import build_embedding_client
         from src.token_tracker import TokenUsageTracker
+        from src.run_manifest import RunManifest
         logger.info("Step 3 components loaded successfully")
-        return SupervisorAnalyzer, DocumentProcessor, WebSearcher, embeddings, client, TokenUsageTracker
+        return SupervisorAnalyzer, DocumentProcessor, WebSearcher, build_embedding_client(embeddings), client, TokenUsageTracker, RunManifest
     except ImportError as e:
         logger.error(f"Failed to import Step 3 components: {e}")
         sys.exit(1)
 
-def execute_analysis(professor_name, university, publication_url, position_path, token_tracker):
-    """Execute Step 3 analysis."""
+def execute_analysis(professor_name, university, publication_url, position_path, token_tracker, profile_store=None, fused=False,
+                     embeddings=None):
+    """
+    Execute Step 3 analysis.
+    
+    When a SupervisorProfileStore is given and it holds a research profile of this professor
+    built from the same pages, the professor's research domains come from it instead of a
+    crawl. The position PDF is always searched, since it differs per applicant; a repeated
+    synthesis prompt is answered from the LLM response cache. With fused=True the result also
+    carries the Step 4 summary under 'summary' (see SupervisorAnalyzer). Pass the caller's
+    embedding client as `embeddings` to share it; otherwise the process-wide one is used.
+    """
     logger.info(f"Starting Step 3 analysis: {professor_name} at {university}")
     
-    SupervisorAnalyzer, DocumentProcessor, WebSearcher, embeddings, client, _ = setup_components()
+    SupervisorAnalyzer, DocumentProcessor, WebSearcher, default_embeddings, client, _, _ = setup_components()
+    embeddings = embeddings or default_embeddings
+    from src.llm_gateway import get_gateway
     
     # Initialize components
     document_processor = DocumentProcessor(embedding_client=embeddings)
-
-    # Load institutional document
-    if os.path.exists(position_path):
-        logger.info(f"Loading institutional document from: {position_path}")
-        document_processor.process_and_load([position_path], "institutional", token_tracker)
-    else:
-        logger.warning(f"Institutional document not found: {position_path}")
-
     web_searcher = WebSearcher()
-    analyzer = SupervisorAnalyzer(document_processor, web_searcher, llm_client=client, token_tracker=token_tracker)
+    # Without a profile store (--no-cache) the LLM response cache is bypassed as well.
+    llm_client = get_gateway(client, cache_responses=profile_store is not None)
+    analyzer = SupervisorAnalyzer(document_processor, web_searcher, llm_client=llm_client, token_tracker=token_tracker,
+                                  profile_store=profile_store, fused=fused)
     
     try:
-        analysis_result = analyzer.analyze(professor_name, university, publication_url)
+        analysis_result = analyzer.analyze(professor_name, university, publication_url, [position_path])
         logger.info("Analysis completed successfully")
         
         # Add metadata
         analysis_result['metadata'].update({
             'analysis_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'llm_model': 'DevGPT4o',
+            'llm_model': analyzer.llm_model,
             'vector_store': 'FAISS with Azure embeddings',
             'data_sources': 'Institutional PDFs + Web scraping'
         })
@@ -99,9 +132,14 @@ def execute_analysis(professor_name, university, publication_url, position_path,
             }
         }
 
-def save_results(analysis_data, professor_name, university):
-    """Save both clean and detailed results to separate files."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+def save_results(analysis_data, professor_name, university, run_id=None):
+    """
+    Save both clean and detailed results to separate files.
+    
+    Returns:
+        A dictionary mapping 'clean_analysis' and 'detailed_analysis' to the files that were saved.
+    """
+    timestamp = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
     professor_safe = "".join(c for c in professor_name if c.isalnum() or c in (' ', '-', '_')).replace(' ', '_')
     
     # Get project root for consistent output path management
@@ -116,7 +154,7 @@ def save_results(analysis_data, professor_name, university):
     detailed_result = analysis_data.get('detailed_analysis', '')
     metadata = analysis_data.get('metadata', {})
     
-    saved_files = []
+    saved_files = {}
     
     # 1. Clean output for Step 4
     clean_filename = f"step3_clean_{professor_safe}_{timestamp}.txt"
@@ -125,7 +163,7 @@ def save_results(analysis_data, professor_name, university):
         with open(clean_filepath, 'w', encoding='utf-8') as f:
             f.write(clean_result)
         logger.info(f"Clean results saved to: {clean_filepath}")
-        saved_files.append(clean_filepath)
+        saved_files['clean_analysis'] = clean_filepath
     except Exception as e:
         logger.error(f"Failed to save clean results: {e}")
     
@@ -159,7 +197,7 @@ def save_results(analysis_data, professor_name, university):
                     f.write(f"{key.replace('_', ' ').title()}: {value}\n")
         
         logger.info(f"Detailed results saved to: {detailed_filepath}")
-        saved_files.append(detailed_filepath)
+        saved_files['detailed_analysis'] = detailed_filepath
     except Exception as e:
         logger.error(f"Failed to save detailed results: {e}")
     
@@ -171,34 +209,40 @@ def main():
     print("=" * 50)
     
     # Validate inputs
-    professor_name, university, publication_url, position_path = validate_inputs()
+    professor_name, university, publication_url, position_path, run_id, no_cache, refresh_profile = validate_inputs()
     
     print(f"Professor: {professor_name}")
     print(f"University: {university}")
     print(f"Publication URL: {publication_url}")
     print("-" * 50)
 
-    _, _, _, _, _, TokenUsageTracker = setup_components()
+    _, _, _, _, _, TokenUsageTracker, RunManifest = setup_components()
+    from src.supervisor_store import SupervisorProfileStore
     token_tracker = TokenUsageTracker()
+    manifest = RunManifest(run_id)
+    profile_store = None if no_cache else SupervisorProfileStore()
+    if profile_store and refresh_profile:
+        profile_store.invalidate(professor_name, university)
+    start = time.perf_counter()
     
     # Execute analysis
-    analysis_data = execute_analysis(professor_name, university, publication_url, position_path, token_tracker)
+    analysis_data = execute_analysis(professor_name, university, publication_url, position_path, token_tracker, profile_store)
     
     # Save results
-    output_files = save_results(analysis_data, professor_name, university)
+    output_files = save_results(analysis_data, professor_name, university, run_id=manifest.run_id)
+    manifest.record_step("step3", output_files, time.perf_counter() - start)
     
     # Display summary
     print("\n" + "=" * 50)
     print("ANALYSIS COMPLETE")
     print("=" * 50)
-    if output_files:
-        for file in output_files:
-            if "clean" in file:
-                print(f"  ? Clean (Step 4): {file}")
-            else:
-                print(f"  ? Detailed (Review): {file}")
+    if 'clean_analysis' in output_files:
+        print(f"  ? Clean (Step 4): {output_files['clean_analysis']}")
+    if 'detailed_analysis' in output_files:
+        print(f"  ? Detailed (Review): {output_files['detailed_analysis']}")
     print(f"Professor: {professor_name}")
     print(f"University: {university}")
+    print(f"Run ID: {manifest.run_id}")
     
     token_tracker.display_usage()
 
@@ -1,23 +1,34 @@
 # FILE: 03_supervisor_analysis/step3_orchestrator.py
 # PURPOSE: Step 3 Orchestrator - Supervisor analysis pipeline
 
+import os
+import json
 import logging
-from typing import Dict
-from step3_prompts import SUPERVISOR_SYNTHESIS_PROMPT
+from typing import Dict, List, Optional
+from step3_prompts import FUSED_SUMMARY_PROMPT, SUPERVISOR_SYNTHESIS_PROMPT
 from step3_document_processor import DocumentProcessor
 from step3_web_searcher import WebSearcher
 from base_analyzer import BaseAnalyzer
+from src.context_packer import ContextPacker
+from src.step_cache import StepCache, hash_text
+from src.supervisor_store import SupervisorProfileStore
+from src.summary_schema import SUMMARY_FIELDS, fields_schema, parse_json_object, repair_summary
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Candidate chunks retrieved per research domain before packing.
+RAG_CANDIDATES_PER_QUERY = 6
+
 class SupervisorAnalyzer(BaseAnalyzer):
     """
     Orchestrates the supervisor analysis process by inheriting from BaseAnalyzer.
     """
     
-    def __init__(self, document_processor: DocumentProcessor, web_searcher: WebSearcher, llm_client, token_tracker):
+    def __init__(self, document_processor: DocumentProcessor, web_searcher: WebSearcher, llm_client, token_tracker,
+                 profile_store: Optional[SupervisorProfileStore] = None, fused: bool = False,
+                 context_packer: Optional[ContextPacker] = None):
         """
         Initialize the analyzer.
         Args:
@@ -25,12 +36,19 @@ class SupervisorAnalyzer(BaseAnalyzer):
             web_searcher: The web searching component.
             llm_client: The LLM client for synthesis.
             token_tracker: An instance of TokenUsageTracker.
+            profile_store: When given, the supervisor's research domains are served from it instead of re-crawling.
+            fused: Emit the Step 4 summary schema directly (result key 'summary') instead of a
+                prose analysis, so that Step 4 needs no LLM call of its own.
+            context_packer: Fits the institutional context into a token budget (default: ContextPacker()).
         """
         super().__init__(llm_client, token_tracker)
         self.document_processor = document_processor
         self.web_searcher = web_searcher
+        self.profile_store = profile_store
+        self.fused = fused
+        self.context_packer = context_packer or ContextPacker()
 
-    def analyze(self, professor_name: str, university: str, publication_url: str) -> Dict:
+    def analyze(self, professor_name: str, university: str, publication_url: str, institutional_paths: Optional[List[str]] = None) -> Dict:
         """
         Analyze a supervisor.
         
@@ -38,21 +56,35 @@ class SupervisorAnalyzer(BaseAnalyzer):
             professor_name: The name of the professor.
             university: The name of the university.
             publication_url: The URL of the professor's publications page.
+            institutional_paths: Position PDFs to load for RAG. Omit if already loaded.
             
         Returns:
             Dictionary with the analysis results.
         """
         logger.info(f"Starting analysis for {professor_name} at {university}")
+        institutional_paths = institutional_paths or []
+
+        # 1. Web Search - Get supervisor's research domains (from the profile store when possible)
+        profile = self.research_profile(professor_name, university, publication_url)
+        research_domains = profile["research_domains"]
+
+        # The position documents differ per applicant, so RAG and synthesis always run here.
+        self._load_institutional(institutional_paths)
         
         try:
-            # 1. Web Search - Get supervisor's research domains
-            research_domains = self.web_searcher.search(professor_name, university, publication_url)
-            
             # 2. RAG Search - Get relevant information from institutional documents
-            rag_context = self._get_rag_context(research_domains)
+            rag = self._get_rag_context(research_domains)
+            rag_context = rag["text"] or "No relevant information found in institutional documents."
             
             # 3. Synthesis - Combine information intelligently
-            analysis_result = self._synthesize(rag_context, research_domains, professor_name)
+            if self.fused:
+                analysis_result = self._synthesize_summary(rag_context, research_domains, professor_name, university,
+                                                           len(rag["chunk_ids"]))
+            else:
+                analysis_result = self._synthesize(rag_context, research_domains, professor_name, len(rag["chunk_ids"]))
+            analysis_result['metadata']['rag_context_tokens'] = rag["tokens"]
+            if profile["source"] in ("store", "revalidated"):
+                analysis_result['metadata']['profile_source'] = "supervisor profile store"
             
             return analysis_result
                 
@@ -60,24 +92,79 @@ class SupervisorAnalyzer(BaseAnalyzer):
             logger.error(f"Error during supervisor analysis: {e}")
             return self._generate_fallback_analysis(professor_name, university)
 
-    def _get_rag_context(self, research_domains: list[str]) -> str:
+    def research_profile(self, professor_name: str, university: str, publication_url: str) -> Dict:
+        """
+        Returns the part of the analysis that does not depend on the position: the research
+        domains found on the professor's pages. With a profile store, a stored profile is served
+        (re-checking the pages with conditional GETs once it is no longer fresh) and a newly
+        crawled one is stored.
+
+        Returns:
+            Dict with 'research_domains' and 'source': 'store' (fresh stored profile), 'revalidated'
+            (stored profile, pages unchanged or unreachable), 'computed' (crawled and stored) or
+            'crawled' (not stored: no profile store, or the publication page could not be fetched).
+        """
+        profile_hash = content_hash = None
+        if self.profile_store:
+            profile_hash = self.profile_hash()
+            stored = self.profile_store.latest(professor_name, university, publication_url, profile_hash)
+            if stored and stored["fresh"]:
+                logger.info(f"Serving stored profile for {professor_name}")
+                return {"research_domains": stored["research_domains"], "source": "store"}
+            content_hash = self.content_hash(publication_url)
+            if stored and content_hash in (None, stored["content_hash"]):
+                # Pages unchanged (or unreachable right now): the stored profile is still the best answer.
+                if content_hash:
+                    self.profile_store.mark_validated(professor_name, university, publication_url, profile_hash, content_hash)
+                logger.info(f"Serving revalidated stored profile for {professor_name}")
+                return {"research_domains": stored["research_domains"], "source": "revalidated"}
+
+        research_domains = self.web_searcher.search(professor_name, university, publication_url)
+        if content_hash:
+            self.profile_store.put(professor_name, university, publication_url, profile_hash, content_hash,
+                                   {"research_domains": research_domains})
+            return {"research_domains": research_domains, "source": "computed"}
+        return {"research_domains": research_domains, "source": "crawled"}
+
+    def profile_hash(self) -> str:
+        """Hashes everything besides the professor's pages that the stored profile depends on (the taxonomy)."""
+        return StepCache.make_key("step3-profile", taxonomy=self.web_searcher.taxonomy.fingerprint)
+
+    def content_hash(self, publication_url: str) -> Optional[str]:
         """
-        Get relevant context from institutional documents using RAG.
+        Hashes the crawled pages of the professor, or returns None if the publication page
+        could not be fetched (so that a transient failure is never stored).
+        """
+        pages = self.web_searcher.crawl(publication_url)
+        if not pages:
+            return None
+        return hash_text("\x00".join(f"{url}\x00{hash_text(page['text'])}" for url, page in sorted(pages.items())))
+
+    def _load_institutional(self, institutional_paths: List[str]) -> None:
+        """Loads the institutional documents into the document processor's vector store."""
+        for path in institutional_paths:
+            if os.path.exists(path):
+                logger.info(f"Loading institutional document from: {path}")
+            else:
+                logger.warning(f"Institutional document not found: {path}")
+        existing = [path for path in institutional_paths if os.path.exists(path)]
+        if existing:
+            self.document_processor.process_and_load(existing, "institutional", self.token_tracker)
+
+    def _get_rag_context(self, research_domains: list[str]) -> Dict:
+        """
+        Get relevant chunks from institutional documents using RAG, one batched search for all
+        domains, packed into the context budget with each passage labelled by its source page.
         """
         queries = [f"research on {domain}" for domain in research_domains]
-        
-        all_context = []
-        for query in queries:
-            try:
-                context = self.document_processor.retrieve(query)
-                if context:
-                    all_context.append(context)
-            except Exception as e:
-                logger.warning(f"RAG query failed for '{query}': {e}")
-        
-        return "\n---\n".join(all_context) if all_context else "No relevant information found in institutional documents."
+        try:
+            return self.document_processor.retrieve_packed(queries, self.context_packer, k=RAG_CANDIDATES_PER_QUERY,
+                                                           token_tracker=self.token_tracker)
+        except Exception as e:
+            logger.warning(f"RAG retrieval failed for {len(queries)} queries: {e}")
+            return self.context_packer.pack([], [])
 
-    def _synthesize(self, rag_context: str, research_domains: list[str], professor_name: str) -> Dict:
+    def _synthesize(self, rag_context: str, research_domains: list[str], professor_name: str, rag_chunks_found: int) -> Dict:
         """
         Synthesize the final analysis by calling the LLM via the base class.
         """
@@ -106,11 +193,54 @@ class SupervisorAnalyzer(BaseAnalyzer):
             'metadata': {
                 'professor_name': professor_name,
                 'research_domains': research_domains,
-                'rag_chunks_found': len(rag_context.split('---')) if '---' in rag_context else 1,
+                'rag_chunks_found': rag_chunks_found,
                 'generation_method': 'LLM synthesis'
             }
         }
 
+    def _synthesize_summary(self, rag_context: str, research_domains: list[str], professor_name: str, university: str,
+                            rag_chunks_found: int) -> Dict:
+        """
+        Fused mode: one LLM call that produces the Step 4 summary directly. Malformed fields are
+        repaired here; fields still missing are listed in metadata for Step 4 to re-ask.
+        """
+        response = self._execute_llm_call(
+            FUSED_SUMMARY_PROMPT,
+            json_mode=True,
+            rag_context=rag_context,
+            professor_name=professor_name,
+            university=university,
+            research_domains=", ".join(research_domains),
+            summary_schema=fields_schema(list(SUMMARY_FIELDS))
+        )
+        summary, invalid = repair_summary(parse_json_object(response) or {})
+        clean_analysis = json.dumps(summary, indent=2, ensure_ascii=False)
+
+        detailed_analysis = f"""
+        **PROFESSOR RESEARCH PROFILE: {professor_name}**
+        **Research Domains:** {', '.join(research_domains)}
+
+        **Structured Summary:**
+        {clean_analysis}
+
+        **Raw Information Sources:**
+        **From Institutional Documents (RAG):**
+        {rag_context}
+        """
+
+        return {
+            'clean_analysis': clean_analysis,
+            'detailed_analysis': detailed_analysis.strip(),
+            'summary': summary,
+            'metadata': {
+                'professor_name': professor_name,
+                'research_domains': research_domains,
+                'rag_chunks_found': rag_chunks_found,
+                'invalid_summary_fields': invalid,
+                'generation_method': 'LLM synthesis (fused with Step 4)'
+            }
+        }
+
     def _generate_fallback_analysis(self, professor_name: str, university: str) -> Dict:
         """
         Generate a basic analysis when all other methods fail.
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Step 3: Department pre-computation
+Usage: python step3_precompute.py faculty.csv [--workers 4] [--max-requests N] [--requests-per-minute N]
+"""
+
+# FILE: 03_supervisor_analysis/step3_precompute.py
+# PURPOSE: Offline job that fills the supervisor profile store for a whole department ahead of application season.
+
+import argparse
+import csv
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+# Add project root to path to allow importing from src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from step3_main import setup_components
+from src.supervisor_store import DEFAULT_TTL, SupervisorProfileStore
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logging.getLogger('httpx').setLevel(logging.WARNING)
+logging.getLogger('faiss').setLevel(logging.ERROR)
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ("professor_name", "university", "publication_url")
+
+class RequestBudget:
+    """
+    A budget shared by all workers: at most `max_requests` analyses in total, started no faster
+    than `requests_per_minute`. One request is one profile analysis (a bounded crawl); rows
+    served from the store cost nothing.
+    """
+    def __init__(self, max_requests: Optional[int] = None, requests_per_minute: Optional[float] = None):
+        """
+        Initializes the budget.
+
+        Args:
+            max_requests: Total analyses allowed for this run. None means unlimited.
+            requests_per_minute: Maximum rate at which analyses start. None means no pacing.
+        """
+        self.max_requests = max_requests
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.used = 0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Reserves one request, waiting for its pacing slot. Returns False once the budget is spent."""
+        with self._lock:
+            if self.max_requests is not None and self.used >= self.max_requests:
+                return False
+            self.used += 1
+            start_at = max(time.monotonic(), self._next_start)
+            self._next_start = start_at + self.interval
+        delay = start_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+class DepartmentPrecomputer:
+    """
+    Crawls every professor listed in a CSV on a bounded worker pool and writes their research
+    profiles to the SupervisorProfileStore, so that online Step 3 runs for these professors skip
+    the crawl. Profiles do not depend on the position, so no position documents are needed.
+    Professors whose stored profile is still fresh are skipped; rows left over when the budget
+    runs out are reported as deferred and picked up by simply running the job again.
+    """
+    def __init__(self, profile_store: SupervisorProfileStore, budget: RequestBudget, workers: int = 4):
+        """
+        Initializes the job.
+
+        Args:
+            profile_store: Where finished profiles are stored.
+            budget: The request budget shared by all workers.
+            workers: Maximum number of professors analyzed at the same time.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.profile_store = profile_store
+        self.budget = budget
+        self.workers = workers
+        (self.SupervisorAnalyzer, self.DocumentProcessor, self.WebSearcher,
+         self.embeddings, self.client, TokenUsageTracker, _) = setup_components()
+        self.token_tracker = TokenUsageTracker()
+
+    @staticmethod
+    def load_rows(csv_path: str) -> List[Dict]:
+        """Reads the faculty CSV (header row required), skipping blank rows."""
+        with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"{csv_path} is missing column(s): {', '.join(missing)}")
+            rows = []
+            for line_number, row in enumerate(reader, start=2):
+                row = {key: (value or "").strip() for key, value in row.items() if key}
+                if any(row.values()):
+                    row["_line"] = line_number
+                    rows.append(row)
+        return rows
+
+    def _process_row(self, row: Dict) -> Dict:
+        """Builds one professor's research profile unless a fresh one exists. Returns the row's result record."""
+        record = {"line": row["_line"], "professor_name": row.get("professor_name"), "university": row.get("university")}
+        missing = [column for column in REQUIRED_COLUMNS if not row.get(column)]
+        if missing:
+            record.update(status="failed", error=f"Missing fields: {', '.join(missing)}")
+            return record
+
+        professor_name, university, publication_url = row["professor_name"], row["university"], row["publication_url"]
+        analyzer = self.SupervisorAnalyzer(
+            self.DocumentProcessor(embedding_client=self.embeddings),
+            self.WebSearcher(),
+            llm_client=self.client,
+            token_tracker=self.token_tracker,
+            profile_store=self.profile_store
+        )
+        stored = self.profile_store.latest(professor_name, university, publication_url, analyzer.profile_hash())
+        if stored and stored["fresh"]:
+            record.update(status="fresh")
+            return record
+        if not self.budget.acquire():
+            record.update(status="deferred")
+            return record
+
+        start = time.perf_counter()
+        try:
+            profile = analyzer.research_profile(professor_name, university, publication_url)
+        except Exception as e:
+            record.update(status="failed", error=str(e))
+            return record
+        record["duration_seconds"] = round(time.perf_counter() - start, 2)
+
+        if profile["source"] == "crawled":
+            record.update(status="failed", error="Publication page could not be fetched; nothing was stored")
+        else:
+            # 'store' means another worker stored this professor in the meantime.
+            record.update(status="fresh" if profile["source"] == "store" else profile["source"])
+        return record
+
+    def run(self, csv_path: str) -> Dict[str, int]:
+        """
+        Processes every row of the faculty CSV.
+
+        Args:
+            csv_path: CSV with professor_name, university and publication_url columns.
+
+        Returns:
+            Dict: Number of rows per status ('computed', 'revalidated', 'fresh', 'deferred', 'failed').
+        """
+        rows = self.load_rows(csv_path)
+        logger.info(f"Pre-computing {len(rows)} supervisor profile(s) with {self.workers} worker(s)")
+        summary = {"computed": 0, "revalidated": 0, "fresh": 0, "deferred": 0, "failed": 0}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._process_row, row) for row in rows]
+            for future in as_completed(futures):
+                record = future.result()
+                summary[record["status"]] += 1
+                if record["status"] == "failed":
+                    logger.error(f"Line {record['line']} ({record['professor_name']}) failed: {record.get('error')}")
+                else:
+                    logger.info(f"Line {record['line']} ({record['professor_name']}): {record['status']}")
+
+        purged = self.profile_store.purge_expired()
+        if purged:
+            logger.info(f"Purged {purged} expired profile(s)")
+        return summary
+
+def main():
+    """Main execution."""
+    parser = argparse.ArgumentParser(
+        description="Pre-compute supervisor profiles for a department so that Step 3 becomes a store lookup.",
+        epilog='Example: python 03_supervisor_analysis/step3_precompute.py faculty.csv --max-requests 200'
+    )
+    parser.add_argument("csv_path", help="CSV with professor_name, university and publication_url columns")
+    parser.add_argument("--workers", type=int, default=4, help="Professors analyzed at the same time (default: 4)")
+    parser.add_argument("--max-requests", type=int, help="Maximum analyses in this run; the remaining rows are deferred")
+    parser.add_argument("--requests-per-minute", type=float, help="Maximum rate at which analyses start")
+    parser.add_argument("--ttl-days", type=float, default=DEFAULT_TTL / 86400,
+                        help=f"Days the computed profiles stay valid (default: {DEFAULT_TTL // 86400})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.csv_path):
+        print(f"ERROR: CSV not found: {args.csv_path}")
+        sys.exit(1)
+
+    print("STEP 3: DEPARTMENT PRE-COMPUTATION")
+    print("=" * 50)
+    profile_store = SupervisorProfileStore(ttl=int(args.ttl_days * 86400))
+    budget = RequestBudget(args.max_requests, args.requests_per_minute)
+    precomputer = DepartmentPrecomputer(profile_store, budget, workers=args.workers)
+    start = time.perf_counter()
+    try:
+        summary = precomputer.run(args.csv_path)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    print("\n" + "=" * 50)
+    print("PRE-COMPUTATION COMPLETE")
+    print("=" * 50)
+    for status, count in summary.items():
+        print(f"  {status.title():<12} {count}")
+    print(f"Analyses used: {budget.used}  Duration: {time.perf_counter() - start:.1f}s")
+    if summary["deferred"]:
+        print("Budget exhausted; run the job again to process the deferred rows.")
+
+    precomputer.token_tracker.display_usage()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # FILE: 03_supervisor_analysis/step3_prompts.py
 # PURPOSE: To store and manage structured prompts for LLM interaction.
 
+import hashlib
 import textwrap
 from langchain.prompts import PromptTemplate
 
@@ -25,6 +26,11 @@ class PromptManager:
         """Formats the user prompt template with the given inputs."""
         return self.user_prompt_template.format(**kwargs)
 
+    def fingerprint(self) -> str:
+        """Returns a hash of the system and user templates, so cached results are invalidated when a prompt changes."""
+        content = self.system_instruction + "\x00" + self.user_prompt_template.template
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
 # --- Prompt Definitions ---
 
 SUPERVISOR_SYNTHESIS_PROMPT = PromptManager(
@@ -44,3 +50,29 @@ SUPERVISOR_SYNTHESIS_PROMPT = PromptManager(
     """,
     input_variables=["rag_context", "research_domains", "professor_name"]
 )
+
+# Fused mode: produces the Step 4 summary schema directly, skipping the prose synthesis and the second LLM call.
+FUSED_SUMMARY_PROMPT = PromptManager(
+    system_instruction="""
+        You are a Senior Academic Analyst. Using the institutional documents about a PhD position and the professor's research domains, produce a structured, professional JSON summary of the supervisor and the position.
+        You must only respond with a single valid JSON object.
+    """,
+    user_template="""
+        **Institutional Document Context:**
+        {rag_context}
+
+        **Professor:** {professor_name} ({university})
+
+        **Professor's Research Domains:**
+        {research_domains}
+
+        Your output MUST follow this schema:
+        {summary_schema}
+
+        **Instructions:**
+        1. Supervisor profile: the professor's name, university and primary research themes.
+        2. Position details: the official project title, a summary of the project's goals, and the required and preferred skills/experience from the institutional documents.
+        3. Alignment summary: 2-3 strategic talking points connecting a strong PhD applicant's likely skills with the supervisor's research and the position's requirements, and 2 insightful questions a candidate could ask the supervisor.
+    """,
+    input_variables=["rag_context", "professor_name", "university", "research_domains", "summary_schema"]
+)
@@ -0,0 +1,130 @@
+# FILE: 03_supervisor_analysis/step3_taxonomy.py
+# PURPOSE: Research-area taxonomy compiled into an Aho-Corasick automaton for single-pass keyword matching.
+
+import hashlib
+import json
+import os
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "research_taxonomy.json")
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """Lowercases text and collapses whitespace runs, so terms match across line breaks."""
+    return _WHITESPACE.sub(" ", text.lower())
+
+class ResearchTaxonomy:
+    """
+    Maps research domains to the terms (names and synonyms) that indicate them. All terms are
+    compiled into one Aho-Corasick automaton, so matching a page is a single pass over its text
+    however many terms the taxonomy holds. Matches must start and end on word boundaries, so
+    a short term such as "hci" does not fire inside a longer word.
+    """
+    def __init__(self, domains: Dict[str, List[str]]):
+        """
+        Compiles the taxonomy.
+
+        Args:
+            domains: Domain name -> list of synonyms. The domain name itself is always a term.
+        """
+        self.domains = domains
+        self._term_domains: List[str] = []
+        self._term_lengths: List[int] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+
+        seen = set()
+        for domain, synonyms in domains.items():
+            for term in [domain, *synonyms]:
+                term = normalize_text(term).strip()
+                if term and (term, domain) not in seen:
+                    seen.add((term, domain))
+                    self._add_term(term, domain)
+        self._build_failure_links()
+
+        payload = json.dumps(domains, sort_keys=True, ensure_ascii=False)
+        self.fingerprint = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_TAXONOMY_PATH) -> "ResearchTaxonomy":
+        """Loads a taxonomy from a JSON file of the form {"domains": {name: [synonyms, ...]}}."""
+        return _load_cached(os.path.abspath(path), os.path.getmtime(path))
+
+    @property
+    def term_count(self) -> int:
+        return len(self._term_domains)
+
+    def _add_term(self, term: str, domain: str) -> None:
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append(len(self._term_domains))
+        self._term_domains.append(domain)
+        self._term_lengths.append(len(term))
+
+    def _build_failure_links(self) -> None:
+        """Breadth-first pass that links each state to its longest proper suffix in the trie."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def match(self, text: str) -> Dict[str, int]:
+        """
+        Counts how often each domain's terms occur in the text.
+
+        Args:
+            text: Plain text, e.g. the visible text of a publication page.
+
+        Returns:
+            Domain name -> number of whole-word term occurrences. Domains without matches are omitted.
+        """
+        text = normalize_text(text)
+        counts: Dict[str, int] = {}
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if not self._outputs[state]:
+                continue
+            # Word boundary after the match
+            if end + 1 < len(text) and text[end + 1].isalnum():
+                continue
+            for term_id in self._outputs[state]:
+                start = end - self._term_lengths[term_id] + 1
+                # Word boundary before the match
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                domain = self._term_domains[term_id]
+                counts[domain] = counts.get(domain, 0) + 1
+        return counts
+
+    def rank(self, text: str) -> List[Tuple[str, int]]:
+        """Returns (domain, term frequency) pairs, most frequent first."""
+        return sorted(self.match(text).items(), key=lambda item: (-item[1], item[0]))
+
+@lru_cache(maxsize=8)
+def _load_cached(path: str, mtime: float) -> ResearchTaxonomy:
+    """Compiles each taxonomy file once per process (and again if the file changes)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return ResearchTaxonomy(data["domains"])
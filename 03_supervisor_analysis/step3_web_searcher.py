@@ -1,9 +1,11 @@
 # FILE: 03_supervisor_analysis/step3_web_searcher.py
 # PURPOSE: Web searcher for supervisor analysis.
 
-import requests
 import logging
-from bs4 import BeautifulSoup
+from typing import Dict
+from step3_taxonomy import ResearchTaxonomy
+from step3_crawler import SupervisorCrawler
+from src.http_cache import HttpCache
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -13,41 +15,74 @@ class WebSearcher:
     """
     Searches the web for supervisor information.
     """
-    def __init__(self):
+    def __init__(self, taxonomy: ResearchTaxonomy = None, crawler: SupervisorCrawler = None):
         """
         Initializes the web searcher.
+
+        Args:
+            taxonomy: The research-area taxonomy to match pages against. Defaults to research_taxonomy.json.
+            crawler: Fetches the publication page and related pages. Defaults to a crawler with an on-disk HTTP cache.
         """
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.taxonomy = taxonomy or ResearchTaxonomy.load()
+        self.crawler = crawler or SupervisorCrawler(http_cache=HttpCache())
+        # Crawls done by this searcher, so hashing the pages for the cache and searching them cost one crawl.
+        self._crawls = {}
 
-    def search(self, professor_name: str, university: str, publication_url: str) -> list[str]:
+    def crawl(self, url: str) -> Dict[str, Dict]:
+        """
+        Crawls the publication page and the related pages it links to.
+
+        Returns:
+            URL -> extracted page ('text', 'links', ...) of every page fetched; empty if the
+            publication page could not be fetched.
+        """
+        if url not in self._crawls:
+            pages = self.crawler.crawl(url)
+            if not pages:
+                # Do not remember failures; a later call may succeed.
+                return {}
+            self._crawls[url] = pages
+        return self._crawls[url]
+
+    def fetch_page(self, url: str) -> str:
+        """
+        Fetches a page and returns its visible text, or None if the request fails.
+        """
+        for pages in self._crawls.values():
+            if url in pages:
+                return pages[url]["text"]
+        page = self.crawler.fetch(url)
+        return page["text"] if page else None
+
+    def search_ranked(self, professor_name: str, university: str, publication_url: str) -> list[tuple[str, int]]:
         """
         Searches for the supervisor's research domains.
+
+        Returns:
+            (domain, term frequency) pairs found on the publication page, most frequent first.
         """
         logger.info(f"Searching for research domains of {professor_name} at {university}")
         
         try:
-            response = self.session.get(publication_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            text = soup.get_text().lower()
-            
-            research_keywords = [
-                "human-computer interaction", "hci", "machine learning", "artificial intelligence",
-                "computer vision", "natural language processing", "robotics", "data science",
-                "software engineering", "human-ai interaction", "mixed reality", "virtual reality",
-                "autonomous vehicles", "internet of things", "cybersecurity", "blockchain",
-                "deep learning", "neural networks", "computer graphics", "user experience",
-                "interaction design", "accessibility", "ubiquitous computing"
-            ]
-            
-            found_areas = [keyword for keyword in research_keywords if keyword in text]
+            pages = self.crawl(publication_url)
+            if not pages:
+                raise ValueError("page could not be fetched")
             
-            return list(set(found_areas))
+            # The crawler extracted the text while downloading; pages served on a 304 were not parsed again.
+            parsed = [page for page in pages.values() if not page.get("cached")]
+            parsed_bytes = sum(page["bytes"] for page in parsed)
+            parsed_seconds = sum(page["seconds"] for page in parsed)
+            logger.info(f"Extracted text from {len(parsed)} page(s), {parsed_bytes / 1e6:.2f} MB at "
+                        f"{parsed_bytes / max(parsed_seconds, 1e-9) / 1e6:.1f} MB/s; "
+                        f"{len(pages) - len(parsed)} page(s) unchanged")
+            return self.taxonomy.rank("\n".join(page["text"] for page in pages.values()))
             
         except Exception as e:
             logger.error(f"Failed to scrape publication page {publication_url}: {e}")
             return []
+
+    def search(self, professor_name: str, university: str, publication_url: str) -> list[str]:
+        """
+        Searches for the supervisor's research domains, most frequently mentioned first.
+        """
+        return [domain for domain, _ in self.search_ranked(professor_name, university, publication_url)]
@@ -1,6 +1,7 @@
 import os
 import sys
 import json
+import time
 import argparse
 from datetime import datetime
 
@@ -12,6 +13,34 @@ sys.path.insert(0, module_dir)
 
 from step4_summary_generator import SummaryGenerator
 from src.token_tracker import TokenUsageTracker
+from src.run_manifest import RunManifest
+from src.step_cache import StepCache
+
+def save_summary(professional_summary: dict, run_id: str = None) -> str:
+    """
+    Saves the structured summary to a timestamped JSON file in outputs/step4.
+
+    Args:
+        professional_summary: The structured summary produced by SummaryGenerator.
+        run_id: The pipeline run id, used instead of a timestamp in the file name.
+
+    Returns:
+        The path of the saved summary file.
+    """
+    # Create a structured filename
+    timestamp = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+    supervisor_name = professional_summary.get("supervisor_profile", {}).get("name", "UnknownSupervisor").replace(" ", "_")
+    output_filename = f"summary_{supervisor_name}_{timestamp}.json"
+    output_dir = os.path.join(project_root, "outputs", "step4")
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, output_filename)
+
+    # Save the structured summary to a file
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(professional_summary, f, indent=4)
+
+    print(f"Successfully saved professional summary to '{output_path}'")
+    return output_path
 
 def main():
     """
@@ -19,6 +48,8 @@ def main():
     """
     parser = argparse.ArgumentParser(description="Generate a professional summary from a detailed analysis file.")
     parser.add_argument("analysis_file_path", type=str, help="The path to the detailed analysis text file from Step 3.")
+    parser.add_argument("--run-id", type=str, help="Pipeline run id; the step records its artifacts in outputs/runs/<run-id>/step4.json.")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the LLM instead of reusing a cached summary.")
     args = parser.parse_args()
 
     if not os.path.exists(args.analysis_file_path):
@@ -28,22 +59,17 @@ def main():
     with open(args.analysis_file_path, 'r', encoding='utf-8') as f:
         analysis_text = f.read()
 
+    start = time.perf_counter()
+    manifest = RunManifest(args.run_id)
     token_tracker = TokenUsageTracker()
-    summary_generator = SummaryGenerator(token_tracker)
+    step_cache = None if args.no_cache else StepCache()
+    summary_generator = SummaryGenerator(token_tracker, step_cache=step_cache)
     professional_summary = summary_generator.generate_summary(analysis_text)
 
     if professional_summary:
-        # Create a structured filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        supervisor_name = professional_summary.get("supervisor_profile", {}).get("name", "UnknownSupervisor").replace(" ", "_")
-        output_filename = f"summary_{supervisor_name}_{timestamp}.json"
-        output_path = os.path.join(project_root, "outputs", "step4", output_filename)
-
-        # Save the structured summary to a file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(professional_summary, f, indent=4)
-
-        print(f"Successfully saved professional summary to '{output_path}'")
+        output_path = save_summary(professional_summary, run_id=manifest.run_id)
+        manifest.record_step("step4", {"summary": output_path}, time.perf_counter() - start)
+        print(f"Run ID: {manifest.run_id}")
         
     token_tracker.display_usage()
 
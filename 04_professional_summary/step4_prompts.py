@@ -38,3 +38,19 @@ Your final output MUST be a single, valid JSON object with the following schema:
 
 Now, generate the JSON summary.
 """
+
+FIELD_REPAIR_PROMPT = """
+A JSON summary was generated from the analysis below, but some of its fields were missing or invalid.
+
+**Summary so far (valid fields only):**
+{partial_summary}
+
+Return a single JSON object containing ONLY the following fields, filled in from the analysis and consistent with the summary so far:
+
+{fields_schema}
+
+**Analysis Text:**
+---
+{analysis_text}
+---
+"""
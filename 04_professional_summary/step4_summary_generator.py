@@ -1,69 +1,155 @@
 import os
 import sys
 import json
+from typing import Callable
 
 # Add the project root to the Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 from src.AzureConnection import client
-from step4_prompts import PROFESSIONAL_SUMMARY_PROMPT, SYSTEM_PROMPT
+from step4_prompts import FIELD_REPAIR_PROMPT, PROFESSIONAL_SUMMARY_PROMPT, SYSTEM_PROMPT
 from src.token_tracker import TokenUsageTracker
+from src.step_cache import StepCache, hash_text
+from src.llm_gateway import DEFAULT_LLM_MODEL, get_gateway
+from src.json_stream import IncrementalJsonParser
+from src.summary_schema import SUMMARY_FIELDS, apply_fields, fields_schema, parse_json_object, repair_summary, validate_summary
+
+LLM_MODEL = DEFAULT_LLM_MODEL
 
 class SummaryGenerator:
     """
     Handles the generation of a structured professional summary from an unstructured analysis text.
+
+    The LLM is asked for a JSON object (JSON mode where the deployment supports it) and the
+    answer is validated field by field against the ProfessionalSummary schema. Fields that are
+    merely malformed are repaired locally; only fields that are missing or unusable are asked
+    for again, so a bad answer never costs a full regeneration.
     """
-    def __init__(self, token_tracker: TokenUsageTracker):
+    def __init__(self, token_tracker: TokenUsageTracker, step_cache: StepCache = None, llm_client=None, max_repair_rounds: int = 2):
         """
         Initializes the SummaryGenerator and sets the LLM client.
         
         Args:
             token_tracker: An instance of TokenUsageTracker.
+            step_cache: Optional StepCache; an unchanged analysis text returns the cached summary.
+                Without one (--no-cache), LLM responses are not cached either.
+            llm_client: Optional LLM client or LLMGateway. Defaults to the Azure client.
+            max_repair_rounds: How often missing or invalid fields are asked for again.
         """
-        self.llm = client
+        self.llm = get_gateway(llm_client or client, cache_responses=step_cache is not None)
         self.token_tracker = token_tracker
+        self.step_cache = step_cache
+        self.max_repair_rounds = max_repair_rounds
+
+    def _request(self, user_prompt: str, label: str, on_delta: Callable[[str], None] = None) -> str:
+        """Sends one prompt in JSON mode (where supported) and returns the response text. Streams when on_delta is given."""
+        request = dict(
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt},
+            ],
+            model=LLM_MODEL,
+            temperature=0.1,
+            max_tokens=1000,
+            token_tracker=self.token_tracker,
+            label=label
+        )
+        if on_delta:
+            return self.llm.stream(on_delta=on_delta, response_format={"type": "json_object"}, **request)["content"]
+        return self.llm.complete(response_format={"type": "json_object"}, **request)["content"]
+
+    def _cache_key(self, analysis_text: str):
+        if not self.step_cache:
+            return None
+        return self.step_cache.make_key(
+            "step4",
+            analysis_sha256=hash_text(analysis_text),
+            prompt=hash_text(SYSTEM_PROMPT + PROFESSIONAL_SUMMARY_PROMPT + FIELD_REPAIR_PROMPT),
+            llm_model=LLM_MODEL
+        )
+
+    def cached_summary(self, analysis_text: str) -> dict:
+        """Returns the cached summary of an unchanged analysis text, or None (also without a step cache)."""
+        cache_key = self._cache_key(analysis_text)
+        return self.step_cache.get(cache_key) if cache_key else None
 
-    def generate_summary(self, analysis_text: str) -> dict:
+    def generate_summary(self, analysis_text: str, on_field: Callable[[str, object], None] = None) -> dict:
         """
         Generates a structured summary using the LLM.
 
         Args:
             analysis_text: The unstructured text from the Step 3 analysis.
+            on_field: When given, the completion is streamed and on_field(path, value) is called
+                as soon as each summary field (e.g. "position_details.required_skills") has been
+                generated, so that later steps can start before the summary is finished. Values
+                are unvalidated; the returned summary is authoritative.
 
         Returns:
-            A dictionary containing the structured summary.
+            A dictionary containing the structured summary, or None if it could not be completed.
         """
         print("Generating professional summary...")
         user_prompt = PROFESSIONAL_SUMMARY_PROMPT.format(analysis_text=analysis_text)
 
+        cache_key = self._cache_key(analysis_text)
+        cached_summary = self.cached_summary(analysis_text)
+        if cached_summary:
+            print("Analysis unchanged; using cached summary.")
+            return cached_summary
+
         try:
-            response = self.llm.chat.completions.create(
-                model="DevGPT4o",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.1,
-                max_tokens=1000
-            )
-            
-            # Track token usage
-            if response.usage:
-                self.token_tracker.add_completion_usage(response.usage)
-            
-            response_content = response.choices[0].message.content.strip()
-            # The LLM response might be wrapped in markdown ```json ... ```, so we clean it.
-            if response_content.startswith("```json"):
-                response_content = response_content[7:-4].strip()
-
-            summary_json = json.loads(response_content)
+            on_delta = IncrementalJsonParser(SUMMARY_FIELDS, on_field).feed if on_field else None
+            response_content = self._request(user_prompt, "SummaryGenerator", on_delta)
+            summary_json = self._repair(parse_json_object(response_content) or {}, analysis_text)
+            if summary_json is None:
+                print(f"LLM Response was: {response_content}")
+                return None
+
             print("Successfully generated and parsed summary.")
+            if cache_key:
+                self.step_cache.set(cache_key, summary_json)
             return summary_json
-        except json.JSONDecodeError as e:
-            print(f"Error: Failed to decode JSON from LLM response. Details: {e}")
-            print(f"LLM Response was: {response_content}")
-            return None
         except Exception as e:
             print(f"An unexpected error occurred during summary generation: {e}")
             return None
+
+    def complete_summary(self, partial_summary: dict, source_text: str) -> dict:
+        """
+        Validates a summary produced elsewhere (the fused Step 3 analysis) and asks the LLM only
+        for the fields that are missing or invalid.
+
+        Args:
+            partial_summary: The summary as generated, possibly incomplete.
+            source_text: The material it was generated from, used when re-asking for fields.
+
+        Returns:
+            The validated summary, or None if it could not be completed.
+        """
+        try:
+            summary_json = self._repair(partial_summary or {}, source_text)
+        except Exception as e:
+            print(f"An unexpected error occurred while completing the summary: {e}")
+            return None
+        if summary_json is not None:
+            print("Using the summary generated by the fused Step 3 analysis.")
+        return summary_json
+
+    def _repair(self, data: dict, analysis_text: str) -> dict:
+        """Repairs malformed fields locally, re-asks for the rest and returns the validated summary (or None)."""
+        summary, invalid = repair_summary(data)
+        for _ in range(self.max_repair_rounds):
+            if not invalid:
+                break
+            print(f"Re-asking for {len(invalid)} missing or invalid field(s): {', '.join(invalid)}")
+            repair_prompt = FIELD_REPAIR_PROMPT.format(
+                partial_summary=json.dumps(summary, indent=2),
+                fields_schema=fields_schema(invalid),
+                analysis_text=analysis_text
+            )
+            patch = parse_json_object(self._request(repair_prompt, "SummaryGenerator.repair")) or {}
+            invalid = apply_fields(summary, patch, invalid)
+
+        summary_json = validate_summary(summary)
+        if summary_json is None:
+            print(f"Error: The summary is still missing valid fields: {', '.join(invalid)}")
+        return summary_json
@@ -1,7 +1,10 @@
 import os
 import sys
 import json
-from typing import Dict
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
 
 # Add project root to path to allow imports
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -11,6 +14,85 @@ from src.AzureConnection import client
 from step5_rag_retriever import CandidateRetriever
 from step5_prompts import SYSTEM_PROMPT, COVER_LETTER_PROMPT
 from src.token_tracker import TokenUsageTracker
+from src.llm_gateway import DEFAULT_LLM_MODEL, get_gateway
+
+logger = logging.getLogger(__name__)
+
+def build_queries(summary_data: Dict) -> List[str]:
+    """
+    Turns the position details of a Step 4 summary into retrieval queries: the required skills
+    and preferred experience (deduplicated, in order) plus one query for the project summary.
+    """
+    position_details = summary_data.get("position_details", {})
+    queries = list(dict.fromkeys(position_details.get("required_skills", []) + position_details.get("preferred_experience", [])))
+    if position_details.get("project_summary", ""):
+        queries.append(f"My experience related to: {position_details['project_summary']}")
+    return queries
+
+class EvidencePrefetcher:
+    """
+    Runs the candidate evidence retrieval speculatively while Step 4 is still streaming: once
+    the project summary, required skills and preferred experience have been generated, their
+    queries are sent to the retriever on a background thread. The retriever arrives as a future
+    (Step 2 may still be building the vector store), so Step 4 never waits for Step 2; the
+    background thread does. Step 5 uses the result only if the final, validated summary
+    produces exactly the same queries.
+    """
+    FIELDS = ("position_details.project_summary", "position_details.required_skills", "position_details.preferred_experience")
+
+    def __init__(self, retriever: Future):
+        """
+        Initializes the prefetcher. No thread is started until all FIELDS have been generated.
+
+        Args:
+            retriever (Future): Resolves to the CandidateRetriever of the candidate's vector store.
+        """
+        self.retriever = retriever
+        self.queries = None
+        self._fields = {}
+        self._future = None
+        self._started_at = None
+        self._executor = None
+
+    def on_field(self, path: str, value) -> None:
+        """SummaryGenerator.generate_summary callback; starts retrieval once all FIELDS are known."""
+        if path not in self.FIELDS or self._future is not None:
+            return
+        self._fields[path] = value
+        if len(self._fields) < len(self.FIELDS):
+            return
+        summary = {"position_details": {path.split(".")[1]: value for path, value in self._fields.items()}}
+        try:
+            self.queries = build_queries(summary)
+        except TypeError:
+            # Malformed streamed values (e.g. a string instead of a list); Step 5 retrieves normally.
+            return
+        self._started_at = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="evidence-prefetch")
+        self._future = self._executor.submit(self._retrieve, self.queries)
+        waiting = "" if self.retriever.done() else " (waiting for the candidate vector store)"
+        logger.info(f"Started speculative retrieval for {len(self.queries)} queries while the summary is generated{waiting}")
+
+    def _retrieve(self, queries: List[str]) -> str:
+        return self.retriever.result().get_candidate_evidence(queries)
+
+    def evidence_for(self, queries: List[str]) -> Optional[str]:
+        """Returns the prefetched evidence if it was retrieved for exactly these queries, else None."""
+        if self._future is None or queries != self.queries:
+            if self._future is not None:
+                logger.info("Final summary changed the retrieval queries; discarding the speculative result")
+            return None
+        try:
+            evidence = self._future.result()
+        except Exception as e:
+            logger.warning(f"Speculative retrieval failed ({e}); retrieving again")
+            return None
+        logger.info(f"Using speculative retrieval started {time.perf_counter() - self._started_at:.2f}s ago")
+        return evidence
+
+    def close(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=False)
 
 class CoverLetterGenerator:
     """
@@ -22,36 +104,38 @@ class CoverLetterGenerator:
 
         Args:
             candidate_retriever (CandidateRetriever): An instance of the retriever for the candidate's vector store.
-            llm_client: The client for interacting with the LLM.
+            llm_client: The LLM client, or an LLMGateway; a plain client is wrapped in the shared gateway.
             token_tracker: An instance of TokenUsageTracker.
         """
         self.retriever = candidate_retriever
-        self.llm = llm_client
+        self.llm = get_gateway(llm_client)
         self.token_tracker = token_tracker
+        # Seconds until the first streamed token of the last generate() call, or None.
+        self.time_to_first_token = None
 
-    def generate(self, summary_data: Dict) -> str:
+    def generate(self, summary_data: Dict, on_token: Callable[[str], None] = None,
+                 prefetcher: EvidencePrefetcher = None) -> str:
         """
         Generates the full cover letter.
 
         Args:
             summary_data (Dict): The structured JSON summary from Step 4.
+            on_token (Callable, optional): When given, the completion is streamed and every piece
+                of text is passed to it as soon as it arrives.
+            prefetcher (EvidencePrefetcher, optional): Evidence retrieved while Step 4 was streaming;
+                used when it matches this summary's queries.
 
         Returns:
             str: The generated cover letter text.
         """
         # 1. Extract key terms from the summary to use as queries for RAG
         print("Extracting key terms for RAG queries...")
-        required_skills = summary_data.get("position_details", {}).get("required_skills", [])
-        preferred_exp = summary_data.get("position_details", {}).get("preferred_experience", [])
-        project_summary = summary_data.get("position_details", {}).get("project_summary", "")
-        
-        # Combine into a list of queries for the retriever
-        queries = list(set(required_skills + preferred_exp))
-        if project_summary:
-            queries.append(f"My experience related to: {project_summary}")
-
-        # 2. Retrieve evidence from the candidate's resume
-        candidate_evidence = self.retriever.get_candidate_evidence(queries)
+        queries = build_queries(summary_data)
+
+        # 2. Retrieve evidence from the candidate's resume (unless it was prefetched)
+        candidate_evidence = prefetcher.evidence_for(queries) if prefetcher else None
+        if candidate_evidence is None:
+            candidate_evidence = self.retriever.get_candidate_evidence(queries)
 
         # 3. Construct the final prompt for the LLM
         print("Constructing final prompt for LLM...")
@@ -66,21 +150,24 @@ class CoverLetterGenerator:
         # 4. Call the LLM to generate the cover letter
         print("Generating cover letter... This may take a moment.")
         try:
-            response = self.llm.chat.completions.create(
-                model="DevGPT4o",
+            # Higher temperature for more creative writing; such calls are never served from the cache.
+            request = dict(
                 messages=[
                     {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt},
                 ],
-                temperature=0.7, # Higher temperature for more creative writing
-                max_tokens=2000
+                model=DEFAULT_LLM_MODEL,
+                temperature=0.7,
+                max_tokens=2000,
+                token_tracker=self.token_tracker,
+                label="CoverLetterGenerator"
             )
-            
-            # Track token usage
-            if response.usage:
-                self.token_tracker.add_completion_usage(response.usage)
-
-            cover_letter = response.choices[0].message.content.strip()
+            if on_token:
+                response = self.llm.stream(on_delta=on_token, **request)
+                self.time_to_first_token = response["time_to_first_token"]
+            else:
+                response = self.llm.complete(**request)
+            cover_letter = response["content"]
             print("Successfully generated cover letter.")
             return cover_letter
         except Exception as e:
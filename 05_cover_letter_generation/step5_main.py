@@ -1,8 +1,10 @@
 import os
 import sys
 import json
+import time
 import argparse
 from datetime import datetime
+from typing import Callable
 
 # Add project root to path to allow imports
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -16,6 +18,69 @@ from src.AzureConnection import client, embeddings
 from step5_rag_retriever import CandidateRetriever
 from step5_letter_generator import CoverLetterGenerator
 from src.token_tracker import TokenUsageTracker
+from src.run_manifest import RunManifest
+from src.candidate_store import store_for_model
+from src.step_cache import model_name
+
+DEFAULT_VECTOR_STORE_PATH = os.path.join(project_root, "vector_stores", "candidate_vector_store.faiss")
+
+def cover_letter_path(summary_data: dict, run_id: str = None) -> str:
+    """Returns the outputs/step5 path of the cover letter for a summary (creating the directory)."""
+    timestamp = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+    supervisor_name = summary_data.get("supervisor_profile", {}).get("name", "UnknownSupervisor").replace(" ", "_")
+    output_filename = f"Cover_Letter_for_{supervisor_name}_{timestamp}.txt"
+    output_dir = os.path.join(project_root, "outputs", "step5")
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, output_filename)
+
+def save_cover_letter(cover_letter_text: str, summary_data: dict, run_id: str = None) -> str:
+    """
+    Saves the generated cover letter to a timestamped text file in outputs/step5.
+
+    Args:
+        cover_letter_text: The generated cover letter.
+        summary_data: The structured summary from Step 4, used for naming the file.
+        run_id: The pipeline run id, used instead of a timestamp in the file name.
+
+    Returns:
+        The path of the saved cover letter.
+    """
+    output_path = cover_letter_path(summary_data, run_id)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(cover_letter_text)
+
+    print(f"\nSuccessfully saved cover letter to: '{output_path}'")
+    return output_path
+
+def stream_cover_letter(letter_generator: CoverLetterGenerator, summary_data: dict, run_id: str = None,
+                        on_token: Callable[[str], None] = None, prefetcher=None):
+    """
+    Generates the cover letter as a token stream, appending every piece to its outputs/step5
+    file (flushed immediately) and passing it to `on_token`, e.g. to echo it to the terminal.
+    `prefetcher` is handed to `CoverLetterGenerator.generate` unchanged.
+
+    Returns:
+        (cover letter text, saved path). The path is None if generation failed, in which case
+        the partial file is removed.
+    """
+    output_path = cover_letter_path(summary_data, run_id)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        def write(text):
+            f.write(text)
+            f.flush()
+            if on_token:
+                on_token(text)
+        cover_letter_text = letter_generator.generate(summary_data, on_token=write, prefetcher=prefetcher)
+
+    if "Error:" in cover_letter_text:
+        os.remove(output_path)
+        return cover_letter_text, None
+    # Rewrite with the final (stripped) text so the file matches the non-streaming output exactly.
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(cover_letter_text)
+    print(f"\nSuccessfully saved cover letter to: '{output_path}'")
+    return cover_letter_text, output_path
 
 def main():
     """
@@ -23,7 +88,12 @@ def main():
     """
     parser = argparse.ArgumentParser(description="Generate a cover letter using a professional summary and a candidate vector store.")
     parser.add_argument("summary_file_path", type=str, help="The path to the structured summary JSON file from Step 4.")
+    parser.add_argument("--vector-store", type=str, help="The candidate reference file (or vector store directory) produced by Step 2.")
+    parser.add_argument("--candidate-id", type=str, help="Use the latest resume of this candidate from the consolidated candidate store.")
+    parser.add_argument("--stream", action="store_true", help="Print the letter and write its file token by token while it is generated.")
+    parser.add_argument("--run-id", type=str, help="Pipeline run id; the step records its artifacts in outputs/runs/<run-id>/step5.json.")
     args = parser.parse_args()
+    start = time.perf_counter()
 
     # --- 1. Load Inputs ---
     if not os.path.exists(args.summary_file_path):
@@ -33,8 +103,16 @@ def main():
     with open(args.summary_file_path, 'r', encoding='utf-8') as f:
         summary_data = json.load(f)
 
-    vector_store_path = os.path.join(project_root, "vector_stores", "candidate_vector_store.faiss")
-    if not os.path.isdir(vector_store_path):
+    vector_store_path = args.vector_store or DEFAULT_VECTOR_STORE_PATH
+    if args.candidate_id and not args.vector_store:
+        candidate_store = store_for_model(model_name(embeddings))
+        resume_version = candidate_store.latest_version(args.candidate_id)
+        if not resume_version:
+            print(f"Error: No resume for candidate '{args.candidate_id}' in {candidate_store.directory}.")
+            sys.exit(1)
+        vector_store_path = candidate_store.reference(args.candidate_id, resume_version)
+
+    if not os.path.exists(vector_store_path):
         print(f"Error: The candidate vector store was not found at '{vector_store_path}'.")
         print("Please run Step 2 to generate it first.")
         sys.exit(1)
@@ -44,7 +122,8 @@ def main():
         token_tracker = TokenUsageTracker()
         candidate_retriever = CandidateRetriever(
             vector_store_path=vector_store_path,
-            embeddings_client=embeddings
+            embeddings_client=embeddings,
+            token_tracker=token_tracker
         )
         letter_generator = CoverLetterGenerator(
             candidate_retriever=candidate_retriever,
@@ -55,20 +134,26 @@ def main():
         print(f"Error initializing components: {e}")
         sys.exit(1)
 
-    # --- 3. Generate the Cover Letter ---
-    cover_letter_text = letter_generator.generate(summary_data)
+    # --- 3. Generate the Cover Letter (and, when streaming, write it as it arrives) ---
+    manifest = RunManifest(args.run_id)
+    if args.stream:
+        print("-" * 50)
+        cover_letter_text, output_path = stream_cover_letter(
+            letter_generator, summary_data, run_id=manifest.run_id,
+            on_token=lambda text: print(text, end="", flush=True)
+        )
+        if letter_generator.time_to_first_token is not None:
+            print(f"Time to first token: {letter_generator.time_to_first_token:.2f}s")
+    else:
+        cover_letter_text = letter_generator.generate(summary_data)
 
     # --- 4. Save the Output ---
     if "Error:" not in cover_letter_text:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        supervisor_name = summary_data.get("supervisor_profile", {}).get("name", "UnknownSupervisor").replace(" ", "_")
-        output_filename = f"Cover_Letter_for_{supervisor_name}_{timestamp}.txt"
-        output_path = os.path.join(project_root, "outputs", "step5", output_filename)
-
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(cover_letter_text)
-
-        print(f"\nSuccessfully saved cover letter to: '{output_path}'")
+        if not args.stream:
+            output_path = save_cover_letter(cover_letter_text, summary_data, run_id=manifest.run_id)
+        manifest.record_step("step5", {"cover_letter": output_path}, time.perf_counter() - start,
+                             time_to_first_token_seconds=letter_generator.time_to_first_token)
+        print(f"Run ID: {manifest.run_id}")
         token_tracker.display_usage()
     else:
         print("\nCould not generate the cover letter due to an error.")
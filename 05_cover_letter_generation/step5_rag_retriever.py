@@ -1,6 +1,7 @@
 import os
 import sys
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
 import faiss
 from langchain_community.vectorstores import FAISS
 from langchain_core.embeddings import Embeddings
@@ -10,53 +11,143 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 from src.AzureConnection import embeddings as azure_embeddings
+from src.bm25_index import BM25Index, tokenize
+from src.context_packer import ContextPacker
+from src.embedding_cache import query_cache_for
+from src.vector_store import LegacyFaissStore
+from src.candidate_store import CandidateStore, is_candidate_reference
+
+# Queries of at most this many terms that all occur in the resume are answered lexically only.
+SHORT_QUERY_TERMS = 3
+# Seconds to wait for the query embeddings before falling back to lexical-only retrieval.
+DEFAULT_EMBEDDING_TIMEOUT = 10.0
+RRF_K = 60
+
+def reciprocal_rank_fusion(rankings: List[List[Tuple[int, float]]], k: int = RRF_K) -> Dict[int, float]:
+    """
+    Fuses ranked hit lists (vector and lexical, one per query) by reciprocal rank: each list
+    adds 1 / (k + rank) to a chunk, so chunks ranked high by several lists come first and
+    scores of different scales never need to be compared.
+    """
+    fused: Dict[int, float] = {}
+    for hits in rankings:
+        for rank, (chunk_id, _) in enumerate(hits, start=1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return fused
 
 class CandidateRetriever:
     """
     Handles loading the candidate's FAISS vector store and retrieving relevant information.
     """
-    def __init__(self, vector_store_path: str, embeddings_client: Embeddings):
+    def __init__(self, vector_store_path: str, embeddings_client: Embeddings, context_packer: ContextPacker = None,
+                 embedding_timeout: float = DEFAULT_EMBEDDING_TIMEOUT, token_tracker=None):
         """
         Initializes the retriever and loads the FAISS index.
 
         Args:
-            vector_store_path (str): The path to the FAISS vector store directory.
+            vector_store_path (str): A candidate reference file from Step 2, or a single-candidate
+                vector store directory.
             embeddings_client (Embeddings): The embeddings client to use.
+            context_packer (ContextPacker): Fits the evidence into a token budget (default: ContextPacker()).
+            embedding_timeout (float): Seconds to wait for query embeddings before retrieving lexically only.
+            token_tracker: When given, query embedding cache hits and misses are counted in it.
         """
-        if not os.path.isdir(vector_store_path):
+        if not os.path.exists(vector_store_path):
             raise FileNotFoundError(f"Vector store not found at path: {vector_store_path}")
 
         print("Loading candidate vector store...")
-        self.vector_store = FAISS.load_local(vector_store_path, embeddings_client, allow_dangerous_deserialization=True)
+        if is_candidate_reference(vector_store_path):
+            # Only this candidate's rows of the consolidated store are read.
+            self.vector_store = CandidateStore.open_reference(vector_store_path, embeddings_client)
+        else:
+            print("Legacy pickled vector store found; re-run Step 2 to add the resume to the candidate store.")
+            self.vector_store = LegacyFaissStore(
+                FAISS.load_local(vector_store_path, embeddings_client, allow_dangerous_deserialization=True)
+            )
+        self.embeddings_client = embeddings_client
+        self.context_packer = context_packer or ContextPacker(separator="\n\n---\n\n")
+        self.embedding_timeout = embedding_timeout
+        self.token_tracker = token_tracker
+        # Recurring skill queries are embedded once per model, then served from memory or disk
+        self.query_cache = query_cache_for(embeddings_client)
+        self.lexical_index = self._open_lexical_index()
+        self._embed_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-embed")
         print("Candidate vector store loaded successfully.")
 
-    def get_candidate_evidence(self, queries: List[str], top_k: int = 3) -> str:
+    def _open_lexical_index(self) -> Optional[BM25Index]:
+        """Returns the resume's BM25 index (saved by Step 2, or built from the chunk texts of older stores)."""
+        try:
+            if hasattr(self.vector_store, "lexical_index"):
+                return self.vector_store.lexical_index()
+            return BM25Index.build([self.vector_store.get_text(i) for i in range(len(self.vector_store))])
+        except Exception as e:
+            print(f"Lexical index unavailable ({e}); using vector search only.")
+            return None
+
+    def _is_lexical(self, query: str) -> bool:
+        """True for a short term found verbatim in the resume, which BM25 answers without an embedding."""
+        return (self.lexical_index is not None and len(tokenize(query)) <= SHORT_QUERY_TERMS
+                and self.lexical_index.covers(query))
+
+    def _embed_queries(self, queries: List[str]):
+        """Returns the query embeddings, or None if the embeddings API fails or exceeds the timeout."""
+        future = self._embed_executor.submit(self.query_cache.embed_queries, queries, self.token_tracker)
+        try:
+            return future.result(timeout=self.embedding_timeout)
+        except FutureTimeout:
+            print(f"Query embeddings took longer than {self.embedding_timeout:g}s; using lexical retrieval only.")
+        except Exception as e:
+            print(f"Query embeddings failed ({e}); using lexical retrieval only.")
+        return None
+
+    def get_candidate_evidence(self, queries: List[str], top_k: int = 6) -> str:
         """
         Retrieves relevant text chunks from the candidate's resume based on a list of queries.
 
+        Chunks are found by vector search and by BM25 keyword search and the two rankings are
+        fused by reciprocal rank. Short skill queries whose terms all occur in the resume are
+        answered by BM25 alone and never embedded; only the other queries go to the embeddings
+        API, and if it fails or is slow the lexical results are used alone.
+
         Args:
             queries (List[str]): A list of queries to search for (e.g., "experience with Python").
-            top_k (int): The number of top documents to retrieve for each query.
+            top_k (int): The number of candidate chunks to retrieve for each query and method; the
+                context packer keeps the most relevant, least redundant ones that fit its token budget.
 
         Returns:
             str: A consolidated string of the most relevant text snippets from the resume.
         """
         print(f"Retrieving candidate evidence for queries: {queries}")
-        all_evidence = []
-        for query in queries:
+        evidence = ""
+        if queries:
             try:
-                # Perform similarity search
-                documents = self.vector_store.similarity_search(query, k=top_k)
-                for doc in documents:
-                    if doc.page_content not in all_evidence:
-                        all_evidence.append(doc.page_content)
+                rankings = [self.lexical_index.search(query, k=top_k) for query in queries] if self.lexical_index else []
+                semantic_queries = [query for query in queries if not self._is_lexical(query)]
+                if len(semantic_queries) < len(queries):
+                    print(f"{len(queries) - len(semantic_queries)} query(ies) matched resume keywords and are not embedded.")
+                if semantic_queries:
+                    # One embedding request and one search for the remaining queries
+                    query_vectors = self._embed_queries(semantic_queries)
+                    if query_vectors is not None:
+                        rankings += self.vector_store.search_by_vectors(query_vectors, k=top_k)
+
+                fused = reciprocal_rank_fusion(rankings)
+                if fused:
+                    chunk_ids = sorted(fused, key=lambda chunk_id: -fused[chunk_id])
+                    vectors = self.vector_store.get_vectors(chunk_ids)
+                    candidates = [
+                        {"chunk_id": chunk_id, "text": self.vector_store.get_text(chunk_id), "vector": vector,
+                         "relevance": fused[chunk_id]}
+                        for chunk_id, vector in zip(chunk_ids, vectors)
+                    ]
+                    evidence = self.context_packer.pack(candidates)["text"]
             except Exception as e:
-                print(f"An error occurred during similarity search for query '{query}': {e}")
+                print(f"An error occurred during similarity search for queries {queries}: {e}")
         
-        if not all_evidence:
+        if not evidence:
             return "No specific evidence found in the candidate's resume for the given queries."
 
-        return "\n\n---\n\n".join(all_evidence)
+        return evidence
 
 # Example Usage (for testing purposes)
 if __name__ == '__main__':
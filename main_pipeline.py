@@ -3,7 +3,8 @@
 Main Pipeline Orchestrator
 Runs the complete PhD Cover Letter Generation pipeline (Steps 2-5)
 
-Usage: python main_pipeline.py "resume.pdf" "Professor Name" "University" "Publication URL" "position.pdf"
+Usage: python main_pipeline.py "resume.pdf" "Professor Name" "University" "Publication URL" "position.pdf" [--mode inprocess] [--fused]
+       python main_pipeline.py "resume.pdf" --batch manifest.jsonl [--concurrency 4]
 
 Example:
     python main_pipeline.py "data/resume.pdf" "Prof. Jane Doe" "MIT" "https://web.mit.edu/~janedoe" "data/position.pdf"
@@ -12,10 +13,17 @@ Example:
 import os
 import sys
 import argparse
+import time
 import subprocess
 import logging
+from concurrent.futures import Future
 from datetime import datetime
 from pathlib import Path
+from types import SimpleNamespace
+
+from src.batch_runner import BatchRunner
+from src.run_manifest import RunManifest
+from src.step_graph import PipelineStep, StepGraph
 
 # Configure logging
 logging.basicConfig(
@@ -24,14 +32,84 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# "subprocess" runs every step in a fresh interpreter for isolation,
+# "inprocess" imports the step components once and passes objects between steps.
+EXECUTION_MODES = ("subprocess", "inprocess")
+
+STEP_DIRECTORIES = (
+    "02_candidate_analysis",
+    "03_supervisor_analysis",
+    "04_professional_summary",
+    "05_cover_letter_generation",
+)
+
 class PipelineOrchestrator:
     """Orchestrates the complete cover letter generation pipeline."""
     
-    def __init__(self, project_root=None):
+    def __init__(self, project_root=None, mode="subprocess", use_cache=True, fused=False, stream=False):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{mode}'. Expected one of: {', '.join(EXECUTION_MODES)}")
+        if fused and mode != "inprocess":
+            raise ValueError("The fused Step 3+4 mode requires the inprocess execution mode")
         self.project_root = project_root or Path(__file__).parent.absolute()
         self.outputs_dir = self.project_root / "outputs"
+        self.mode = mode
+        self.use_cache = use_cache
+        # Step 3 emits the Step 4 summary directly, saving Step 4's LLM call.
+        self.fused = fused
+        # Step 5 prints the letter and writes its file token by token while it is generated.
+        self.stream = stream
+        self._components = None
+    
+    def load_components(self):
+        """Imports the step components once so in-process runs pay the import cost a single time."""
+        if self._components is not None:
+            return self._components
+        
+        for path in (self.project_root, *(self.project_root / step_dir for step_dir in STEP_DIRECTORIES)):
+            if str(path) not in sys.path:
+                sys.path.insert(0, str(path))
+        
+        from src.AzureConnection import client, embeddings
+        from src.token_tracker import TokenUsageTracker
+        from src.step_cache import StepCache
+        from src.supervisor_store import SupervisorProfileStore
+        from src.embedding_executor import build_embedding_client
+        from src.llm_gateway import get_gateway
+        from step2_candidate_processor import CandidateProcessor
+        from step3_main import execute_analysis, save_results
+        from step4_summary_generator import SummaryGenerator
+        from step4_main import save_summary
+        from step5_rag_retriever import CandidateRetriever
+        from step5_letter_generator import CoverLetterGenerator, EvidencePrefetcher
+        from step5_main import save_cover_letter, stream_cover_letter, DEFAULT_VECTOR_STORE_PATH
+        
+        self._components = SimpleNamespace(
+            client=get_gateway(client, cache_responses=self.use_cache),
+            embeddings=build_embedding_client(embeddings, use_cache=self.use_cache),
+            TokenUsageTracker=TokenUsageTracker,
+            step_cache=StepCache() if self.use_cache else None,
+            profile_store=SupervisorProfileStore() if self.use_cache else None,
+            CandidateProcessor=CandidateProcessor,
+            execute_analysis=execute_analysis,
+            save_results=save_results,
+            SummaryGenerator=SummaryGenerator,
+            save_summary=save_summary,
+            CandidateRetriever=CandidateRetriever,
+            CoverLetterGenerator=CoverLetterGenerator,
+            EvidencePrefetcher=EvidencePrefetcher,
+            save_cover_letter=save_cover_letter,
+            stream_cover_letter=stream_cover_letter,
+            default_vector_store_path=DEFAULT_VECTOR_STORE_PATH,
+        )
+        logger.info("In-process step components loaded")
+        return self._components
     
-    def run_step2(self, resume_path):
+    def _cache_args(self):
+        """Extra command line arguments that propagate --no-cache to the step scripts."""
+        return [] if self.use_cache else ["--no-cache"]
+    
+    def run_step2(self, resume_path, run_manifest):
         """Run Step 2: Candidate Analysis."""
         logger.info("=" * 60)
         logger.info("RUNNING STEP 2: CANDIDATE ANALYSIS")
@@ -40,7 +118,9 @@ class PipelineOrchestrator:
         cmd = [
             sys.executable, 
             str(self.project_root / "02_candidate_analysis" / "step2_main.py"),
-            resume_path
+            resume_path,
+            "--run-id", run_manifest.run_id,
+            *self._cache_args()
         ]
         
         result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.project_root)
@@ -49,13 +129,20 @@ class PipelineOrchestrator:
             logger.error(f"Step 2 failed with return code {result.returncode}")
             logger.error(f"STDOUT: {result.stdout}")
             logger.error(f"STDERR: {result.stderr}")
-            return False
+            return False, None
         else:
             logger.info("Step 2 completed successfully")
             logger.info(f"STDOUT: {result.stdout}")
-            return True
+            
+            # The candidate vector store for Step 5 is recorded in this run's manifest
+            vector_store_path = run_manifest.artifact_path("step2", "vector_store")
+            if vector_store_path:
+                return True, vector_store_path
+            
+            logger.error("Step 2 did not record a vector store in the run manifest")
+            return False, None
     
-    def run_step3(self, professor_name, university, publication_url, position_path):
+    def run_step3(self, professor_name, university, publication_url, position_path, run_manifest):
         """Run Step 3: Supervisor Analysis."""
         logger.info("=" * 60)
         logger.info("RUNNING STEP 3: SUPERVISOR ANALYSIS")
@@ -67,7 +154,9 @@ class PipelineOrchestrator:
             professor_name,
             university,
             publication_url,
-            position_path
+            position_path,
+            "--run-id", run_manifest.run_id,
+            *self._cache_args()
         ]
         
         result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.project_root)
@@ -81,18 +170,15 @@ class PipelineOrchestrator:
             logger.info("Step 3 completed successfully")
             logger.info(f"STDOUT: {result.stdout}")
             
-            # Find the generated clean analysis file for Step 4
-            step3_output_dir = self.outputs_dir / "step3"
-            if step3_output_dir.exists():
-                clean_files = list(step3_output_dir.glob("step3_clean_*.txt"))
-                if clean_files:
-                    latest_file = max(clean_files, key=lambda x: x.stat().st_mtime)
-                    return True, str(latest_file)
+            # Find the clean analysis file for Step 4 in this run's manifest
+            analysis_file = run_manifest.artifact_path("step3", "clean_analysis")
+            if analysis_file:
+                return True, analysis_file
             
             logger.error("Could not find Step 3 output file")
             return False, None
     
-    def run_step4(self, analysis_file):
+    def run_step4(self, analysis_file, run_manifest):
         """Run Step 4: Professional Summary."""
         logger.info("=" * 60)
         logger.info("RUNNING STEP 4: PROFESSIONAL SUMMARY")
@@ -101,7 +187,9 @@ class PipelineOrchestrator:
         cmd = [
             sys.executable,
             str(self.project_root / "04_professional_summary" / "step4_main.py"),
-            analysis_file
+            analysis_file,
+            "--run-id", run_manifest.run_id,
+            *self._cache_args()
         ]
         
         result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.project_root)
@@ -115,18 +203,15 @@ class PipelineOrchestrator:
             logger.info("Step 4 completed successfully")
             logger.info(f"STDOUT: {result.stdout}")
             
-            # Find the generated summary file for Step 5
-            step4_output_dir = self.outputs_dir / "step4"
-            if step4_output_dir.exists():
-                summary_files = list(step4_output_dir.glob("summary_*.json"))
-                if summary_files:
-                    latest_file = max(summary_files, key=lambda x: x.stat().st_mtime)
-                    return True, str(latest_file)
+            # Find the summary file for Step 5 in this run's manifest
+            summary_file = run_manifest.artifact_path("step4", "summary")
+            if summary_file:
+                return True, summary_file
             
             logger.error("Could not find Step 4 output file")
             return False, None
     
-    def run_step5(self, summary_file):
+    def run_step5(self, summary_file, vector_store_path, run_manifest):
         """Run Step 5: Cover Letter Generation."""
         logger.info("=" * 60)
         logger.info("RUNNING STEP 5: COVER LETTER GENERATION")
@@ -135,56 +220,293 @@ class PipelineOrchestrator:
         cmd = [
             sys.executable,
             str(self.project_root / "05_cover_letter_generation" / "step5_main.py"),
-            summary_file
+            summary_file,
+            "--vector-store", vector_store_path,
+            "--run-id", run_manifest.run_id
         ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.project_root)
+        if self.stream:
+            # Let the step's stdout through so the letter appears on the terminal as it is generated.
+            cmd.append("--stream")
+            result = subprocess.run(cmd, stdout=None, stderr=subprocess.PIPE, text=True, cwd=self.project_root)
+        else:
+            result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.project_root)
         
         if result.returncode != 0:
             logger.error(f"Step 5 failed with return code {result.returncode}")
             logger.error(f"STDOUT: {result.stdout}")
             logger.error(f"STDERR: {result.stderr}")
-            return False
+            return False, None
         else:
             logger.info("Step 5 completed successfully")
             logger.info(f"STDOUT: {result.stdout}")
-            return True
+            return True, run_manifest.artifact_path("step5", "cover_letter")
+    
+    def run_step2_inprocess(self, resume_path, token_tracker, run_manifest):
+        """Run Step 2 in the current interpreter and return the saved vector store path."""
+        logger.info("=" * 60)
+        logger.info("RUNNING STEP 2: CANDIDATE ANALYSIS (in-process)")
+        logger.info("=" * 60)
+        
+        start = time.perf_counter()
+        components = self.load_components()
+        processor = components.CandidateProcessor(embedding_client=components.embeddings, step_cache=components.step_cache)
+        vector_store_path = processor.process_and_save(resume_path, token_tracker)
+        
+        if not vector_store_path:
+            logger.error("Step 2 did not produce a candidate vector store")
+            return False, None
+        
+        run_manifest.record_step("step2", {"vector_store": vector_store_path}, time.perf_counter() - start)
+        logger.info(f"Step 2 completed successfully: {vector_store_path}")
+        return True, vector_store_path
+    
+    def run_step3_inprocess(self, professor_name, university, publication_url, position_path, token_tracker, run_manifest):
+        """Run Step 3 in the current interpreter and return the analysis dictionary."""
+        logger.info("=" * 60)
+        logger.info("RUNNING STEP 3: SUPERVISOR ANALYSIS (in-process)")
+        logger.info("=" * 60)
+        
+        start = time.perf_counter()
+        components = self.load_components()
+        analysis_data = components.execute_analysis(professor_name, university, publication_url, position_path, token_tracker,
+                                                     components.profile_store, self.fused, components.embeddings)
+        saved_files = components.save_results(analysis_data, professor_name, university, run_id=run_manifest.run_id)
+        
+        if not analysis_data.get('clean_analysis'):
+            logger.error("Step 3 returned an empty analysis")
+            return False, None
+        
+        run_manifest.record_step("step3", saved_files, time.perf_counter() - start)
+        logger.info(f"Step 3 completed successfully: {saved_files}")
+        return True, analysis_data
+    
+    def run_step4_inprocess(self, analysis_data, token_tracker, run_manifest, retriever_ready=None):
+        """
+        Run Step 4 in the current interpreter and return the structured summary.
+        
+        With retriever_ready (a Future resolving to Step 5's CandidateRetriever) the summary is
+        streamed into an EvidencePrefetcher, so Step 5's candidate retrieval starts as soon as
+        the position's skills and experience have been generated. No prefetcher is built in
+        fused mode or when the summary comes from the step cache, where it would never fire.
+        
+        Returns:
+            (success, summary, prefetcher or None)
+        """
+        logger.info("=" * 60)
+        logger.info("RUNNING STEP 4: PROFESSIONAL SUMMARY (in-process)")
+        logger.info("=" * 60)
+        
+        start = time.perf_counter()
+        components = self.load_components()
+        summary_generator = components.SummaryGenerator(token_tracker, step_cache=components.step_cache, llm_client=components.client)
+        prefetcher = None
+        if analysis_data.get('summary') is not None:
+            # Fused mode: only fields Step 3 left missing or invalid cost an LLM call.
+            professional_summary = summary_generator.complete_summary(analysis_data['summary'], analysis_data['detailed_analysis'])
+        else:
+            if retriever_ready is not None and summary_generator.cached_summary(analysis_data['clean_analysis']) is None:
+                prefetcher = components.EvidencePrefetcher(retriever_ready)
+            professional_summary = summary_generator.generate_summary(
+                analysis_data['clean_analysis'],
+                on_field=prefetcher.on_field if prefetcher else None
+            )
+        
+        if not professional_summary:
+            logger.error("Step 4 failed to generate a professional summary")
+            if prefetcher:
+                prefetcher.close()
+            return False, None, None
+        
+        summary_file = components.save_summary(professional_summary, run_id=run_manifest.run_id)
+        run_manifest.record_step("step4", {"summary": summary_file}, time.perf_counter() - start)
+        logger.info(f"Step 4 completed successfully: {summary_file}")
+        return True, professional_summary, prefetcher
+    
+    def open_candidate_retriever(self, vector_store_path, token_tracker=None):
+        """Opens the Step 5 retriever over the candidate vector store."""
+        components = self.load_components()
+        return components.CandidateRetriever(
+            vector_store_path=vector_store_path or components.default_vector_store_path,
+            embeddings_client=components.embeddings,
+            token_tracker=token_tracker
+        )
+    
+    def run_step5_inprocess(self, summary_data, vector_store_path, token_tracker, run_manifest, prefetcher=None,
+                            candidate_retriever=None):
+        """Run Step 5 in the current interpreter and return the saved cover letter path."""
+        logger.info("=" * 60)
+        logger.info("RUNNING STEP 5: COVER LETTER GENERATION (in-process)")
+        logger.info("=" * 60)
+        
+        start = time.perf_counter()
+        components = self.load_components()
+        candidate_retriever = candidate_retriever or self.open_candidate_retriever(vector_store_path, token_tracker)
+        letter_generator = components.CoverLetterGenerator(
+            candidate_retriever=candidate_retriever,
+            llm_client=components.client,
+            token_tracker=token_tracker
+        )
+        try:
+            if self.stream:
+                cover_letter_text, cover_letter_file = components.stream_cover_letter(
+                    letter_generator, summary_data, run_id=run_manifest.run_id,
+                    on_token=lambda text: print(text, end="", flush=True), prefetcher=prefetcher
+                )
+            else:
+                cover_letter_text = letter_generator.generate(summary_data, prefetcher=prefetcher)
+        finally:
+            if prefetcher:
+                prefetcher.close()
+        
+        if "Error:" in cover_letter_text:
+            logger.error("Step 5 failed to generate the cover letter")
+            return False, None
+        
+        if not self.stream:
+            cover_letter_file = components.save_cover_letter(cover_letter_text, summary_data, run_id=run_manifest.run_id)
+        run_manifest.record_step("step5", {"cover_letter": cover_letter_file}, time.perf_counter() - start,
+                                 time_to_first_token_seconds=letter_generator.time_to_first_token)
+        logger.info(f"Step 5 completed successfully: {cover_letter_file}")
+        return True, cover_letter_file
+    
+    def _build_subprocess_graph(self):
+        """Declare Steps 2-5 as a dependency graph where each step runs in its own interpreter."""
+        def step2(resume_path, run_manifest):
+            success, vector_store_path = self.run_step2(resume_path, run_manifest)
+            return {'vector_store_path': vector_store_path} if success else None
+        
+        def step3(professor_name, university, publication_url, position_path, run_manifest):
+            success, analysis_file = self.run_step3(professor_name, university, publication_url, position_path, run_manifest)
+            return {'analysis_file': analysis_file} if success else None
+        
+        def step4(analysis_file, run_manifest):
+            success, summary_file = self.run_step4(analysis_file, run_manifest)
+            return {'summary_file': summary_file} if success else None
+        
+        def step5(summary_file, vector_store_path, run_manifest):
+            success, cover_letter_file = self.run_step5(summary_file, vector_store_path, run_manifest)
+            return {'cover_letter_file': cover_letter_file} if success else None
+        
+        return StepGraph([
+            PipelineStep("Step 2", step2, inputs=['resume_path', 'run_manifest'], outputs=['vector_store_path']),
+            PipelineStep("Step 3", step3, inputs=['professor_name', 'university', 'publication_url', 'position_path', 'run_manifest'], outputs=['analysis_file']),
+            PipelineStep("Step 4", step4, inputs=['analysis_file', 'run_manifest'], outputs=['summary_file']),
+            PipelineStep("Step 5", step5, inputs=['summary_file', 'vector_store_path', 'run_manifest'], outputs=['cover_letter_file']),
+        ])
+    
+    def _build_inprocess_graph(self, vector_store_path=None, token_tracker=None):
+        """
+        Declare the steps as a dependency graph that hands Python objects between steps.
+        
+        Args:
+            vector_store_path: An existing candidate vector store. When given, Step 2 is left out
+                and the graph expects 'vector_store_path' in its initial context, which lets many
+                positions reuse one candidate vector store.
+            token_tracker: Records the retriever's embedding usage when Step 2 is left out.
+        """
+        # Resolves to Step 5's retriever once the vector store exists. Step 4 hands it to its
+        # prefetcher without waiting, so Step 4 does not depend on Step 2.
+        retriever_ready = Future()
+        if vector_store_path:
+            retriever_ready.set_result(self.open_candidate_retriever(vector_store_path, token_tracker))
+        
+        def step2(resume_path, token_tracker, run_manifest):
+            success, vector_store_path = False, None
+            try:
+                success, vector_store_path = self.run_step2_inprocess(resume_path, token_tracker, run_manifest)
+                if success:
+                    retriever_ready.set_result(self.open_candidate_retriever(vector_store_path, token_tracker))
+            finally:
+                if not retriever_ready.done():
+                    # Never leave a prefetch waiting on a vector store that will not come.
+                    retriever_ready.set_exception(RuntimeError("Step 2 did not produce a candidate vector store"))
+            return {'vector_store_path': vector_store_path} if success else None
+        
+        def step3(professor_name, university, publication_url, position_path, token_tracker, run_manifest):
+            success, analysis_data = self.run_step3_inprocess(professor_name, university, publication_url, position_path, token_tracker, run_manifest)
+            return {'analysis_data': analysis_data} if success else None
+        
+        def step4(analysis_data, token_tracker, run_manifest):
+            success, summary_data, prefetcher = self.run_step4_inprocess(analysis_data, token_tracker, run_manifest, retriever_ready)
+            return {'summary_data': summary_data, 'evidence_prefetcher': prefetcher} if success else None
+        
+        def step5(summary_data, vector_store_path, evidence_prefetcher, token_tracker, run_manifest):
+            success, cover_letter_file = self.run_step5_inprocess(summary_data, vector_store_path, token_tracker, run_manifest,
+                                                                  evidence_prefetcher, retriever_ready.result())
+            return {'cover_letter_file': cover_letter_file} if success else None
+        
+        steps = [
+            PipelineStep("Step 3", step3, inputs=['professor_name', 'university', 'publication_url', 'position_path', 'token_tracker', 'run_manifest'], outputs=['analysis_data']),
+            PipelineStep("Step 4", step4, inputs=['analysis_data', 'token_tracker', 'run_manifest'], outputs=['summary_data', 'evidence_prefetcher']),
+            PipelineStep("Step 5", step5, inputs=['summary_data', 'vector_store_path', 'evidence_prefetcher', 'token_tracker', 'run_manifest'], outputs=['cover_letter_file']),
+        ]
+        if not vector_store_path:
+            steps.insert(0, PipelineStep("Step 2", step2, inputs=['resume_path', 'token_tracker', 'run_manifest'], outputs=['vector_store_path']))
+        return StepGraph(steps)
+    
+    def run_position_inprocess(self, vector_store_path, professor_name, university, publication_url, position_path, token_tracker, run_manifest=None):
+        """
+        Run Steps 3-5 for one supervisor/position against an existing candidate vector store.
+        
+        Returns:
+            The step graph result dictionary (see StepGraph.run); its context holds the 'run_manifest'.
+        """
+        graph = self._build_inprocess_graph(vector_store_path, token_tracker)
+        return graph.run({
+            'vector_store_path': vector_store_path,
+            'professor_name': professor_name,
+            'university': university,
+            'publication_url': publication_url,
+            'position_path': position_path,
+            'token_tracker': token_tracker,
+            'run_manifest': run_manifest or RunManifest(),
+        })
     
     def run_full_pipeline(self, resume_path, professor_name, university, publication_url, position_path):
         """Run the complete pipeline from Steps 2-5."""
         start_time = datetime.now()
+        run_manifest = RunManifest()
         logger.info("? STARTING COMPLETE PhD COVER LETTER GENERATION PIPELINE")
         logger.info(f"Start time: {start_time}")
+        logger.info(f"Execution mode: {self.mode}{' (fused Step 3+4)' if self.fused else ''}")
+        logger.info(f"Run ID: {run_manifest.run_id}")
         logger.info("=" * 80)
         
         try:
-            # Step 2: Candidate Analysis
-            if not self.run_step2(resume_path):
-                logger.error("? Pipeline failed at Step 2")
-                return False
+            context = {
+                'resume_path': resume_path,
+                'professor_name': professor_name,
+                'university': university,
+                'publication_url': publication_url,
+                'position_path': position_path,
+                'run_manifest': run_manifest,
+            }
+            if self.mode == "inprocess":
+                # Steps 2 and 3 may run concurrently, so one shared (thread-safe) tracker records both.
+                token_tracker = self.load_components().TokenUsageTracker()
+                context['token_tracker'] = token_tracker
+                graph = self._build_inprocess_graph()
+            else:
+                token_tracker = None
+                graph = self._build_subprocess_graph()
             
-            # Step 3: Supervisor Analysis
-            step3_success, analysis_file = self.run_step3(professor_name, university, publication_url, position_path)
-            if not step3_success:
-                logger.error("? Pipeline failed at Step 3")
+            result = graph.run(context)
+            if not result['success']:
+                logger.error(f"? Pipeline failed at {result['failed_step']}")
                 return False
             
-            # Step 4: Professional Summary
-            step4_success, summary_file = self.run_step4(analysis_file)
-            if not step4_success:
-                logger.error("? Pipeline failed at Step 4")
-                return False
-            
-            # Step 5: Cover Letter Generation
-            if not self.run_step5(summary_file):
-                logger.error("? Pipeline failed at Step 5")
-                return False
+            if token_tracker:
+                token_tracker.display_usage()
+            for step_name, elapsed in result['timings'].items():
+                logger.info(f"{step_name} took {elapsed:.2f}s")
             
             end_time = datetime.now()
             duration = end_time - start_time
             
             logger.info("=" * 80)
             logger.info("? PIPELINE COMPLETED SUCCESSFULLY!")
+            logger.info(f"Cover letter: {result['context'].get('cover_letter_file')}")
+            logger.info(f"Run manifest: {run_manifest.run_dir}")
             logger.info(f"Total execution time: {duration}")
             logger.info(f"End time: {end_time}")
             logger.info("=" * 80)
@@ -202,10 +524,24 @@ def main():
         epilog='Example: python main_pipeline.py "data/resume.pdf" "Prof. Jane Doe" "MIT" "https://web.mit.edu/~janedoe" "data/position.pdf"'
     )
     parser.add_argument('resume_path', help='Path to candidate resume PDF')
-    parser.add_argument('professor_name', help='Professor name')
-    parser.add_argument('university', help='University name')
-    parser.add_argument('publication_url', help='Professor publication URL')
-    parser.add_argument('position_path', help='Path to position description PDF')
+    parser.add_argument('professor_name', nargs='?', help='Professor name')
+    parser.add_argument('university', nargs='?', help='University name')
+    parser.add_argument('publication_url', nargs='?', help='Professor publication URL')
+    parser.add_argument('position_path', nargs='?', help='Path to position description PDF')
+    parser.add_argument('--mode', choices=EXECUTION_MODES, default='subprocess',
+                        help='Run each step in its own interpreter (subprocess) or share one interpreter (inprocess)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Recompute every step instead of reusing cached results for unchanged inputs')
+    parser.add_argument('--fused', action='store_true',
+                        help='Let Step 3 produce the Step 4 summary in the same LLM call (implies --mode inprocess)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Print the cover letter and write its file token by token while Step 5 generates it')
+    parser.add_argument('--batch', metavar='MANIFEST',
+                        help='JSONL manifest with one {professor_name, university, publication_url, position_path} object per line')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Maximum number of positions processed at once in batch mode (default: 4)')
+    parser.add_argument('--results', metavar='PATH',
+                        help='Batch results manifest (default: outputs/batch/<manifest>_results.jsonl); completed rows are skipped on re-runs')
     
     args = parser.parse_args()
     
@@ -214,11 +550,40 @@ def main():
         logger.error(f"Resume file not found: {args.resume_path}")
         sys.exit(1)
     
+    if args.batch:
+        if not os.path.exists(args.batch):
+            logger.error(f"Batch manifest not found: {args.batch}")
+            sys.exit(1)
+        
+        if args.stream:
+            logger.info("--stream is ignored in batch mode: concurrent letters would interleave on stdout")
+        # Batch mode always shares one interpreter so the resume is embedded only once.
+        orchestrator = PipelineOrchestrator(mode="inprocess", use_cache=not args.no_cache, fused=args.fused)
+        try:
+            runner = BatchRunner(orchestrator, concurrency=args.concurrency, results_path=args.results)
+            summary = runner.run(args.resume_path, args.batch)
+        except (RuntimeError, ValueError) as e:
+            # A bad --concurrency, a malformed manifest line or a failed Step 2: no position can run.
+            logger.error(f"Batch failed: {e}")
+            sys.exit(1)
+        
+        logger.info("=" * 80)
+        logger.info(f"BATCH COMPLETE: {summary['succeeded']} succeeded, {summary['failed']} failed, {summary['skipped']} skipped")
+        logger.info(f"Results manifest: {summary['results_path']}")
+        logger.info("=" * 80)
+        sys.exit(0 if summary['failed'] == 0 else 1)
+    
+    if not all([args.professor_name, args.university, args.publication_url, args.position_path]):
+        parser.error("professor_name, university, publication_url and position_path are required unless --batch is given")
+    
     if not os.path.exists(args.position_path):
         logger.error(f"Position file not found: {args.position_path}")
         sys.exit(1)
     
-    orchestrator = PipelineOrchestrator()
+    if args.fused and args.mode != 'inprocess':
+        logger.info("--fused hands the summary between steps as a Python object; running in-process")
+    orchestrator = PipelineOrchestrator(mode='inprocess' if args.fused else args.mode, use_cache=not args.no_cache,
+                                        fused=args.fused, stream=args.stream)
     
     success = orchestrator.run_full_pipeline(
         resume_path=args.resume_path,
@@ -0,0 +1,193 @@
+# FILE: src/batch_runner.py
+# PURPOSE: Runs one resume against many supervisor/position pairs listed in a JSONL manifest.
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Set
+
+from src.run_manifest import RunManifest
+from src.step_cache import hash_file
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_ROW_FIELDS = ("professor_name", "university", "publication_url", "position_path")
+
+class BatchRunner:
+    """
+    Builds the candidate vector store once and fans Steps 3-5 out over a bounded worker pool,
+    one task per manifest row. Every finished row is appended to a results manifest so that a
+    partially failed batch can be re-run and only the unfinished rows are processed again.
+    Results are tied to the resume's sha256, so a batch re-run with another resume redoes every row.
+    """
+    def __init__(self, orchestrator, concurrency: int = 4, results_path: str = None):
+        """
+        Initializes the batch runner.
+
+        Args:
+            orchestrator: A PipelineOrchestrator; its in-process step methods are used for every row.
+            concurrency (int): Maximum number of positions processed at the same time.
+            results_path (str, optional): Where to write the per-row results manifest. Defaults to
+                outputs/batch/<manifest name>_results.jsonl.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.orchestrator = orchestrator
+        self.concurrency = concurrency
+        self.results_path = results_path
+        self._results_lock = threading.Lock()
+
+    @staticmethod
+    def row_id(row: Dict) -> str:
+        """Returns the row's explicit 'id', or a stable hash of its position fields."""
+        if row.get("id"):
+            return str(row["id"])
+        key = json.dumps([row.get(field, "") for field in REQUIRED_ROW_FIELDS], ensure_ascii=False)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def load_manifest(manifest_path: str) -> List[Dict]:
+        """Reads the JSONL manifest, skipping blank lines and '#' comments."""
+        rows = []
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON on line {line_number} of {manifest_path}: {e}")
+                if not isinstance(row, dict):
+                    raise ValueError(f"Line {line_number} of {manifest_path} is not a JSON object")
+                row["_line"] = line_number
+                rows.append(row)
+        return rows
+
+    @staticmethod
+    def load_completed(results_path: str, resume_sha256: str) -> Set[str]:
+        """
+        Returns the ids of rows whose most recent result for this resume succeeded.
+        Records of other resumes (or without a 'resume_sha256') are ignored.
+        """
+        latest_status = {}
+        if not os.path.exists(results_path):
+            return set()
+        with open(results_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write can leave a truncated last line; that row simply reruns.
+                    continue
+                if not isinstance(record, dict) or record.get("resume_sha256") != resume_sha256:
+                    continue
+                latest_status[record.get("row_id")] = record.get("status")
+        return {row_id for row_id, status in latest_status.items() if status == "success"}
+
+    def _default_results_path(self, manifest_path: str) -> str:
+        manifest_name = os.path.splitext(os.path.basename(manifest_path))[0]
+        return str(self.orchestrator.outputs_dir / "batch" / f"{manifest_name}_results.jsonl")
+
+    def _append_result(self, record: Dict) -> None:
+        """Appends one result record; the lock keeps concurrent workers from interleaving lines."""
+        with self._results_lock:
+            with open(self.results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _process_row(self, row: Dict, vector_store_path: str, token_tracker, resume_sha256: str) -> Dict:
+        """Runs Steps 3-5 for one manifest row and returns its result record."""
+        row_id = self.row_id(row)
+        record = {
+            "row_id": row_id,
+            "resume_sha256": resume_sha256,
+            "line": row.get("_line"),
+            "professor_name": row.get("professor_name"),
+            "university": row.get("university"),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        start = time.perf_counter()
+        run_manifest = RunManifest()
+        record["run_id"] = run_manifest.run_id
+
+        missing = [field for field in REQUIRED_ROW_FIELDS if not row.get(field)]
+        if missing:
+            record.update(status="failed", error=f"Missing fields: {', '.join(missing)}")
+        elif not os.path.exists(row["position_path"]):
+            record.update(status="failed", error=f"Position file not found: {row['position_path']}")
+        else:
+            try:
+                result = self.orchestrator.run_position_inprocess(
+                    vector_store_path,
+                    row["professor_name"],
+                    row["university"],
+                    row["publication_url"],
+                    row["position_path"],
+                    token_tracker,
+                    run_manifest
+                )
+                if result["success"]:
+                    record.update(status="success", cover_letter_file=result["context"].get("cover_letter_file"))
+                else:
+                    record.update(status="failed", error=f"Failed at {result['failed_step']}")
+            except Exception as e:
+                record.update(status="failed", error=str(e))
+
+        record["duration_seconds"] = round(time.perf_counter() - start, 2)
+        record["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        self._append_result(record)
+        return record
+
+    def run(self, resume_path: str, manifest_path: str) -> Dict:
+        """
+        Processes every unfinished row of the manifest.
+
+        Args:
+            resume_path (str): The candidate resume shared by every row.
+            manifest_path (str): JSONL file with one {professor_name, university,
+                publication_url, position_path[, id]} object per line.
+
+        Returns:
+            Dict: Counts of 'succeeded', 'failed' and 'skipped' rows plus the 'results_path'.
+        """
+        rows = self.load_manifest(manifest_path)
+        self.results_path = self.results_path or self._default_results_path(manifest_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.results_path)), exist_ok=True)
+
+        resume_sha256 = hash_file(resume_path)
+        completed = self.load_completed(self.results_path, resume_sha256)
+        todo = [row for row in rows if self.row_id(row) not in completed]
+        logger.info(f"Batch manifest has {len(rows)} row(s); {len(rows) - len(todo)} already completed, {len(todo)} to run")
+        summary = {"succeeded": 0, "failed": 0, "skipped": len(rows) - len(todo), "results_path": self.results_path}
+        if not todo:
+            return summary
+
+        components = self.orchestrator.load_components()
+        token_tracker = components.TokenUsageTracker()
+
+        # Step 2 runs once; every position reuses the same candidate vector store.
+        step2_success, vector_store_path = self.orchestrator.run_step2_inprocess(resume_path, token_tracker, RunManifest())
+        if not step2_success:
+            raise RuntimeError("Step 2 failed; cannot build the candidate vector store for the batch")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(self._process_row, row, vector_store_path, token_tracker, resume_sha256)
+                       for row in todo]
+            for future in as_completed(futures):
+                record = future.result()
+                if record["status"] == "success":
+                    summary["succeeded"] += 1
+                else:
+                    summary["failed"] += 1
+                    logger.error(f"Row {record['row_id']} (line {record['line']}) failed: {record.get('error')}")
+
+        token_tracker.display_usage()
+        return summary
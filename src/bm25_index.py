@@ -0,0 +1,91 @@
+# FILE: src/bm25_index.py
+# PURPOSE: Small local BM25 inverted index over resume chunks, answering keyword queries without an embedding call.
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+INDEX_FORMAT = "bm25-v1"
+
+# Keeps skill names such as "c++", "c#", "node.js" and "scikit-learn" as single terms.
+_TOKEN = re.compile(r"[a-z0-9](?:[a-z0-9+#]|[.\-](?=[a-z0-9]))*")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of chunks, addressed by their position in that list (the
+    same ids the vector stores use). Postings are plain dicts, so the index is saved as JSON.
+    """
+    def __init__(self, postings: Dict[str, Dict[int, int]], doc_lengths: List[int], k1: float = 1.5, b: float = 0.75):
+        """
+        Initializes the index. Use BM25Index.build or BM25Index.load rather than calling this directly.
+
+        Args:
+            postings: term -> {chunk id: term frequency}.
+            doc_lengths: Number of terms in each chunk.
+            k1 (float): Term frequency saturation.
+            b (float): Length normalisation.
+        """
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.avg_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(cls, texts: List[str], **params) -> "BM25Index":
+        """Indexes the texts; chunk ids are their positions in the list."""
+        postings: Dict[str, Dict[int, int]] = {}
+        doc_lengths = []
+        for chunk_id, text in enumerate(texts):
+            terms = tokenize(text)
+            doc_lengths.append(len(terms))
+            for term, count in Counter(terms).items():
+                postings.setdefault(term, {})[chunk_id] = count
+        return cls(postings, doc_lengths, **params)
+
+    def _idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[int, float]]:
+        """Returns up to k (chunk id, BM25 score) pairs, best first; chunks sharing no term with the query are left out."""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self._idf(term)
+            for chunk_id, tf in self.postings.get(term, {}).items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[chunk_id] / self.avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def covers(self, query: str) -> bool:
+        """True if every term of the query occurs somewhere in the indexed chunks."""
+        terms = tokenize(query)
+        return bool(terms) and all(term in self.postings for term in terms)
+
+    def save(self, path: str) -> None:
+        """Writes the index as JSON (atomically, so readers never see a partial file)."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"format": INDEX_FORMAT, "k1": self.k1, "b": self.b, "doc_lengths": self.doc_lengths,
+                       "postings": self.postings}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported lexical index format: {data.get('format')}")
+        # JSON object keys are strings; chunk ids are ints.
+        postings = {term: {int(chunk_id): tf for chunk_id, tf in docs.items()} for term, docs in data["postings"].items()}
+        return cls(postings, data["doc_lengths"], k1=data["k1"], b=data["b"])
@@ -0,0 +1,318 @@
+# FILE: src/candidate_store.py
+# PURPOSE: One consolidated, append-only vector store for every candidate's resume chunks.
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.bm25_index import BM25Index
+from src.embedding_cache import FileLock
+
+logger = logging.getLogger(__name__)
+
+# Get project root for consistent output path management
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_STORE_DIR = os.path.join(PROJECT_ROOT, "outputs", "candidate_store")
+
+REFERENCE_FORMAT = "candidate-ref-v1"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resumes (
+    candidate_id TEXT NOT NULL,
+    resume_version TEXT NOT NULL,
+    first_row INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    source TEXT,
+    added_at TEXT NOT NULL,
+    PRIMARY KEY (candidate_id, resume_version)
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    row INTEGER PRIMARY KEY,
+    candidate_id TEXT NOT NULL,
+    resume_version TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    text_offset INTEGER NOT NULL,
+    text_length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_by_resume ON chunks (candidate_id, resume_version);
+"""
+
+def slugify_candidate_id(value: str) -> str:
+    """Turns a name or file stem into a candidate id safe for file names."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", value.strip()) or "candidate"
+
+def store_for_model(model: str, root: str = DEFAULT_STORE_DIR) -> "CandidateStore":
+    """Returns the consolidated store for one embedding model; vectors of different models never mix."""
+    return CandidateStore(os.path.join(root, slugify_candidate_id(model)))
+
+def is_candidate_reference(path: str) -> bool:
+    """Returns True if the path is a reference file written by CandidateStore.add_resume."""
+    return os.path.isfile(path) and path.endswith(".json")
+
+class CandidateStore:
+    """
+    Resume chunks of all candidates in one directory:
+
+        vectors.f32   float32 rows appended per resume, read through np.memmap
+        chunks.bin    UTF-8 chunk texts, appended alongside the vectors
+        catalog.db    SQLite: which rows belong to which (candidate_id, resume_version)
+        refs/         one small JSON reference per resume version, handed between steps
+        lexical/      one BM25 index (JSON) per resume version, for keyword queries
+
+    Adding a resume appends its rows; nothing is rebuilt. A search reads only the rows of
+    the requested candidate, so its cost does not grow with the number of candidates.
+    """
+    def __init__(self, directory: str = DEFAULT_STORE_DIR):
+        """
+        Opens (or creates) the store.
+
+        Args:
+            directory (str): The store directory. Use one directory per embedding model.
+        """
+        self.directory = os.path.abspath(directory)
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.chunks_path = os.path.join(self.directory, "chunks.bin")
+        self.catalog_path = os.path.join(self.directory, "catalog.db")
+        self.meta_path = os.path.join(self.directory, "meta.json")
+        self.lock_path = os.path.join(self.directory, ".lock")
+        self.refs_dir = os.path.join(self.directory, "refs")
+        self.lexical_dir = os.path.join(self.directory, "lexical")
+        os.makedirs(self.refs_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.catalog_path, timeout=30)
+
+    def _dim(self) -> Optional[int]:
+        if not os.path.exists(self.meta_path):
+            return None
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)["dim"]
+
+    def reference_path(self, candidate_id: str, resume_version: str) -> str:
+        return os.path.join(self.refs_dir, candidate_id, f"{resume_version}.json")
+
+    def reference(self, candidate_id: str, resume_version: str) -> Optional[str]:
+        """Returns the reference file of a stored resume version, or None if it was never added."""
+        if not self.has_resume(candidate_id, resume_version):
+            return None
+        return self._write_reference(candidate_id, resume_version)
+
+    def has_resume(self, candidate_id: str, resume_version: str) -> bool:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT 1 FROM resumes WHERE candidate_id = ? AND resume_version = ?", (candidate_id, resume_version)
+            ).fetchone()
+        return row is not None
+
+    def latest_version(self, candidate_id: str) -> Optional[str]:
+        """Returns the most recently added resume version of a candidate."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT resume_version FROM resumes WHERE candidate_id = ? ORDER BY added_at DESC, rowid DESC LIMIT 1",
+                (candidate_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def lexical_path(self, candidate_id: str, resume_version: str) -> str:
+        return os.path.join(self.lexical_dir, candidate_id, f"{resume_version}.json")
+
+    def save_lexical_index(self, candidate_id: str, resume_version: str, index: BM25Index) -> str:
+        """Stores the BM25 index of a resume version; its chunk ids are the chunk positions. Returns its path."""
+        path = self.lexical_path(candidate_id, resume_version)
+        index.save(path)
+        return path
+
+    def _write_reference(self, candidate_id: str, resume_version: str) -> str:
+        path = self.reference_path(candidate_id, resume_version)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"format": REFERENCE_FORMAT, "store": self.directory,
+                           "candidate_id": candidate_id, "resume_version": resume_version}, f, indent=2)
+            os.replace(tmp_path, path)
+        return path
+
+    def add_resume(self, candidate_id: str, resume_version: str, texts: List[str], vectors: List[List[float]], source: str = None) -> str:
+        """
+        Appends one resume version. Adding a version that is already stored is a no-op.
+
+        Args:
+            candidate_id (str): The candidate the chunks belong to.
+            resume_version (str): Identifies this resume, e.g. a hash of the PDF bytes.
+            texts (List[str]): The chunk texts.
+            vectors (List[List[float]]): One embedding per chunk.
+            source (str, optional): Where the resume came from, stored for reference.
+
+        Returns:
+            str: Path of the JSON reference to pass to CandidateRetriever.
+        """
+        array = np.asarray(vectors, dtype=np.float32)
+        if len(texts) != len(array):
+            raise ValueError(f"Got {len(texts)} texts but {len(array)} vectors")
+
+        with self._lock, FileLock(self.lock_path):
+            if self.has_resume(candidate_id, resume_version):
+                return self._write_reference(candidate_id, resume_version)
+
+            dim = self._dim()
+            if dim is None:
+                dim = int(array.shape[1])
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"dim": dim}, f)
+            elif array.shape[1] != dim:
+                raise ValueError(f"Embedding dimension {array.shape[1]} does not match store dimension {dim}")
+
+            # Rows and offsets come from the data files, so bytes left by an interrupted add
+            # are simply never referenced.
+            size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+            first_row = size // (dim * 4)
+            if size != first_row * dim * 4:
+                # Drop a partially written row (even a torn first one) so the new rows stay aligned.
+                os.truncate(self.vectors_path, first_row * dim * 4)
+            text_offset = os.path.getsize(self.chunks_path) if os.path.exists(self.chunks_path) else 0
+
+            chunk_rows = []
+            with open(self.vectors_path, "ab") as f:
+                f.write(array.tobytes())
+            with open(self.chunks_path, "ab") as f:
+                for i, text in enumerate(texts):
+                    data = text.encode("utf-8")
+                    f.write(data)
+                    chunk_rows.append((first_row + i, candidate_id, resume_version, i, text_offset, len(data)))
+                    text_offset += len(data)
+
+            with closing(self._connect()) as conn, conn:
+                conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?)", chunk_rows)
+                conn.execute(
+                    "INSERT INTO resumes VALUES (?, ?, ?, ?, ?, ?)",
+                    (candidate_id, resume_version, first_row, len(texts), source, datetime.now().isoformat(timespec="seconds"))
+                )
+            logger.info(f"Added {len(texts)} chunk(s) for candidate '{candidate_id}' (version {resume_version})")
+            return self._write_reference(candidate_id, resume_version)
+
+    def _chunk_rows(self, candidate_id: str, resume_version: str) -> List[Tuple[int, int, int]]:
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT row, text_offset, text_length FROM chunks WHERE candidate_id = ? AND resume_version = ? ORDER BY row",
+                (candidate_id, resume_version)
+            ).fetchall()
+
+    def load_vectors(self, rows: List[int]) -> np.ndarray:
+        """Reads the given rows from the vectors file without touching any other rows."""
+        dim = self._dim()
+        row_count = os.path.getsize(self.vectors_path) // (dim * 4)
+        matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(row_count, dim))
+        try:
+            return np.array(matrix[rows])
+        finally:
+            del matrix
+
+    def read_text(self, text_offset: int, text_length: int) -> str:
+        with open(self.chunks_path, "rb") as f:
+            f.seek(text_offset)
+            return f.read(text_length).decode("utf-8")
+
+    def view(self, candidate_id: str, resume_version: str, embeddings_client: Embeddings) -> "CandidateVectorStore":
+        """Returns a searchable view restricted to one candidate's resume version."""
+        return CandidateVectorStore(self, candidate_id, resume_version, embeddings_client)
+
+    @classmethod
+    def open_reference(cls, reference_path: str, embeddings_client: Embeddings) -> "CandidateVectorStore":
+        """Opens the candidate view described by a reference file written by add_resume."""
+        with open(reference_path, "r", encoding="utf-8") as f:
+            reference = json.load(f)
+        if reference.get("format") != REFERENCE_FORMAT:
+            raise ValueError(f"Unsupported candidate reference format: {reference.get('format')}")
+        return cls(reference["store"]).view(reference["candidate_id"], reference["resume_version"], embeddings_client)
+
+class CandidateVectorStore:
+    """
+    One candidate's chunks from a CandidateStore. Only this candidate's vectors are read
+    (once, on first search) and nearest neighbours are found by exact L2 distance, the
+    same metric as the FAISS flat index the single-candidate stores use.
+    """
+    def __init__(self, store: CandidateStore, candidate_id: str, resume_version: str, embeddings_client: Embeddings):
+        self.store = store
+        self.candidate_id = candidate_id
+        self.resume_version = resume_version
+        self.embeddings_client = embeddings_client
+        self._rows = store._chunk_rows(candidate_id, resume_version)
+        if not self._rows:
+            raise ValueError(f"No chunks stored for candidate '{candidate_id}' version {resume_version}")
+        self._vectors = None
+        self._texts: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get_text(self, position: int) -> str:
+        """Returns the text of the candidate's chunk at the given position."""
+        if position not in self._texts:
+            _, text_offset, text_length = self._rows[position]
+            self._texts[position] = self.store.read_text(text_offset, text_length)
+        return self._texts[position]
+
+    def lexical_index(self) -> BM25Index:
+        """
+        Returns the BM25 index Step 2 saved for this resume version. Versions stored before
+        lexical indexes existed get one built from their chunk texts (and saved) on first use.
+        """
+        path = self.store.lexical_path(self.candidate_id, self.resume_version)
+        if os.path.exists(path):
+            return BM25Index.load(path)
+        index = BM25Index.build([self.get_text(i) for i in range(len(self))])
+        self.store.save_lexical_index(self.candidate_id, self.resume_version, index)
+        return index
+
+    def _load_vectors(self) -> np.ndarray:
+        if self._vectors is None:
+            self._vectors = self.store.load_vectors([row for row, _, _ in self._rows])
+        return self._vectors
+
+    def get_vectors(self, positions: List[int]) -> np.ndarray:
+        """Returns the embeddings of the candidate's chunks at the given positions, one row each."""
+        return self._load_vectors()[list(positions)]
+
+    def search_by_vectors(self, vectors: List[List[float]], k: int = 4) -> List[List[Tuple[int, float]]]:
+        """Returns, for each query vector, up to k (chunk position, squared L2 distance) pairs."""
+        self._load_vectors()
+        queries = np.asarray(vectors, dtype=np.float32)
+        # |q - x|^2 = |q|^2 - 2 q.x + |x|^2 for every (query, chunk) pair in one matrix product
+        distances = (
+            (queries ** 2).sum(axis=1)[:, None]
+            - 2.0 * queries @ self._vectors.T
+            + (self._vectors ** 2).sum(axis=1)[None, :]
+        )
+        np.maximum(distances, 0.0, out=distances)
+        nearest = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return [[(int(i), float(row[i])) for i in order] for row, order in zip(distances, nearest)]
+
+    def search_by_vector(self, vector: List[float], k: int = 4) -> List[Tuple[int, float]]:
+        """Returns up to k (chunk position, squared L2 distance) pairs nearest to the vector."""
+        return self.search_by_vectors([vector], k)[0]
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        """Embeds the query and returns the k nearest chunks as Documents (same shape as FAISS.similarity_search)."""
+        hits = self.search_by_vector(self.embeddings_client.embed_query(query), k)
+        return [
+            Document(
+                page_content=self.get_text(i),
+                metadata={"chunk_id": self._rows[i][0], "score": score,
+                          "candidate_id": self.candidate_id, "resume_version": self.resume_version}
+            )
+            for i, score in hits
+        ]
@@ -0,0 +1,167 @@
+# FILE: src/context_packer.py
+# PURPOSE: Packs retrieved chunks into a token budget, balancing relevance and diversity (MMR).
+
+import logging
+from typing import Dict, List
+
+import numpy as np
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TOKENS = 1500
+DEFAULT_LAMBDA = 0.7
+# Upper bound on the overlap searched for between adjacent chunks (the splitters use 100 characters).
+MAX_OVERLAP_CHARS = 300
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+def merge_overlap(first: str, second: str) -> str:
+    """Joins two consecutive chunks, dropping the text the splitter repeated at the start of the second."""
+    limit = min(len(first), len(second), MAX_OVERLAP_CHARS)
+    for size in range(limit, 0, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first}\n{second}"
+
+class ContextPacker:
+    """
+    Chooses which retrieved chunks go into a prompt. Candidates are ranked by maximal marginal
+    relevance (closeness to the queries minus similarity to chunks already chosen), chunks that
+    are neighbours in the same document are merged into one passage without their overlap, and
+    chunks are added only while the rendered context stays within `max_tokens`.
+
+    A candidate is a dict with 'chunk_id', 'text' and 'vector' (its embedding), and optionally
+    'source', 'page' and 'relevance' (used instead of query similarity when no query vectors are
+    given). Chunks with the same source and consecutive chunk ids are neighbours.
+    """
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS, lambda_mult: float = DEFAULT_LAMBDA,
+                 separator: str = "\n---\n", encoding_name: str = "cl100k_base"):
+        """
+        Initializes the packer.
+
+        Args:
+            max_tokens (int): Token budget of the rendered context.
+            lambda_mult (float): 1.0 ranks by relevance only, 0.0 by diversity only.
+            separator (str): Placed between passages.
+            encoding_name (str): tiktoken encoding the budget is measured in.
+        """
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be at least 1")
+        self.max_tokens = max_tokens
+        self.lambda_mult = lambda_mult
+        self.separator = separator
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+    def rank(self, candidates: List[Dict], query_vectors=None) -> List[Dict]:
+        """
+        Orders the candidates by maximal marginal relevance to the query vectors, or to their
+        own 'relevance' scores (scaled to at most 1) when query_vectors is None.
+        """
+        if not candidates:
+            return []
+        chunks = _normalize(np.asarray([c["vector"] for c in candidates], dtype=np.float32))
+        if query_vectors is None:
+            relevance = np.asarray([c["relevance"] for c in candidates], dtype=np.float32)
+            relevance = relevance / max(float(relevance.max()), 1e-9)
+        else:
+            queries = _normalize(np.asarray(query_vectors, dtype=np.float32))
+            # A chunk is as relevant as its best-matching query.
+            relevance = (chunks @ queries.T).max(axis=1)
+        similarity = chunks @ chunks.T
+
+        order, remaining = [], list(range(len(candidates)))
+        redundancy = np.full(len(candidates), -np.inf)
+        while remaining:
+            penalty = np.where(np.isinf(redundancy[remaining]), 0.0, redundancy[remaining])
+            scores = self.lambda_mult * relevance[remaining] - (1 - self.lambda_mult) * penalty
+            best = remaining.pop(int(np.argmax(scores)))
+            order.append(best)
+            redundancy = np.maximum(redundancy, similarity[best])
+        return [candidates[i] for i in order]
+
+    @staticmethod
+    def _passages(selected: List[Dict]) -> List[Dict]:
+        """Merges neighbouring chunks; passages keep the rank of their best chunk."""
+        groups: Dict[object, List[Dict]] = {}
+        for rank, chunk in enumerate(selected):
+            groups.setdefault(chunk.get("source"), []).append(dict(chunk, rank=rank))
+
+        passages = []
+        for source, chunks in groups.items():
+            chunks.sort(key=lambda chunk: chunk["chunk_id"])
+            current = None
+            for chunk in chunks:
+                if current and chunk["chunk_id"] == current["chunk_ids"][-1] + 1:
+                    current["text"] = merge_overlap(current["text"], chunk["text"])
+                    current["chunk_ids"].append(chunk["chunk_id"])
+                    if chunk.get("page") not in current["pages"]:
+                        current["pages"].append(chunk.get("page"))
+                    current["rank"] = min(current["rank"], chunk["rank"])
+                else:
+                    current = {"source": source, "pages": [chunk.get("page")], "chunk_ids": [chunk["chunk_id"]],
+                               "text": chunk["text"], "rank": chunk["rank"]}
+                    passages.append(current)
+        return sorted(passages, key=lambda passage: passage["rank"])
+
+    def render(self, passages: List[Dict]) -> str:
+        """Joins passages, labelling each with its source and page(s) when known."""
+        blocks = []
+        for passage in passages:
+            if passage["source"] is None:
+                blocks.append(passage["text"])
+                continue
+            pages = [str(page) for page in passage["pages"] if page is not None]
+            if len(pages) > 1:
+                label = f"{passage['source']}, pages {pages[0]}-{pages[-1]}"
+            elif pages:
+                label = f"{passage['source']}, page {pages[0]}"
+            else:
+                label = passage["source"]
+            blocks.append(f"[{label}]\n{passage['text']}")
+        return self.separator.join(blocks)
+
+    def pack(self, candidates: List[Dict], query_vectors=None) -> Dict:
+        """
+        Selects and renders the context for a prompt.
+
+        Args:
+            candidates: Retrieved chunks (see the class docstring), typically several per query.
+            query_vectors: Embeddings of the queries the chunks were retrieved for, or None to
+                rank by the candidates' 'relevance' scores.
+
+        Returns:
+            Dict with 'text' (the rendered context), 'passages', 'chunk_ids' (chunks used),
+            'tokens' (of 'text') and 'dropped' (candidates left out for relevance or budget).
+        """
+        ranked = self.rank(candidates, query_vectors)
+        selected, text = [], ""
+        for candidate in ranked:
+            trial = self.render(self._passages(selected + [candidate]))
+            if self.count_tokens(trial) <= self.max_tokens:
+                selected.append(candidate)
+                text = trial
+
+        if not selected and ranked:
+            # Not even the best chunk fits: send as much of it as the budget allows.
+            best = dict(ranked[0], text="")
+            room = self.max_tokens - self.count_tokens(self.render(self._passages([best]))) - 1
+            best["text"] = self.encoding.decode(self.encoding.encode(ranked[0]["text"])[:max(room, 0)])
+            selected, text = [best], self.render(self._passages([best]))
+
+        passages = self._passages(selected)
+        tokens = self.count_tokens(text)
+        logger.info(f"Packed {len(selected)} of {len(candidates)} chunk(s) into {len(passages)} passage(s), "
+                    f"{tokens}/{self.max_tokens} tokens")
+        return {
+            "text": text,
+            "passages": passages,
+            "chunk_ids": [chunk["chunk_id"] for chunk in selected],
+            "tokens": tokens,
+            "dropped": len(candidates) - len(selected),
+        }
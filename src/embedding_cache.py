@@ -0,0 +1,318 @@
+# FILE: src/embedding_cache.py
+# PURPOSE: Persistent embedding cache so repeated chunks are only sent to the embeddings API once.
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.step_cache import model_name
+
+logger = logging.getLogger(__name__)
+
+# Get project root for consistent output path management
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, "outputs", "cache", "embeddings")
+DEFAULT_QUERY_CACHE_DIR = os.path.join(PROJECT_ROOT, "outputs", "cache", "query_embeddings")
+DEFAULT_QUERY_LRU_SIZE = 4096
+
+# Embedding model name -> its QueryEmbeddingCache
+_query_caches = {}
+_query_caches_lock = threading.Lock()
+
+class FileLock:
+    """An exclusive lock on a file, shared between processes (fcntl on POSIX, msvcrt on Windows)."""
+    def __init__(self, path: str):
+        self.path = path
+        self._handle = None
+
+    def __enter__(self):
+        self._handle = open(self.path, "a+b")
+        if os.name == "nt":
+            import msvcrt
+            self._handle.seek(0)
+            msvcrt.locking(self._handle.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if os.name == "nt":
+            import msvcrt
+            self._handle.seek(0)
+            msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+        self._handle.close()
+        self._handle = None
+
+class EmbeddingStore:
+    """
+    An append-only on-disk vector store for one embedding model:
+
+        vectors.f32   raw float32 rows, read through np.memmap
+        index.tsv     "<sha256 of text>\\t<row>" lines, loaded into a dict
+        meta.json     the vector dimension
+
+    Several processes may append at once; writes happen under a file lock and each
+    process picks up rows written by others by reading the index from where it last stopped.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.index_path = os.path.join(directory, "index.tsv")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.lock_path = os.path.join(directory, ".lock")
+        os.makedirs(directory, exist_ok=True)
+
+        self.dim = None
+        self._rows: Dict[str, int] = {}
+        self._index_offset = 0
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Picks up rows appended by other processes."""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        """Reads index lines and metadata written since the last refresh."""
+        if self.dim is None and os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A writer is mid-line; pick it up on the next refresh.
+                    break
+                try:
+                    text_hash, row = line.decode("ascii").rstrip("\n").split("\t")
+                    self._rows[text_hash] = int(row)
+                except ValueError:
+                    # E.g. a torn line that an older version glued to the next one; that vector is simply re-embedded.
+                    logger.warning(f"Skipping malformed line in {self.index_path}: {line[:80]!r}")
+                self._index_offset += len(line)
+
+    def __contains__(self, text_hash: str) -> bool:
+        return text_hash in self._rows
+
+    def lookup(self, text_hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Returns the cached vectors for whichever of the hashes are present."""
+        with self._lock:
+            if any(text_hash not in self._rows for text_hash in text_hashes):
+                self._refresh()
+            found = {text_hash: self._rows[text_hash] for text_hash in text_hashes if text_hash in self._rows}
+        if not found:
+            return {}
+
+        row_count = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(row_count, self.dim))
+        try:
+            return {text_hash: np.array(matrix[row]) for text_hash, row in found.items()}
+        finally:
+            # Release the mapping straight away so other writers can extend the file (Windows).
+            del matrix
+
+    def append(self, text_hashes: List[str], vectors: List[List[float]]) -> None:
+        """Appends new vectors; hashes already stored (possibly by another process) are skipped."""
+        if not text_hashes:
+            return
+        array = np.asarray(vectors, dtype=np.float32)
+        with self._lock, FileLock(self.lock_path):
+            self._refresh()
+            if self.dim is None:
+                self.dim = int(array.shape[1])
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"dim": self.dim}, f)
+            elif array.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {array.shape[1]} does not match cached dimension {self.dim}")
+
+            new_rows = []
+            seen = set()
+            for i, text_hash in enumerate(text_hashes):
+                if text_hash not in self._rows and text_hash not in seen:
+                    seen.add(text_hash)
+                    new_rows.append(i)
+            if not new_rows:
+                return
+
+            size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+            first_row = size // (self.dim * 4)
+            if size != first_row * self.dim * 4:
+                # Drop a partially written row (an append killed mid-write) so the new rows stay aligned.
+                os.truncate(self.vectors_path, first_row * self.dim * 4)
+            if os.path.exists(self.index_path) and os.path.getsize(self.index_path) > self._index_offset:
+                # Under the lock no one is writing, so a line without its newline was torn: drop it
+                # (the refresh above read every complete line) rather than glue the new lines onto it.
+                os.truncate(self.index_path, self._index_offset)
+            # Vectors are written before the index so an index line never points at missing data.
+            with open(self.vectors_path, "ab") as f:
+                f.write(array[new_rows].tobytes())
+            lines = "".join(f"{text_hashes[i]}\t{first_row + n}\n" for n, i in enumerate(new_rows))
+            with open(self.index_path, "ab") as f:
+                f.write(lines.encode("ascii"))
+            self._refresh()
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings client and caches document vectors on disk by (model, sha256(text)).
+    Only chunks that have never been embedded with this model are sent to the API.
+    """
+    def __init__(self, client: Embeddings, cache_dir: str = DEFAULT_CACHE_DIR, model: str = None):
+        """
+        Initializes the wrapper.
+
+        Args:
+            client (Embeddings): The embeddings client that handles cache misses.
+            cache_dir (str): Parent directory of the per-model stores.
+            model (str, optional): Model name used to separate stores; read from the client if omitted.
+        """
+        self.client = client
+        self.model = model or model_name(client)
+        safe_model = re.sub(r"[^A-Za-z0-9_.-]", "_", self.model)
+        self.store = EmbeddingStore(os.path.join(cache_dir, safe_model))
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def uncached(self, texts: List[str]) -> List[str]:
+        """Returns the texts that would be sent to the API, e.g. for counting embedding tokens."""
+        self.store.refresh()
+        pending, seen = [], set()
+        for text in texts:
+            text_hash = self._hash(text)
+            if text_hash not in self.store and text_hash not in seen:
+                seen.add(text_hash)
+                pending.append(text)
+        return pending
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [self._hash(text) for text in texts]
+        cached = self.store.lookup(list(dict.fromkeys(hashes)))
+
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in cached:
+                missing.setdefault(text_hash, text)
+
+        self.hits += sum(1 for text_hash in hashes if text_hash not in missing)
+        self.misses += len(missing)
+        if missing:
+            logger.info(f"Embedding cache: {len(missing)} new chunk(s), {len(texts) - len(missing)} served from cache")
+            new_vectors = self.client.embed_documents(list(missing.values()))
+            self.store.append(list(missing.keys()), new_vectors)
+            cached.update({text_hash: np.asarray(vector, dtype=np.float32) for text_hash, vector in zip(missing.keys(), new_vectors)})
+
+        return [cached[text_hash].tolist() for text_hash in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.embed_query(text)
+
+def normalize_query(text: str) -> str:
+    """Canonical form of a retrieval query: Unicode-normalised, lower-cased, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+class QueryEmbeddingCache:
+    """
+    Embeddings of retrieval queries keyed by (model, normalised query text): an in-memory LRU
+    in front of an EmbeddingStore on disk, so skill strings such as "Python programming" that
+    recur across summaries are embedded once and then served without touching the API. The
+    normalised text is what gets embedded, so "Python " and "python" share one vector.
+    """
+    def __init__(self, client: Embeddings, cache_dir: str = DEFAULT_QUERY_CACHE_DIR, model: str = None,
+                 max_entries: int = DEFAULT_QUERY_LRU_SIZE):
+        """
+        Initializes the cache.
+
+        Args:
+            client (Embeddings): The embeddings client that handles misses. A CachedEmbeddings is
+                unwrapped, so queries do not also fill the document cache.
+            cache_dir (str): Parent directory of the per-model stores.
+            model (str, optional): Model name used to separate stores; read from the client if omitted.
+            max_entries (int): Vectors kept in memory.
+        """
+        self.client = client.client if isinstance(client, CachedEmbeddings) else client
+        self.model = model or model_name(client)
+        safe_model = re.sub(r"[^A-Za-z0-9_.-]", "_", self.model)
+        self.store = EmbeddingStore(os.path.join(cache_dir, safe_model))
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, text_hash: str, vector: np.ndarray) -> None:
+        self._memory[text_hash] = vector
+        self._memory.move_to_end(text_hash)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def embed_queries(self, queries: List[str], token_tracker=None) -> List[List[float]]:
+        """
+        Returns one vector per query, embedding only normalised queries never seen with this model.
+
+        Args:
+            queries (List[str]): The retrieval queries.
+            token_tracker: When given, the hits (queries answered from memory or disk) and misses
+                (distinct queries sent to the API) are added to it.
+        """
+        texts = [normalize_query(query) for query in queries]
+        hashes = [CachedEmbeddings._hash(text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for text_hash in hashes:
+                if text_hash in self._memory:
+                    self._memory.move_to_end(text_hash)
+                    vectors[text_hash] = self._memory[text_hash]
+
+        pending = [text_hash for text_hash in dict.fromkeys(hashes) if text_hash not in vectors]
+        if pending:
+            vectors.update(self.store.lookup(pending))
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in vectors:
+                missing.setdefault(text_hash, text)
+        if missing:
+            new_vectors = self.client.embed_documents(list(missing.values()))
+            self.store.append(list(missing.keys()), new_vectors)
+            vectors.update({text_hash: np.asarray(vector, dtype=np.float32) for text_hash, vector in zip(missing, new_vectors)})
+
+        hits = sum(1 for text_hash in hashes if text_hash not in missing)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(missing)
+            for text_hash in dict.fromkeys(hashes):
+                self._remember(text_hash, vectors[text_hash])
+        if token_tracker is not None:
+            token_tracker.record_query_embeddings(hits, len(missing))
+        logger.info(f"Query embeddings: {hits} cached, {len(missing)} embedded")
+        return [vectors[text_hash].tolist() for text_hash in hashes]
+
+def query_cache_for(client: Embeddings) -> QueryEmbeddingCache:
+    """
+    Returns the process-wide query cache for the model behind an embeddings client, so its LRU
+    survives across letters and across client objects. Keyed by model name, not client identity:
+    a client built per call still finds the warm cache, and one model never gets another's vectors.
+    """
+    model = model_name(client)
+    with _query_caches_lock:
+        if model not in _query_caches:
+            _query_caches[model] = QueryEmbeddingCache(client, model=model)
+        return _query_caches[model]
@@ -0,0 +1,145 @@
+# FILE: src/embedding_executor.py
+# PURPOSE: Token-bounded, concurrent embedding requests that back off when the API rate-limits us.
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import tiktoken
+from langchain_core.embeddings import Embeddings
+
+from src.embedding_cache import CachedEmbeddings
+from src.retry import backoff_delay, is_rate_limited, is_retryable
+from src.step_cache import model_name
+
+logger = logging.getLogger(__name__)
+
+class _AdaptiveLimit:
+    """
+    A concurrency limit that halves on rate-limit responses and grows by one after a
+    full window of successful requests (additive increase, multiplicative decrease).
+    """
+    def __init__(self, maximum: int):
+        self.maximum = maximum
+        self.limit = maximum
+        self.active = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self.active >= self.limit:
+                self._condition.wait()
+            self.active += 1
+
+    def release(self) -> None:
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+    def on_rate_limited(self) -> None:
+        with self._condition:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+
+class EmbeddingExecutor(Embeddings):
+    """
+    Wraps an embeddings client so that documents are packed into batches bounded by token
+    count and batch size, several batches are in flight at once, and 429/5xx responses are
+    retried with jittered exponential backoff while the allowed concurrency shrinks.
+    """
+    def __init__(self, client: Embeddings, max_batch_tokens: int = 8000, max_batch_size: int = 64,
+                 max_concurrency: int = 4, max_retries: int = 6, base_delay: float = 1.0, max_delay: float = 60.0):
+        """
+        Initializes the executor.
+
+        Args:
+            client (Embeddings): The underlying embeddings client.
+            max_batch_tokens (int): Upper bound on the tokens sent in one request.
+            max_batch_size (int): Upper bound on the texts sent in one request.
+            max_concurrency (int): Maximum number of requests in flight.
+            max_retries (int): Retries per batch for rate-limit and transient server errors.
+            base_delay (float): First backoff delay in seconds; doubles on every retry.
+            max_delay (float): Cap on a single backoff delay in seconds.
+        """
+        self.client = client
+        self.model = model_name(client)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.encoding = tiktoken.get_encoding("cl100k_base")
+        self._limit = _AdaptiveLimit(max_concurrency)
+
+    def _make_batches(self, texts: List[str]) -> List[List[int]]:
+        """Groups text indices into batches that respect the token and size limits."""
+        batches, current, current_tokens = [], [], 0
+        for i, text in enumerate(texts):
+            tokens = len(self.encoding.encode(text))
+            if current and (current_tokens + tokens > self.max_batch_tokens or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """Embeds one batch, retrying rate-limit and transient server errors."""
+        for attempt in range(self.max_retries + 1):
+            self._limit.acquire()
+            try:
+                vectors = self.client.embed_documents(batch)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                if is_rate_limited(e):
+                    self._limit.on_rate_limited()
+                delay = backoff_delay(e, attempt, self.base_delay, self.max_delay)
+                logger.warning(f"Embedding batch failed ({e}); retrying in {delay:.1f}s with concurrency {self._limit.limit}")
+            else:
+                self._limit.on_success()
+                return vectors
+            finally:
+                self._limit.release()
+            time.sleep(delay)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        batches = self._make_batches(texts)
+        start = time.perf_counter()
+
+        results: List[List[float]] = [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+            futures = {executor.submit(self._embed_batch, [texts[i] for i in batch]): batch for batch in batches}
+            for future, batch in futures.items():
+                for i, vector in zip(batch, future.result()):
+                    results[i] = vector
+
+        logger.info(f"Embedded {len(texts)} text(s) in {len(batches)} batch(es) in {time.perf_counter() - start:.2f}s")
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.embed_query(text)
+
+def build_embedding_client(client: Embeddings, use_cache: bool = True) -> Embeddings:
+    """
+    Returns the embeddings client used for document chunks: disk cache in front of the batched
+    executor, or the executor alone when use_cache is False so every chunk is re-embedded.
+    """
+    executor = EmbeddingExecutor(client)
+    return CachedEmbeddings(executor) if use_cache else executor
@@ -0,0 +1,64 @@
+# FILE: src/http_cache.py
+# PURPOSE: On-disk store of fetched pages and their validators, so repeat fetches become conditional GETs.
+
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import diskcache
+
+logger = logging.getLogger(__name__)
+
+# Get project root for consistent output path management
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, "outputs", "cache", "http")
+DEFAULT_SIZE_LIMIT = 256 * 1024 * 1024  # bytes
+
+class HttpCache:
+    """
+    Stores the last successful response body for each URL together with its ETag and
+    Last-Modified headers. Callers send those back as If-None-Match / If-Modified-Since and
+    reuse the stored body when the server answers 304 Not Modified. Backed by diskcache, so
+    it is safe to share between threads and processes.
+    """
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, size_limit: int = DEFAULT_SIZE_LIMIT):
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir (str): Directory holding the cache database.
+            size_limit (int): Maximum cache size in bytes before old entries are evicted.
+        """
+        self._cache = diskcache.Cache(cache_dir, size_limit=size_limit, eviction_policy="least-recently-stored")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Returns the stored entry ({'body', 'etag', 'last_modified', 'fetched_at'}) for a URL, or None."""
+        return self._cache.get(url)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Returns the request headers that let the server answer 304 for an unchanged page."""
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, body: str, etag: str = None, last_modified: str = None) -> None:
+        """Stores a 200 response."""
+        self._cache.set(url, {"body": body, "etag": etag, "last_modified": last_modified, "fetched_at": time.time()})
+
+    def touch(self, url: str) -> Optional[str]:
+        """Records a 304 response and returns the stored body."""
+        entry = self.get(url)
+        if entry is None:
+            return None
+        entry["fetched_at"] = time.time()
+        self._cache.set(url, entry)
+        return entry["body"]
+
+    def close(self) -> None:
+        self._cache.close()
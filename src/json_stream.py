@@ -0,0 +1,123 @@
+# FILE: src/json_stream.py
+# PURPOSE: Incremental JSON parser that reports selected fields of a streamed object as soon as each one is complete.
+
+import json
+import logging
+from typing import Callable, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = " \t\r\n"
+
+class IncrementalJsonParser:
+    """
+    Consumes a JSON object piece by piece (e.g. the deltas of a streamed LLM completion) and
+    calls `on_value(path, value)` the moment the value of a watched field is closed, without
+    waiting for the rest of the document. Paths are dotted object keys such as
+    "position_details.required_skills". Text before the first '{' (a ```json fence, say) and
+    after the top-level object is ignored.
+    """
+    def __init__(self, paths: Iterable[str], on_value: Callable[[str, object], None]):
+        """
+        Initializes the parser.
+
+        Args:
+            paths: Dotted paths of the fields to report.
+            on_value: Called with (path, decoded value) once per watched field.
+        """
+        self.paths = set(paths)
+        self.on_value = on_value
+        self._buffer: List[str] = []
+        # One frame per open container: [kind, key, state]; kind is "object" or "array".
+        self._stack: List[list] = []
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._in_literal = False
+        # Start offsets of the values currently being read, innermost last: (path, offset, depth).
+        self._values: List[tuple] = []
+
+    def _path(self) -> str:
+        return ".".join(frame[1] if frame[0] == "object" else "[]" for frame in self._stack)
+
+    def _begin_value(self, offset: int) -> None:
+        self._values.append((self._path(), offset, len(self._stack)))
+
+    def _end_value(self, end: int) -> None:
+        path, start, _ = self._values.pop()
+        if path in self.paths:
+            try:
+                value = json.loads("".join(self._buffer[start:end + 1]))
+            except json.JSONDecodeError as e:
+                logger.debug(f"Could not decode streamed field {path}: {e}")
+            else:
+                self.on_value(path, value)
+        if self._stack:
+            self._stack[-1][2] = "comma"
+
+    def _expects_value(self) -> bool:
+        return bool(self._stack) and self._stack[-1][2] == "value"
+
+    def feed(self, text: str) -> None:
+        """Consumes the next piece of the document."""
+        for char in text:
+            if self._done:
+                return
+            self._buffer.append(char)
+            offset = len(self._buffer) - 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._close_string(offset)
+                continue
+
+            if self._in_literal:
+                if char not in _WHITESPACE and char not in ",]}":
+                    continue
+                self._in_literal = False
+                self._end_value(offset - 1)
+
+            if not self._stack:
+                if char == "{":
+                    self._stack.append(["object", None, "key"])
+                continue
+            if char in _WHITESPACE:
+                continue
+
+            frame = self._stack[-1]
+            if frame[2] == "key" and char == '"':
+                self._in_string, self._string_start = True, offset
+            elif frame[2] == "colon" and char == ":":
+                frame[2] = "value"
+            elif char == ",":
+                frame[2] = "key" if frame[0] == "object" else "value"
+            elif char in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    self._done = True
+                elif self._values and self._values[-1][2] == len(self._stack):
+                    self._end_value(offset)
+            elif self._expects_value():
+                self._begin_value(offset)
+                if char == '"':
+                    self._in_string, self._string_start = True, offset
+                elif char == "{":
+                    self._stack.append(["object", None, "key"])
+                elif char == "[":
+                    self._stack.append(["array", None, "value"])
+                else:
+                    self._in_literal = True
+
+    def _close_string(self, end: int) -> None:
+        frame = self._stack[-1]
+        if frame[2] == "key":
+            frame[1] = json.loads("".join(self._buffer[self._string_start:end + 1]))
+            frame[2] = "colon"
+        else:
+            self._end_value(end)
@@ -0,0 +1,305 @@
+# FILE: src/llm_gateway.py
+# PURPOSE: Single entry point for chat completions: response cache, retries, pooled connections and per-call metrics.
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import diskcache
+import httpx
+
+from src.retry import backoff_delay, is_retryable, status_code
+from src.step_cache import hash_text
+
+logger = logging.getLogger(__name__)
+
+# Get project root for consistent output path management
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, "outputs", "cache", "llm")
+DEFAULT_CACHE_SIZE_LIMIT = 256 * 1024 * 1024  # bytes
+DEFAULT_CACHE_MAX_AGE = 30 * 24 * 3600  # seconds
+DEFAULT_LLM_MODEL = "DevGPT4o"
+# Responses are only reused for (near-)deterministic calls; creative calls must vary.
+CACHEABLE_MAX_TEMPERATURE = 0.2
+# Per-call metrics kept in memory; older ones are dropped (every call is still logged).
+METRICS_HISTORY = 1000
+
+_http_client = None
+_gateways = {}
+_http_client_lock = threading.Lock()
+_gateways_lock = threading.Lock()
+
+def shared_http_client(timeout: float = 60.0) -> httpx.Client:
+    """Returns the process-wide pooled HTTP client, so every step reuses the same keep-alive connections."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+                timeout=httpx.Timeout(timeout, connect=10.0)
+            )
+        return _http_client
+
+def _rejects_response_format(error: Exception) -> bool:
+    """True for a 400 that names response_format (JSON mode unsupported), not e.g. a context-length or content-filter 400."""
+    return status_code(error) == 400 and "response_format" in str(error)
+
+def _rejects_stream_options(error: Exception) -> bool:
+    """True for a 400 that names stream_options (usage chunks unsupported by the deployment or API version)."""
+    return status_code(error) == 400 and "stream_options" in str(error)
+
+class LLMResponseCache:
+    """
+    Disk-backed cache of chat completion responses keyed by a hash of the model, messages and
+    request parameters. Backed by diskcache, so step subprocesses running in parallel share it.
+    """
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, size_limit: int = DEFAULT_CACHE_SIZE_LIMIT, max_age: int = DEFAULT_CACHE_MAX_AGE):
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir (str): Directory holding the cache database.
+            size_limit (int): Maximum cache size in bytes before old entries are evicted.
+            max_age (int): Seconds after which an entry expires.
+        """
+        self.max_age = max_age
+        self._cache = diskcache.Cache(cache_dir, size_limit=size_limit, eviction_policy="least-recently-stored")
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], **params) -> str:
+        """Builds the cache key of a request."""
+        payload = json.dumps({"model": model, "messages": messages, **params}, sort_keys=True, ensure_ascii=False)
+        return f"llm:{hash_text(payload)}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Dict) -> None:
+        self._cache.set(key, value, expire=self.max_age)
+
+class LLMGateway:
+    """
+    Wraps an OpenAI-compatible client so that every step calls the LLM the same way:
+    low-temperature requests are answered from a response cache when the exact same request
+    was made before, 429/5xx and connection errors are retried with jittered exponential
+    backoff, requests go through one pooled HTTP client, and each call's latency and token
+    usage are logged and recorded.
+    """
+    def __init__(self, client, response_cache: Optional[LLMResponseCache] = None, timeout: float = 60.0,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 30.0):
+        """
+        Initializes the gateway.
+
+        Args:
+            client: The OpenAI/AzureOpenAI client.
+            response_cache: Where low-temperature responses are kept. None disables caching.
+            timeout (float): Seconds allowed for one request.
+            max_retries (int): Retries per call for rate-limit and transient errors.
+            base_delay (float): First backoff delay in seconds; doubles on every retry.
+            max_delay (float): Cap on a single backoff delay in seconds.
+        """
+        self.client = self._pooled(client, timeout)
+        self.response_cache = response_cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Cleared when the deployment rejects response_format (e.g. an older API version).
+        self.supports_response_format = True
+        # Cleared when the deployment rejects stream_options; streams then end without a usage chunk.
+        self.supports_stream_usage = True
+        self.metrics = deque(maxlen=METRICS_HISTORY)
+        self._metrics_lock = threading.Lock()
+
+    @staticmethod
+    def _pooled(client, timeout: float):
+        """Rebinds the client to the shared HTTP pool; retries are done here, so the SDK's own are disabled."""
+        if not hasattr(client, "with_options"):
+            return client
+        try:
+            return client.with_options(http_client=shared_http_client(timeout), max_retries=0)
+        except Exception as e:
+            logger.warning(f"Could not attach the pooled HTTP client ({e}); using the client's own")
+            return client
+
+    def _record(self, metric: Dict, token_tracker=None) -> None:
+        with self._metrics_lock:
+            self.metrics.append(metric)
+        if token_tracker is not None:
+            token_tracker.record_llm_call(metric["latency_seconds"], metric["cached"])
+        source = "cache" if metric["cached"] else f"{metric['attempts']} attempt(s)"
+        first_token = f", first token after {metric['time_to_first_token']:.2f}s" if metric.get("time_to_first_token") else ""
+        logger.info(f"LLM call [{metric['label']}] {metric['latency_seconds']:.2f}s via {source}{first_token}, "
+                    f"{metric['prompt_tokens']} prompt + {metric['completion_tokens']} completion tokens")
+
+    def complete(self, messages: List[Dict], model: str = DEFAULT_LLM_MODEL, temperature: float = 0.1,
+                 max_tokens: int = 1000, token_tracker=None, label: str = "llm", **params) -> Dict:
+        """
+        Runs one chat completion.
+
+        Args:
+            messages: The chat messages.
+            model: The model (deployment) name.
+            temperature: Sampling temperature; calls at or below CACHEABLE_MAX_TEMPERATURE are cached.
+            max_tokens: Completion token limit.
+            token_tracker: When given, live calls add their usage and every call is counted.
+            label: Name of the call site, used in logs and metrics.
+            **params: Further request parameters; part of the cache key. A response_format
+                (JSON mode) is dropped if the deployment does not support it.
+
+        Returns:
+            Dict with 'content' (stripped text), 'finish_reason', 'usage' ({'prompt_tokens',
+            'completion_tokens'}), 'cached' and 'latency_seconds'.
+        """
+        start = time.perf_counter()
+        cache_key, cached = self._cache_lookup(model, messages, temperature, max_tokens, params)
+        if cached is not None:
+            return self._cache_hit(cached, start, label, model, token_tracker)
+
+        response, attempts = self._create(label, model=model, messages=messages, temperature=temperature,
+                                          max_tokens=max_tokens, **params)
+        if response.usage and token_tracker is not None:
+            token_tracker.add_completion_usage(response.usage)
+        choice = response.choices[0]
+        result = {
+            "content": (choice.message.content or "").strip(),
+            "finish_reason": getattr(choice, "finish_reason", None),
+            "usage": {
+                "prompt_tokens": response.usage.prompt_tokens if response.usage else 0,
+                "completion_tokens": response.usage.completion_tokens if response.usage else 0,
+            },
+        }
+        return self._finish(result, cache_key, start, label, model, attempts, token_tracker)
+
+    def stream(self, messages: List[Dict], on_delta: Callable[[str], None], model: str = DEFAULT_LLM_MODEL,
+               temperature: float = 0.1, max_tokens: int = 1000, token_tracker=None, label: str = "llm", **params) -> Dict:
+        """
+        Runs one chat completion as a token stream, passing each piece of text to `on_delta` as
+        it arrives. Usage is taken from the stream's final usage chunk. A cached response is
+        delivered to `on_delta` in one piece.
+
+        Args:
+            messages: The chat messages.
+            on_delta: Called with every new piece of completion text.
+            model, temperature, max_tokens, token_tracker, label, **params: As for complete().
+
+        Returns:
+            The same dict as complete(), plus 'time_to_first_token' in seconds (None if no text arrived).
+        """
+        start = time.perf_counter()
+        cache_key, cached = self._cache_lookup(model, messages, temperature, max_tokens, params)
+        if cached is not None:
+            on_delta(cached["content"])
+            result = self._cache_hit(cached, start, label, model, token_tracker)
+            result["time_to_first_token"] = result["latency_seconds"]
+            return result
+
+        # Only opening the stream is retried; text already handed to on_delta cannot be taken back.
+        stream, attempts = self._create(label, model=model, messages=messages, temperature=temperature, max_tokens=max_tokens,
+                                        stream=True, stream_options={"include_usage": True}, **params)
+        parts, finish_reason, usage, first_token_at = [], None, None, None
+        for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            for choice in chunk.choices or []:
+                text = getattr(choice.delta, "content", None)
+                if text:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter() - start
+                    parts.append(text)
+                    on_delta(text)
+                finish_reason = getattr(choice, "finish_reason", None) or finish_reason
+
+        if usage is None and self.supports_stream_usage:
+            logger.warning(f"LLM stream [{label}] ended without a usage chunk; its tokens are not counted")
+        elif token_tracker is not None:
+            token_tracker.add_completion_usage(usage)
+        result = {
+            "content": "".join(parts).strip(),
+            "finish_reason": finish_reason,
+            "usage": {
+                "prompt_tokens": usage.prompt_tokens if usage else 0,
+                "completion_tokens": usage.completion_tokens if usage else 0,
+            },
+        }
+        result = self._finish(result, cache_key, start, label, model, attempts, token_tracker, time_to_first_token=first_token_at)
+        result["time_to_first_token"] = first_token_at
+        return result
+
+    def _cache_lookup(self, model: str, messages: List[Dict], temperature: float, max_tokens: int, params: Dict):
+        """Returns (cache key or None, cached result or None) for a request."""
+        if self.response_cache is None or temperature > CACHEABLE_MAX_TEMPERATURE:
+            return None, None
+        cache_key = self.response_cache.make_key(model, messages, temperature=temperature, max_tokens=max_tokens, **params)
+        return cache_key, self.response_cache.get(cache_key)
+
+    def _cache_hit(self, cached: Dict, start: float, label: str, model: str, token_tracker) -> Dict:
+        result = dict(cached, cached=True, latency_seconds=time.perf_counter() - start)
+        self._record({"label": label, "model": model, "cached": True, "attempts": 0,
+                      "latency_seconds": result["latency_seconds"], "prompt_tokens": 0, "completion_tokens": 0}, token_tracker)
+        return result
+
+    def _create(self, label: str, **request):
+        """
+        Sends a request, retrying rate-limit and transient errors. Returns (response, attempts).
+        A response_format or stream_options the deployment rejects is dropped, here and in later
+        calls; that one plain resend does not use up a retry.
+        """
+        if not self.supports_response_format:
+            request.pop("response_format", None)
+        if not self.supports_stream_usage:
+            request.pop("stream_options", None)
+        attempt, sends = 0, 0
+        while True:
+            sends += 1
+            try:
+                return self.client.chat.completions.create(timeout=self.timeout, **request), sends
+            except Exception as e:
+                if "response_format" in request and _rejects_response_format(e):
+                    logger.warning(f"response_format was rejected ({e}); sending plain completions from now on")
+                    self.supports_response_format = False
+                    request.pop("response_format")
+                    continue
+                if "stream_options" in request and _rejects_stream_options(e):
+                    logger.warning(f"stream_options was rejected ({e}); streams are sent without usage chunks "
+                                   f"from now on and their tokens are not counted")
+                    self.supports_stream_usage = False
+                    request.pop("stream_options")
+                    continue
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = backoff_delay(e, attempt, self.base_delay, self.max_delay)
+                logger.warning(f"LLM call [{label}] failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def _finish(self, result: Dict, cache_key: Optional[str], start: float, label: str, model: str, attempts: int,
+                token_tracker, **extra_metrics) -> Dict:
+        """Caches a live result (unless truncated) and records its metrics."""
+        if cache_key and result["finish_reason"] != "length":
+            self.response_cache.set(cache_key, result)
+        result.update(cached=False, latency_seconds=time.perf_counter() - start)
+        self._record({"label": label, "model": model, "cached": False, "attempts": attempts,
+                      "latency_seconds": result["latency_seconds"], **result["usage"], **extra_metrics}, token_tracker)
+        return result
+
+def get_gateway(client, cache_responses: bool = True) -> LLMGateway:
+    """
+    Returns the process-wide gateway for a client (creating it on first use). A gateway passed
+    in is returned unchanged, so components accept either a raw client or a gateway.
+
+    Args:
+        client: An OpenAI-compatible client or an LLMGateway.
+        cache_responses (bool): Whether low-temperature responses are cached (False for --no-cache runs).
+    """
+    if isinstance(client, LLMGateway):
+        return client
+    key = (id(client), cache_responses)
+    with _gateways_lock:
+        if key not in _gateways:
+            _gateways[key] = LLMGateway(client, response_cache=LLMResponseCache() if cache_responses else None)
+        return _gateways[key]
@@ -0,0 +1,169 @@
+# FILE: src/pdf_extractor.py
+# PURPOSE: Shared PDF text extraction: cached per (file sha256, extractor version), parallel for long documents, streamed page by page.
+
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, List
+
+import fitz  # PyMuPDF
+
+from src.step_cache import hash_file
+
+logger = logging.getLogger(__name__)
+
+# Get project root for consistent output path management
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, "outputs", "cache", "pdf_text")
+# Bump the suffix whenever the extracted text would change, so stale cache entries are ignored.
+EXTRACTOR_VERSION = f"pymupdf-{fitz.VersionBind}-1"
+# Documents with fewer pages are extracted in-process; starting workers would cost more than it saves.
+PARALLEL_MIN_PAGES = 64
+PAGES_PER_TASK = 16
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Returns the process-wide extraction pool, started on first use so that later documents (the
+    next applicant in a batch, say) do not pay for starting workers again.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: the pipeline runs steps on threads, and forking a threaded process can deadlock.
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def _discard_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def _extract_pages(path: str, start: int, end: int) -> List[str]:
+    """Extracts pages [start, end) of a PDF. Module-level so worker processes can run it."""
+    with fitz.open(path) as doc:
+        return [doc[page_number].get_text() for page_number in range(start, end)]
+
+def split_stream(pages: Iterable[str], splitter, window: int) -> Iterator[str]:
+    """
+    Chunks a stream of page texts as if they were one string, holding only about `window`
+    characters at a time: each time the buffer reaches the window it is split, every chunk but
+    the last is emitted, and the last (possibly cut short) chunk is carried over to the next pages.
+
+    Args:
+        pages: Page texts in document order.
+        splitter: A LangChain text splitter.
+        window: Characters to buffer before splitting; a few chunk sizes is plenty.
+    """
+    buffer = ""
+    for page in pages:
+        buffer += page
+        if len(buffer) >= window:
+            chunks = splitter.split_text(buffer)
+            yield from chunks[:-1]
+            buffer = chunks[-1] if chunks else ""
+    if buffer:
+        yield from splitter.split_text(buffer)
+
+class PDFTextExtractor:
+    """
+    Extracts the text of PDFs page by page. The pages of every extracted file are kept in
+    `cache_dir` as JSON lines named after the file's sha256 and EXTRACTOR_VERSION, so a PDF
+    that was seen before (the same position packet for every applicant, say) is read back
+    instead of parsed. Long documents are split into page ranges extracted on a process pool.
+    Pages are yielded as they become available, in order, so callers never hold the whole text.
+    """
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, workers: int = None,
+                 parallel_min_pages: int = PARALLEL_MIN_PAGES, pages_per_task: int = PAGES_PER_TASK):
+        """
+        Initializes the extractor.
+
+        Args:
+            cache_dir (str): Where extracted pages are cached. None disables the cache.
+            workers (int, optional): Worker processes for long documents (default: CPU count, at most 8).
+                The pool is shared by the process, so the first extractor to use it sets its size.
+            parallel_min_pages (int): Page count from which extraction runs on the process pool.
+            pages_per_task (int): Pages extracted per worker task.
+        """
+        self.cache_dir = cache_dir
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.parallel_min_pages = parallel_min_pages
+        self.pages_per_task = pages_per_task
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_path(self, sha256: str) -> str:
+        return os.path.join(self.cache_dir, sha256[:2], f"{sha256}-{EXTRACTOR_VERSION}.jsonl")
+
+    def iter_pages(self, path: str) -> Iterator[str]:
+        """
+        Yields the text of every page of a PDF, in order.
+
+        Args:
+            path (str): The PDF file.
+
+        Yields:
+            str: One page's text.
+        """
+        if not self.cache_dir:
+            yield from self._extract(path)
+            return
+
+        cache_path = self.cache_path(hash_file(path))
+        if os.path.exists(cache_path):
+            logger.info(f"PDF text of {os.path.basename(path)} served from cache")
+            with open(cache_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+            return
+
+        # Pages are written as they are yielded; the file only replaces the cache entry once complete.
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        complete = False
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for text in self._extract(path):
+                    f.write(json.dumps(text, ensure_ascii=False) + "\n")
+                    yield text
+            os.replace(tmp_path, cache_path)
+            complete = True
+        finally:
+            if not complete and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _extract(self, path: str) -> Iterator[str]:
+        with fitz.open(path) as doc:
+            page_count = doc.page_count
+            if page_count < self.parallel_min_pages or self.workers < 2:
+                for page in doc:
+                    yield page.get_text()
+                return
+
+        ranges = [(start, min(start + self.pages_per_task, page_count)) for start in range(0, page_count, self.pages_per_task)]
+        logger.info(f"Extracting {page_count} pages of {os.path.basename(path)} in {len(ranges)} parallel tasks")
+        done = 0
+        futures = []
+        try:
+            executor = _process_pool(self.workers)
+            futures = [executor.submit(_extract_pages, path, start, end) for start, end in ranges]
+            for future in futures:
+                for text in future.result():
+                    done += 1
+                    yield text
+        except (OSError, BrokenProcessPool) as e:
+            logger.warning(f"Parallel extraction failed ({e}); extracting the remaining pages in-process")
+            _discard_pool()
+            yield from _extract_pages(path, done, page_count)
+        finally:
+            # A caller that stops reading early leaves no queued work behind.
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,41 @@
+# FILE: src/retry.py
+# PURPOSE: Shared classification of API errors and jittered backoff for the embedding and LLM clients.
+
+import random
+
+# Errors without an HTTP status that are still worth retrying (connection drops, timeouts, throttling).
+RETRYABLE_ERROR_NAMES = ("RateLimitError", "APIConnectionError", "APITimeoutError", "Timeout", "ConnectionError")
+
+def status_code(error: Exception):
+    """Returns the HTTP status carried by an API error, or None."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+def retry_after(error: Exception):
+    """Returns the server's Retry-After hint in seconds, if it sent one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for 429 responses."""
+    return status_code(error) == 429 or type(error).__name__ == "RateLimitError"
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate limits, 5xx responses, timeouts and connection failures."""
+    status = status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+def backoff_delay(error: Exception, attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based): the server's Retry-After hint or
+    exponential backoff capped at max_delay, randomised by +/-50% so clients do not retry in lockstep.
+    """
+    delay = retry_after(error) or min(max_delay, base_delay * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.5)
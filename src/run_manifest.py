@@ -0,0 +1,110 @@
+# FILE: src/run_manifest.py
+# PURPOSE: Run-scoped record of the artifacts each pipeline step produced.
+
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+# Get project root for consistent output path management
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RUNS_DIR = os.path.join(PROJECT_ROOT, "outputs", "runs")
+
+def new_run_id() -> str:
+    """Returns a sortable, collision-resistant run id such as '20250101_120000_1a2b3c4d'."""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+def hash_path(path: str) -> str:
+    """Returns the sha256 of a file, or of every file (name and bytes) in a directory."""
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+                _update_from_file(digest, file_path)
+    else:
+        _update_from_file(digest, path)
+    return digest.hexdigest()
+
+def _update_from_file(digest, file_path: str) -> None:
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+
+class RunManifest:
+    """
+    Stores one small JSON file per step under outputs/runs/<run_id>/ listing the artifacts
+    the step wrote (path, sha256, size) and how long it took. Steps that run concurrently
+    write separate files, and readers look artifacts up by run id instead of scanning outputs/.
+    """
+    def __init__(self, run_id: Optional[str] = None, runs_dir: str = RUNS_DIR):
+        """
+        Initializes the manifest.
+
+        Args:
+            run_id (str, optional): The run to read or write. A new id is generated when omitted.
+            runs_dir (str): Parent directory of all run manifests.
+        """
+        self.run_id = run_id or new_run_id()
+        self.run_dir = os.path.join(runs_dir, self.run_id)
+
+    def _step_path(self, step: str) -> str:
+        return os.path.join(self.run_dir, f"{step}.json")
+
+    def record_step(self, step: str, artifacts: Dict[str, str], duration_seconds: float, **details) -> str:
+        """
+        Writes the manifest entry for one step.
+
+        Args:
+            step (str): The step key, e.g. "step3".
+            artifacts (Dict[str, str]): Artifact name -> path. Missing paths are skipped.
+            duration_seconds (float): Wall time the step took.
+            **details: Extra JSON-serialisable fields to store with the entry.
+
+        Returns:
+            str: The path of the written manifest file.
+        """
+        entry = {
+            "run_id": self.run_id,
+            "step": step,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "duration_seconds": round(duration_seconds, 3),
+            "artifacts": {},
+            **details,
+        }
+        for name, path in artifacts.items():
+            if path and os.path.exists(path):
+                entry["artifacts"][name] = {
+                    "path": os.path.abspath(path),
+                    "sha256": hash_path(path),
+                    "bytes": os.path.getsize(path) if os.path.isfile(path) else None,
+                }
+
+        os.makedirs(self.run_dir, exist_ok=True)
+        manifest_path = self._step_path(step)
+        # Write to a temporary file first so readers never see a half-written manifest.
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+        return manifest_path
+
+    def read_step(self, step: str) -> Optional[Dict]:
+        """Returns the manifest entry for a step, or None if the step has not recorded one."""
+        try:
+            with open(self._step_path(step), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def artifact_path(self, step: str, name: str) -> Optional[str]:
+        """Returns the path of a named artifact written by a step in this run."""
+        entry = self.read_step(step)
+        if not entry:
+            return None
+        artifact = entry["artifacts"].get(name)
+        return artifact["path"] if artifact else None
@@ -0,0 +1,85 @@
+# FILE: src/step_cache.py
+# PURPOSE: Content-addressed on-disk cache that lets steps skip work when their inputs are unchanged.
+
+import hashlib
+import json
+import logging
+import os
+
+import diskcache
+
+logger = logging.getLogger(__name__)
+
+# Get project root for consistent output path management
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, "outputs", "cache", "steps")
+DEFAULT_SIZE_LIMIT = 512 * 1024 * 1024  # bytes; least recently stored entries are evicted first
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # seconds; entries older than this are treated as missing
+
+def hash_bytes(data: bytes) -> str:
+    """Returns the sha256 hex digest of raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+def hash_text(text: str) -> str:
+    """Returns the sha256 hex digest of a string."""
+    return hash_bytes(text.encode("utf-8"))
+
+def hash_file(path: str) -> str:
+    """Returns the sha256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def model_name(client) -> str:
+    """Best-effort name of the model behind an embeddings or LLM client, used in cache keys."""
+    for attribute in ("deployment", "model", "model_name"):
+        value = getattr(client, attribute, None)
+        if isinstance(value, str) and value:
+            return value
+    return type(client).__name__
+
+class StepCache:
+    """
+    A disk-backed cache keyed by hashes of a step's inputs, prompt template and model name.
+    Backed by diskcache, so it is safe to share between threads and between the step
+    subprocesses the orchestrator launches in parallel.
+    """
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, size_limit: int = DEFAULT_SIZE_LIMIT, max_age: int = DEFAULT_MAX_AGE):
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir (str): Directory holding the cache database.
+            size_limit (int): Maximum cache size in bytes before old entries are evicted.
+            max_age (int): Seconds after which an entry expires.
+        """
+        self.max_age = max_age
+        self._cache = diskcache.Cache(cache_dir, size_limit=size_limit, eviction_policy="least-recently-stored")
+
+    @staticmethod
+    def make_key(step: str, **parts) -> str:
+        """
+        Builds a cache key from a step name and the hashes/values that determine its result.
+
+        Args:
+            step (str): The step the entry belongs to, e.g. "step2".
+            **parts: JSON-serialisable values such as input hashes, prompt hashes and model names.
+        """
+        payload = json.dumps({"step": step, **parts}, sort_keys=True, ensure_ascii=False)
+        return f"{step}:{hash_text(payload)}"
+
+    def get(self, key: str):
+        """Returns the cached value for a key, or None on a miss."""
+        value = self._cache.get(key)
+        if value is not None:
+            logger.info(f"Step cache hit for {key.split(':')[0]}")
+        return value
+
+    def set(self, key: str, value) -> None:
+        """Stores a value under a key with the configured expiry."""
+        self._cache.set(key, value, expire=self.max_age)
+
+    def close(self) -> None:
+        self._cache.close()
@@ -0,0 +1,124 @@
+# FILE: src/step_graph.py
+# PURPOSE: A small dependency-graph executor that runs independent pipeline steps concurrently.
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class PipelineStep:
+    """A single step in the pipeline graph, described by the values it consumes and produces."""
+    def __init__(self, name: str, func: Callable[..., Optional[Dict]], inputs: Iterable[str] = (), outputs: Iterable[str] = ()):
+        """
+        Initializes the step.
+
+        Args:
+            name (str): A human readable step name used in logs.
+            func (Callable): Called with the declared inputs as keyword arguments. Must return a
+                dictionary containing every declared output, or None to signal failure.
+            inputs (Iterable[str]): Names of the context values the step needs.
+            outputs (Iterable[str]): Names of the context values the step produces.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+class StepGraph:
+    """
+    Executes PipelineSteps in dependency order, running every step whose inputs are
+    available at the same time on a thread pool.
+    """
+    def __init__(self, steps: List[PipelineStep], max_workers: Optional[int] = None):
+        """
+        Initializes the graph and validates that no two steps produce the same output.
+
+        Args:
+            steps (List[PipelineStep]): The steps making up the pipeline.
+            max_workers (int, optional): Upper bound on concurrently running steps.
+        """
+        self.steps = list(steps)
+        self.max_workers = max_workers or max(1, len(self.steps))
+
+        self.producers = {}
+        for step in self.steps:
+            for output in step.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Output '{output}' is produced by both '{self.producers[output]}' and '{step.name}'")
+                self.producers[output] = step.name
+
+    def _validate(self, context: Dict) -> None:
+        """Checks that every input is either provided up front or produced by a step."""
+        for step in self.steps:
+            missing = [name for name in step.inputs if name not in context and name not in self.producers]
+            if missing:
+                raise ValueError(f"Step '{step.name}' depends on unknown inputs: {', '.join(missing)}")
+
+    def run(self, context: Dict) -> Dict:
+        """
+        Runs the graph to completion, or until a step fails.
+
+        Args:
+            context (Dict): Initial values available to the steps (e.g. CLI arguments).
+
+        Returns:
+            Dict: A dictionary with 'success', the final 'context', the 'failed_step' name
+            (if any) and per-step 'timings' in seconds.
+        """
+        self._validate(context)
+        context = dict(context)
+        pending = list(self.steps)
+        running = {}
+        timings = {}
+        failed_step = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                if failed_step is None:
+                    ready = [step for step in pending if all(name in context for name in step.inputs)]
+                    for step in ready:
+                        pending.remove(step)
+                        kwargs = {name: context[name] for name in step.inputs}
+                        logger.info(f"Scheduling step '{step.name}'")
+                        running[executor.submit(self._run_step, step, kwargs)] = step
+
+                if not running:
+                    if pending and failed_step is None:
+                        names = ', '.join(step.name for step in pending)
+                        raise RuntimeError(f"Step graph is stuck; unresolved dependencies for: {names}")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    outputs, elapsed = future.result()
+                    timings[step.name] = elapsed
+
+                    missing = [name for name in step.outputs if outputs is None or name not in outputs]
+                    if outputs is None or missing:
+                        logger.error(f"Step '{step.name}' failed after {elapsed:.2f}s")
+                        failed_step = failed_step or step.name
+                        continue
+
+                    logger.info(f"Step '{step.name}' finished in {elapsed:.2f}s")
+                    context.update({name: outputs[name] for name in step.outputs})
+
+        return {
+            'success': failed_step is None,
+            'context': context,
+            'failed_step': failed_step,
+            'timings': timings,
+        }
+
+    @staticmethod
+    def _run_step(step: PipelineStep, kwargs: Dict):
+        """Executes one step, converting exceptions into a failed result."""
+        start = time.perf_counter()
+        try:
+            outputs = step.func(**kwargs)
+        except Exception as e:
+            logger.error(f"Step '{step.name}' raised an exception: {e}")
+            outputs = None
+        return outputs, time.perf_counter() - start
@@ -0,0 +1,141 @@
+# FILE: src/summary_schema.py
+# PURPOSE: Typed schema of the Step 4 professional summary, with field-level validation and repair.
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+class SupervisorProfile(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    name: str
+    university: str
+    primary_research_themes: List[str]
+
+class PositionDetails(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    project_title: str
+    project_summary: str
+    required_skills: List[str]
+    preferred_experience: List[str]
+
+class AlignmentSummary(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    key_talking_points: List[str]
+    suggested_questions_for_supervisor: List[str]
+
+class ProfessionalSummary(BaseModel):
+    """The structured summary Step 4 produces and Step 5 consumes."""
+    model_config = ConfigDict(extra="ignore")
+    supervisor_profile: SupervisorProfile
+    position_details: PositionDetails
+    alignment_summary: AlignmentSummary
+
+# Dotted path of every leaf field -> whether it holds a list of strings.
+SUMMARY_FIELDS: Dict[str, bool] = {
+    f"{section}.{name}": getattr(field.annotation, "__origin__", None) is list
+    for section, section_field in ProfessionalSummary.model_fields.items()
+    for name, field in section_field.annotation.model_fields.items()
+}
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+def parse_json_object(text: str) -> Optional[Dict]:
+    """
+    Parses the JSON object in an LLM response, tolerating a ```json fence or text around it.
+    Returns None if no object can be decoded.
+    """
+    text = _FENCE.sub("", text.strip())
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end <= start:
+            return None
+        try:
+            value = json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+    return value if isinstance(value, dict) else None
+
+def get_field(data: Dict, path: str):
+    section, name = path.split(".")
+    value = data.get(section)
+    return value.get(name) if isinstance(value, dict) else None
+
+def set_field(data: Dict, path: str, value) -> None:
+    section, name = path.split(".")
+    if not isinstance(data.get(section), dict):
+        data[section] = {}
+    data[section][name] = value
+
+_INVALID = object()
+# Separators that make one string an unambiguous list. Commas are not among them: they also occur
+# inside items ("Python, ideally 3.10+"), so a comma-only string is re-asked for rather than split.
+_LIST_SEPARATOR = re.compile(r"[\n;•]")
+_BULLET = re.compile(r"^\s*[-*]\s+")
+
+def _repair_value(value, is_list: bool):
+    """Coerces near-miss values (a list given as a newline-, semicolon- or bullet-separated string, a string given as a list). Returns _INVALID if hopeless or ambiguous."""
+    if is_list:
+        if isinstance(value, list):
+            return [str(item).strip() for item in value if isinstance(item, (str, int, float)) and str(item).strip()]
+        if isinstance(value, str) and (_LIST_SEPARATOR.search(value) or _BULLET.match(value)):
+            items = [_BULLET.sub("", item).strip() for item in _LIST_SEPARATOR.split(value)]
+            return [item for item in items if item] or _INVALID
+        return _INVALID
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, list) and value and all(isinstance(item, str) for item in value):
+        return " ".join(item.strip() for item in value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return _INVALID
+
+def repair_summary(data: Dict) -> Tuple[Dict, List[str]]:
+    """
+    Keeps every valid field, repairs those that can be coerced locally and reports the rest.
+
+    Returns:
+        (repaired summary, dotted paths of fields that are still missing or invalid)
+    """
+    repaired, invalid = {}, []
+    for path, is_list in SUMMARY_FIELDS.items():
+        value = _repair_value(get_field(data, path), is_list)
+        if value is _INVALID:
+            invalid.append(path)
+        else:
+            set_field(repaired, path, value)
+    return repaired, invalid
+
+def apply_fields(summary: Dict, patch: Dict, paths: List[str]) -> List[str]:
+    """
+    Copies the given fields from a (partial) LLM answer into the summary, repairing them the
+    same way as repair_summary.
+
+    Returns:
+        The paths that are still missing or invalid.
+    """
+    remaining = []
+    for path in paths:
+        value = _repair_value(get_field(patch, path), SUMMARY_FIELDS[path])
+        if value is _INVALID:
+            remaining.append(path)
+        else:
+            set_field(summary, path, value)
+    return remaining
+
+def validate_summary(data: Dict) -> Optional[Dict]:
+    """Returns the summary as a plain dict if it satisfies the schema, else None."""
+    try:
+        return ProfessionalSummary.model_validate(data).model_dump()
+    except ValidationError:
+        return None
+
+def fields_schema(paths: List[str]) -> str:
+    """Renders the JSON skeleton of the given fields, for asking the LLM to fill in only those."""
+    skeleton = {}
+    for path in paths:
+        set_field(skeleton, path, ["string", "..."] if SUMMARY_FIELDS[path] else "string")
+    return json.dumps(skeleton, indent=2)
@@ -0,0 +1,148 @@
+# FILE: src/supervisor_store.py
+# PURPOSE: Persistent store of supervisor research profiles, shared by every applicant's Step 3.
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Get project root for consistent output path management
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, "outputs", "cache", "supervisors", "profiles.db")
+DEFAULT_TTL = 14 * 24 * 3600  # seconds a profile is served at all
+DEFAULT_REVALIDATE_AFTER = 24 * 3600  # seconds a profile is served without re-checking the professor's pages
+
+# Profiles hold only what the professor's pages determine; the position-specific analysis is never stored.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS research_profiles (
+    professor_key TEXT NOT NULL,
+    university_key TEXT NOT NULL,
+    publication_url TEXT NOT NULL,
+    profile_hash TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    research_domains TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    validated_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (professor_key, university_key, publication_url, profile_hash, content_hash)
+);
+CREATE INDEX IF NOT EXISTS research_profiles_by_professor ON research_profiles (professor_key, university_key);
+"""
+
+def normalize_key(value: str) -> str:
+    """Case- and whitespace-insensitive form of a professor or university name."""
+    return " ".join(value.casefold().split())
+
+class SupervisorProfileStore:
+    """
+    SQLite store of supervisor research profiles (the research domains found on a professor's
+    pages) keyed by (professor, university, publication URL, content hash of the crawled pages).
+    Each entry also records a hash of everything else the profile depends on (the taxonomy), so
+    a change there is a miss. Nothing position-specific is stored, so one profile serves every
+    applicant whatever position documents they bring.
+
+    Entries expire after `ttl` seconds. Within `revalidate_after` seconds of the last check an
+    entry is served without touching the network; after that the caller re-crawls (conditional
+    GETs) and the entry is reused only if the content hash still matches.
+    """
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, ttl: int = DEFAULT_TTL, revalidate_after: int = DEFAULT_REVALIDATE_AFTER):
+        """
+        Initializes the store.
+
+        Args:
+            db_path (str): The SQLite database file.
+            ttl (int): Seconds after which a profile expires.
+            revalidate_after (int): Seconds a profile is trusted before its pages are checked again.
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.revalidate_after = revalidate_after
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def latest(self, professor_name: str, university: str, publication_url: str, profile_hash: str) -> Optional[Dict]:
+        """
+        Returns the most recently validated, unexpired profile, or None.
+
+        Returns:
+            Dict with 'profile', 'research_domains', 'content_hash', 'validated_at' and
+            'fresh' (True when it can be served without re-checking the pages).
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                """SELECT profile, research_domains, content_hash, validated_at FROM research_profiles
+                   WHERE professor_key = ? AND university_key = ? AND publication_url = ? AND profile_hash = ? AND expires_at > ?
+                   ORDER BY validated_at DESC LIMIT 1""",
+                (normalize_key(professor_name), normalize_key(university), publication_url, profile_hash, now)
+            ).fetchone()
+        if row is None:
+            return None
+        profile, research_domains, content_hash, validated_at = row
+        return {
+            "profile": json.loads(profile),
+            "research_domains": json.loads(research_domains),
+            "content_hash": content_hash,
+            "validated_at": validated_at,
+            "fresh": now - validated_at < self.revalidate_after,
+        }
+
+    def mark_validated(self, professor_name: str, university: str, publication_url: str, profile_hash: str, content_hash: str) -> None:
+        """Records that the professor's pages were re-checked and are unchanged."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """UPDATE research_profiles SET validated_at = ? WHERE professor_key = ? AND university_key = ?
+                   AND publication_url = ? AND profile_hash = ? AND content_hash = ?""",
+                (time.time(), normalize_key(professor_name), normalize_key(university), publication_url, profile_hash, content_hash)
+            )
+
+    def put(self, professor_name: str, university: str, publication_url: str, profile_hash: str, content_hash: str, profile: Dict) -> None:
+        """
+        Stores a profile, replacing any entry with the same key.
+
+        Args:
+            profile (Dict): The supervisor's research profile ('research_domains').
+        """
+        now = time.time()
+        research_domains = profile.get("research_domains", [])
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO research_profiles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_key(professor_name), normalize_key(university), publication_url, profile_hash, content_hash,
+                 json.dumps(research_domains, ensure_ascii=False), json.dumps(profile, ensure_ascii=False),
+                 now, now, now + self.ttl)
+            )
+
+    def invalidate(self, professor_name: str, university: Optional[str] = None) -> int:
+        """
+        Deletes every stored profile of a professor (at one university, or at all of them).
+
+        Returns:
+            int: The number of entries removed.
+        """
+        with closing(self._connect()) as conn, conn:
+            if university is None:
+                cursor = conn.execute("DELETE FROM research_profiles WHERE professor_key = ?", (normalize_key(professor_name),))
+            else:
+                cursor = conn.execute(
+                    "DELETE FROM research_profiles WHERE professor_key = ? AND university_key = ?",
+                    (normalize_key(professor_name), normalize_key(university))
+                )
+        logger.info(f"Invalidated {cursor.rowcount} stored profile(s) for {professor_name}")
+        return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        """Deletes expired entries and returns how many were removed."""
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute("DELETE FROM research_profiles WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
@@ -1,25 +1,49 @@
 # FILE: src/token_tracker.py
 # PURPOSE: A simple class to track token usage across the pipeline.
 
+import threading
+
 class TokenUsageTracker:
     """A simple class to track token usage across the pipeline."""
     def __init__(self):
         self.embedding_tokens = 0
         self.prompt_tokens = 0
         self.completion_tokens = 0
+        self.llm_calls = 0
+        self.llm_cache_hits = 0
+        self.llm_seconds = 0.0
+        self.query_embedding_hits = 0
+        self.query_embedding_misses = 0
+        # Steps may run concurrently in one process and share a tracker.
+        self._lock = threading.Lock()
 
     @property
     def total_tokens(self):
         return self.embedding_tokens + self.prompt_tokens + self.completion_tokens
 
     def add_embedding_tokens(self, count: int):
-        self.embedding_tokens += count
+        with self._lock:
+            self.embedding_tokens += count
 
     def add_completion_usage(self, usage):
         """Adds token usage from an OpenAI completion response."""
         if usage:
-            self.prompt_tokens += usage.prompt_tokens
-            self.completion_tokens += usage.completion_tokens
+            with self._lock:
+                self.prompt_tokens += usage.prompt_tokens
+                self.completion_tokens += usage.completion_tokens
+
+    def record_llm_call(self, latency_seconds: float, cached: bool):
+        """Counts one LLM call made through the gateway and its latency."""
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_cache_hits += int(cached)
+            self.llm_seconds += latency_seconds
+
+    def record_query_embeddings(self, hits: int, misses: int):
+        """Counts retrieval queries served from the query embedding cache (hits) and sent to the API (misses)."""
+        with self._lock:
+            self.query_embedding_hits += hits
+            self.query_embedding_misses += misses
 
     def display_usage(self):
         """Prints a formatted summary of token usage."""
@@ -31,4 +55,9 @@ class TokenUsageTracker:
         print(f"LLM Completion Tokens:     {self.completion_tokens}")
         print("-" * 50)
         print(f"Total Tokens Consumed:     {self.total_tokens}")
+        if self.llm_calls:
+            print(f"LLM Calls (cache hits):    {self.llm_calls} ({self.llm_cache_hits})")
+            print(f"LLM Time:                  {self.llm_seconds:.2f}s")
+        if self.query_embedding_hits or self.query_embedding_misses:
+            print(f"Query Cache (hit/miss):    {self.query_embedding_hits}/{self.query_embedding_misses}")
         print("=" * 50)
@@ -0,0 +1,33 @@
+# FILE: src/vector_store.py
+# PURPOSE: Read-only loader for the pickled single-candidate vector store directories written by earlier versions of Step 2.
+
+from typing import List, Tuple
+
+import numpy as np
+
+# Step 2 now writes every resume to the consolidated CandidateStore (src/candidate_store.py).
+# This adapter only keeps older single-candidate directories usable in Step 5; nothing writes
+# that layout any more.
+
+class LegacyFaissStore:
+    """
+    Adapts a LangChain FAISS store loaded from the old pickled layout to the
+    search_by_vectors/get_text interface of CandidateVectorStore.
+    """
+    def __init__(self, faiss_store):
+        self.faiss_store = faiss_store
+
+    def __len__(self) -> int:
+        return int(self.faiss_store.index.ntotal)
+
+    def get_text(self, chunk_id: int) -> str:
+        docstore_id = self.faiss_store.index_to_docstore_id[chunk_id]
+        return self.faiss_store.docstore.search(docstore_id).page_content
+
+    def get_vectors(self, chunk_ids: List[int]) -> np.ndarray:
+        return np.vstack([self.faiss_store.index.reconstruct(int(i)) for i in chunk_ids])
+
+    def search_by_vectors(self, vectors: List[List[float]], k: int = 4) -> List[List[Tuple[int, float]]]:
+        distances, ids = self.faiss_store.index.search(np.asarray(vectors, dtype=np.float32), min(k, len(self)))
+        return [[(int(i), float(d)) for i, d in zip(row_ids, row_distances) if i != -1]
+                for row_ids, row_distances in zip(ids, distances)]